@@ -26,13 +26,27 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.9",
+    python_requires=">=3.11",
     install_requires=[
         "fastmcp>=2.0.0",
         "httpx>=0.26.0",
         "pydantic>=2.5.3",
         "python-dotenv>=1.0.0",
     ],
+    extras_require={
+        # Lets RealAPIClient negotiate brotli and zstd in addition to gzip/deflate.
+        "compression": ["brotli>=1.1.0", "zstandard>=0.22.0", "httpx>=0.27.1"],
+        # Parquet output of the export tool.
+        "parquet": ["pyarrow>=14.0.0"],
+        # Vectorized filing queries in snapshot mode.
+        "columnar": ["numpy>=1.24"],
+        # Sparse TF-IDF scoring of the find_similar_filings tool.
+        "similarity": ["numpy>=1.24", "scipy>=1.10"],
+        # Faster event loop for the HTTP serving mode.
+        "serving": ["uvloop>=0.19; sys_platform != 'win32'"],
+        # Test suite (python -m pytest).
+        "test": ["pytest>=7.0"],
+    },
     entry_points={
         'console_scripts': [
             'financial-reports-mcp=src.financial_reports_mcp:run_cli',
@@ -0,0 +1,298 @@
+"""
+Grouped filing statistics computed server-side, so only the small result table reaches the agent.
+"""
+
+import asyncio
+import itertools
+import math
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.metrics import metrics
+from src.scheduler import priority
+from src.snapshot_api.snapshot_client import company_country
+
+GROUP_FIELDS = ("type", "country", "language", "month", "company", "source")
+AGGREGATE_METRICS = ("count", "first", "last")
+# Filter parameter that pins each group dimension to one value, for count-only probes.
+PROBE_PARAMS = {"type": "type", "country": "countries", "language": "language", "source": "source", "company": "company"}
+# Company filters by GICS code, resolved to company IDs through /companies/.
+GICS_FILTERS = ("sector", "industry_group", "industry", "sub_industry")
+
+PAGE_SIZE = 100
+MAX_SCAN = int(os.getenv("AGGREGATE_MAX_FILINGS", "20000"))
+MAX_GROUPS = int(os.getenv("AGGREGATE_MAX_GROUPS", "5000"))
+SCAN_CONCURRENCY = int(os.getenv("AGGREGATE_CONCURRENCY", "3"))
+# Companies of a GICS filter up to which filings are queried per company instead of filtered in a scan.
+PER_COMPANY_QUERIES = 25
+MAX_COMPANY_PAGES = 50
+
+Progress = Optional[Callable[[int, int], Awaitable[None]]]
+
+
+def _code(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("code", value.get("id"))
+    return None if value is None else str(value)
+
+
+def _company_id(filing: Dict[str, Any]) -> Optional[int]:
+    company = filing.get("company")
+    company = company.get("id") if isinstance(company, dict) else company
+    return None if company is None else int(company)
+
+
+def group_value(filing: Dict[str, Any], field: str) -> Optional[str]:
+    """
+    Return the value of group dimension ``field`` for one filing.
+    """
+    if field == "type":
+        return _code(filing.get("filing_type") or filing.get("type"))
+    if field == "country":
+        return company_country(filing.get("company") or {})
+    if field == "language":
+        return _code(filing.get("language"))
+    if field == "month":
+        return (filing.get("release_datetime") or "")[:7] or None
+    if field == "company":
+        company = filing.get("company")
+        return None if company is None else str(company.get("id") if isinstance(company, dict) else company)
+    if field == "source":
+        return _code(filing.get("source"))
+    raise ValueError(f"Unknown group_by field: {field}")
+
+
+class FilingAggregator:
+    """
+    Running per-group count and earliest/latest filing; memory grows with groups, not filings.
+    Filings of groups beyond ``max_groups`` are only counted in ``overflow``.
+    """
+    def __init__(self, group_by: List[str], max_groups: int = MAX_GROUPS):
+        self.group_by = group_by
+        self.max_groups = max_groups
+        self.groups: Dict[Tuple, Dict[str, Any]] = {}
+        self.overflow = 0
+        self.seen = 0
+
+    def add(self, filing: Dict[str, Any]) -> None:
+        self.seen += 1
+        key = tuple(group_value(filing, f) for f in self.group_by)
+        group = self.groups.get(key)
+        if group is None:
+            if len(self.groups) >= self.max_groups:
+                self.overflow += 1
+                return
+            group = self.groups[key] = {"count": 0, "first": None, "last": None}
+        group["count"] += 1
+        released = filing.get("release_datetime")
+        if released:
+            summary = {"id": filing.get("id"), "release_datetime": released, "title": filing.get("title")}
+            if group["first"] is None or released < group["first"]["release_datetime"]:
+                group["first"] = summary
+            if group["last"] is None or released > group["last"]["release_datetime"]:
+                group["last"] = summary
+
+    def add_count(self, key: Tuple, count: int) -> None:
+        if count:
+            self.groups[key] = {"count": count, "first": None, "last": None}
+            self.seen += count
+
+    def rows(self, wanted: List[str]) -> List[Dict[str, Any]]:
+        rows = []
+        for key in sorted(self.groups, key=lambda k: tuple("" if v is None else v for v in k)):
+            row = dict(zip(self.group_by, key))
+            row.update({m: self.groups[key][m] for m in wanted})
+            rows.append(row)
+        return rows
+
+
+async def _count(api_client, filters: Dict[str, Any]) -> Dict[str, Any]:
+    return await api_client.get_filings(page=1, page_size=1, **filters)
+
+
+async def _probe_values(api_client, field: str, filters: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Enumerate the possible values of ``field`` without scanning filings, or None if not possible.
+    """
+    pinned = filters.get(PROBE_PARAMS.get(field, ""))
+    if pinned:
+        if isinstance(pinned, str):
+            values = pinned.split(",")
+        else:
+            # Company and source filters may be a bare ID.
+            values = pinned if isinstance(pinned, (list, tuple)) else [pinned]
+        return [str(v).strip() for v in values]
+    if field == "type":
+        result = await api_client.get_filing_types(page=1, page_size=PAGE_SIZE)
+        if "error" in result or result.get("next"):
+            return None
+        return [t["code"] for t in result.get("results", []) if t.get("code")]
+    return None
+
+
+async def _companies_in(api_client, gics: Dict[str, str], countries: Any) -> Any:
+    """
+    IDs of the companies under the GICS codes in ``gics`` (``sector``, ``industry_group``,
+    ``industry``, ``sub_industry``) and in ``countries``, or the error result of a failed page.
+    """
+    ids: Set[int] = set()
+    for page in range(1, MAX_COMPANY_PAGES + 1):
+        with priority("bulk"):
+            result = await api_client.get_companies(countries=countries, page=page, page_size=PAGE_SIZE, **gics)
+        if "error" in result:
+            return result
+        ids.update(int(c["id"]) for c in result.get("results", []) if c.get("id") is not None)
+        if not result.get("next"):
+            return ids
+    return {"error": f"Error: More than {MAX_COMPANY_PAGES * PAGE_SIZE} companies match the GICS filter; "
+                     "use a narrower code or add countries"}
+
+
+async def _scan(api_client, filters: Dict[str, Any], pages: int, fold: Callable[[Dict[str, Any]], None],
+                on_page: Callable[[], Awaitable[None]]) -> Optional[Dict[str, Any]]:
+    """
+    Stream ``pages`` pages of filings matching ``filters`` in ascending release order into ``fold``.
+    At most SCAN_CONCURRENCY pages are in flight; each is folded as soon as it is next in order.
+    Returns the error result of a failed page, else None. Pages still in flight when the scan
+    ends, fails or is cancelled (e.g. by the tool call's deadline) are cancelled.
+    """
+    scan_filters = dict(filters, ordering="release_datetime")
+    semaphore = asyncio.Semaphore(max(1, SCAN_CONCURRENCY))
+
+    async def fetch(page: int) -> Dict[str, Any]:
+        async with semaphore:
+            with priority("bulk"):
+                return await api_client.get_filings(page=page, page_size=PAGE_SIZE, **scan_filters)
+
+    pending: List[asyncio.Task] = []
+    next_page = 1
+    try:
+        for _ in range(pages):
+            while next_page <= pages and len(pending) < max(1, SCAN_CONCURRENCY):
+                pending.append(asyncio.ensure_future(fetch(next_page)))
+                next_page += 1
+            result = await pending.pop(0)
+            if "error" in result:
+                return result
+            for filing in result.get("results", []):
+                fold(filing)
+            metrics.incr("aggregate_pages_scanned")
+            await on_page()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def aggregate_filings(
+    api_client,
+    filters: Dict[str, Any],
+    group_by: List[str],
+    wanted: List[str],
+    progress: Progress = None,
+    max_filings: int = MAX_SCAN,
+) -> Dict[str, Any]:
+    """
+    Aggregate the filings matching ``filters`` by ``group_by`` dimensions.
+
+    The ``count`` of a one-item page answers ungrouped counts directly, and count-only groupings
+    over enumerable dimensions (filing types, pinned countries, ...) are answered with one count
+    probe per group when that is cheaper than scanning. Otherwise pages are streamed in ascending
+    release order (new filings append at the end instead of shifting pages) and folded into a
+    FilingAggregator, up to ``max_filings`` filings.
+
+    GICS filters (``sector``, ``industry_group``, ``industry``, ``sub_industry``) are resolved to
+    the matching companies first. Up to PER_COMPANY_QUERIES companies are queried one by one and
+    their results summed; beyond that the other filters are scanned and filings of companies
+    outside the group are skipped.
+    """
+    unknown = [f for f in group_by if f not in GROUP_FIELDS] + [m for m in wanted if m not in AGGREGATE_METRICS]
+    if unknown:
+        return {"error": f"Unsupported group_by or metrics: {', '.join(unknown)}"}
+    filters = {k: v for k, v in filters.items() if v is not None}
+    gics = {level: str(filters.pop(level)) for level in GICS_FILTERS if level in filters}
+    queries = [filters]
+    members: Optional[Set[int]] = None
+    if gics:
+        members = await _companies_in(api_client, gics, filters.get("countries"))
+        if isinstance(members, dict):
+            return members
+        if filters.get("company") is not None:
+            queries = [filters] if int(filters["company"]) in members else []
+            members = None
+        elif len(members) <= PER_COMPANY_QUERIES:
+            queries = [dict(filters, company=c) for c in sorted(members)]
+            members = None
+
+    semaphore = asyncio.Semaphore(max(1, SCAN_CONCURRENCY))
+
+    async def count(query: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            with priority("bulk"):
+                return await _count(api_client, query)
+
+    probes = await asyncio.gather(*(count(q) for q in queries))
+    for probe in probes:
+        if "error" in probe:
+            return probe
+    # Filings of the queries; with ``members`` set, of all companies before the group is applied.
+    totals = [probe.get("count", 0) for probe in probes]
+    total = sum(totals)
+    aggregator = FilingAggregator(group_by)
+    pages = [math.ceil(min(t, max_filings) / PAGE_SIZE) for t in totals]
+    method = "scan"
+
+    if members is None and not group_by and wanted == ["count"]:
+        aggregator.add_count((), total)
+        method = "count"
+    elif members is None and wanted == ["count"] and total:
+        values = [await _probe_values(api_client, f, filters) for f in group_by]
+        combos = math.prod(len(v) for v in values) if all(v is not None for v in values) else None
+        if combos is not None and combos * len(queries) < sum(pages):
+            async def count_group(combo: Tuple) -> Tuple[Tuple, List[Dict[str, Any]]]:
+                pinned = {PROBE_PARAMS[f]: v for f, v in zip(group_by, combo)}
+                return combo, await asyncio.gather(*(count(dict(q, **pinned)) for q in queries))
+
+            for combo, results in await asyncio.gather(*(count_group(c) for c in itertools.product(*values))):
+                for result in results:
+                    if "error" in result:
+                        return result
+                aggregator.add_count(combo, sum(r.get("count", 0) for r in results))
+            method = "probe"
+            metrics.incr("aggregate_count_probes", combos * len(queries))
+
+    if method == "scan":
+        limit = min(total, max_filings)
+        scanned = 0
+
+        def fold(filing: Dict[str, Any]) -> None:
+            nonlocal scanned
+            if scanned >= max_filings:
+                return
+            scanned += 1
+            if members is None or _company_id(filing) in members:
+                aggregator.add(filing)
+
+        async def on_page() -> None:
+            if progress is not None:
+                await progress(scanned, limit)
+
+        for query, query_pages in zip(queries, pages):
+            if scanned >= max_filings:
+                break
+            error = await _scan(api_client, query, query_pages, fold, on_page)
+            if error is not None:
+                return error
+        if members is not None:
+            # The group's total is only known from the scan.
+            total = aggregator.seen
+
+    return {
+        "count": total,
+        "scanned": scanned if method == "scan" else 0,
+        "method": method,
+        "truncated": method == "scan" and sum(totals) > max_filings,
+        "overflow": aggregator.overflow,
+        "group_by": group_by,
+        "groups": aggregator.rows(wanted),
+    }
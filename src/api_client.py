@@ -1,6 +1,7 @@
 """
 API client factory for Financial Reports API.
-This module provides a factory for creating the real API client only.
+This module provides a factory for creating the real API client, or the offline
+snapshot client when API_MODE=snapshot.
 """
 
 import os
@@ -15,15 +16,20 @@ load_dotenv()
 
 class APIClient:
     """
-    Factory for creating the real API client for Financial Reports API.
+    Factory for creating the API client for Financial Reports API.
     """
     @staticmethod
     async def create() -> Any:
         """
-        Create and return the real API client.
+        Create and return the API client selected by API_MODE ("real" by default, or "snapshot").
+        Real clients are pooled per API key, so each tenant keeps its connections and cache namespace.
         """
-        from src.real_api.real_client import RealAPIClient
         import os
-        api_key = os.getenv("API_KEY", "your_api_key_here")
+        if os.getenv("API_MODE", "real").lower() == "snapshot":
+            from src.snapshot_api.snapshot_client import SnapshotAPIClient
+            return SnapshotAPIClient.load(os.getenv("SNAPSHOT_PATH", "snapshot.json.gz"))
+        from src.tenants import request_api_key, tenants
+        # In HTTP mode a request may carry its own API key; otherwise use the server's key.
+        api_key = request_api_key() or os.getenv("API_KEY", "your_api_key_here")
         api_base_url = os.getenv("API_BASE_URL", "https://api.financialreports.eu/")
-        return RealAPIClient(api_key, api_base_url)
+        return await tenants.client_for(api_key, api_base_url)
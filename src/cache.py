@@ -0,0 +1,366 @@
+"""
+Response cache for the Financial Reports API clients.
+Entries are keyed by the canonical request (URL plus sorted query parameters).
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlencode
+
+
+def canonical_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the canonical cache key of a GET request; parameter order and None values do not matter.
+    """
+    query = sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)
+    return f"{url}?{urlencode(query)}" if query else url
+
+
+# Freshness lifetime in seconds per endpoint template. Taxonomy data changes rarely,
+# filing lists change whenever new filings are disseminated.
+ENDPOINT_TTLS = {
+    "/sectors/": 3600,
+    "/industry-groups/": 3600,
+    "/industries/": 3600,
+    "/sub-industries/": 3600,
+    "/filing-types/": 3600,
+    "/filing-types/{id}/": 3600,
+    "/industry-groups/{id}/": 3600,
+    "/industries/{id}/": 3600,
+    "/sub-industries/{id}/": 3600,
+    "/sources/": 3600,
+    "/sources/{id}/": 3600,
+    "/schema/": 86400,
+    "/companies/": 300,
+    "/companies/{id}/": 600,
+    "/filings/": 60,
+    "/filings/{id}/": 600,
+    "/processed-filings/{id}/": 3600,
+}
+
+# Reference data that is identical for every API key, so tenants may share cached copies.
+PUBLIC_ENDPOINTS = {
+    "/sectors/", "/industry-groups/", "/industries/", "/sub-industries/",
+    "/industry-groups/{id}/", "/industries/{id}/", "/sub-industries/{id}/",
+    "/filing-types/", "/filing-types/{id}/", "/sources/", "/sources/{id}/", "/schema/",
+}
+
+
+# Set while bulk reads (exports) run, so their pages neither fill nor evict the cache.
+_bypass: ContextVar[bool] = ContextVar("cache_bypass", default=False)
+
+
+def bypassed() -> bool:
+    """
+    True inside an ``uncached()`` block.
+    """
+    return _bypass.get()
+
+
+@contextmanager
+def uncached():
+    """
+    Skip the response cache for all requests made inside this block (in the current task).
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+# Response keys read inside a ``recording()`` block, each with its remaining freshness in seconds
+# (None when the key missed and no response was stored for it).
+_reads: ContextVar[Optional[Dict[str, Optional[float]]]] = ContextVar("cache_reads", default=None)
+
+
+@contextmanager
+def recording():
+    """
+    Collect the response keys read or stored inside this block (in the current task), so a value
+    derived from them can expire and be invalidated with them.
+    """
+    reads: Dict[str, Optional[float]] = {}
+    token = _reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _reads.reset(token)
+
+
+def _record(key: str, remaining: Optional[float]) -> None:
+    reads = _reads.get()
+    if reads is not None and (remaining is not None or key not in reads):
+        reads[key] = remaining
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "expires_at", "stale_until", "error_until", "negative")
+
+    def __init__(self, value: Any, ttl: float, stale_ttl: float = 0, error_ttl: float = 0, negative: bool = False):
+        # Wall-clock times, so entries stay meaningful when shared with other processes.
+        now = time.time()
+        self.value = value
+        self.stored_at = now
+        self.expires_at = now + ttl
+        self.stale_until = self.expires_at + stale_ttl
+        self.error_until = self.expires_at + error_ttl
+        self.negative = negative
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def can_revalidate(self) -> bool:
+        """
+        True while an expired entry may still be served as-is during a background refresh.
+        """
+        return not self.negative and time.time() < self.stale_until
+
+    def can_serve_on_error(self) -> bool:
+        """
+        True while an expired entry may still be served when the upstream fails.
+        """
+        return not self.negative and time.time() < self.error_until
+
+
+class DiskCacheStore:
+    """
+    SQLite-backed second cache level shared by all worker processes on one host.
+
+    Reads and writes wait on other processes' locks and serialize large bodies, so the response
+    cache runs them on the store's own thread (``aget``, ``put_later``) instead of the event loop.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # One thread, so queued writes land in order and a read sees the writes queued before it.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL,"
+            " expires_at REAL, stale_until REAL, error_until REAL, negative INTEGER, retain_until REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_retain ON entries (retain_until)")
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at, expires_at, stale_until, error_until, negative FROM entries"
+                " WHERE key = ? AND retain_until > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        entry = CacheEntry.__new__(CacheEntry)
+        entry.value = json.loads(row[0])
+        entry.stored_at, entry.expires_at, entry.stale_until, entry.error_until = row[1:5]
+        entry.negative = bool(row[5])
+        return entry
+
+    async def aget(self, key: str) -> Optional[CacheEntry]:
+        """
+        ``get`` on the store's thread.
+        """
+        return await asyncio.wrap_future(self._executor.submit(self.get, key))
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        retain_until = max(entry.expires_at, entry.stale_until, entry.error_until)
+        value = json.dumps(entry.value, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, value, entry.stored_at, entry.expires_at, entry.stale_until, entry.error_until,
+                 int(entry.negative), retain_until),
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._conn.execute("DELETE FROM entries WHERE retain_until <= ?", (time.time(),))
+
+    def put_later(self, key: str, entry: CacheEntry) -> None:
+        """
+        Queue ``put`` on the store's thread without waiting for it. A failed write only costs
+        the other workers a cache hit.
+        """
+        self._executor.submit(self.put, key, entry)
+
+    def flush(self) -> None:
+        """
+        Wait for the queued writes.
+        """
+        self._executor.submit(lambda: None).result()
+
+    def clear(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+
+class ResponseCache:
+    """
+    Bounded in-memory cache of API responses with per-entry TTL.
+
+    Negative entries hold the formatted "not found" error returned for a request, so repeated
+    lookups of the same wrong ID or code are answered without going upstream.
+
+    Positive entries outlive their TTL by a stale-while-revalidate window, during which they are
+    served immediately while a single background refresh runs, and by a stale-if-error window,
+    during which they are served (marked stale) if the upstream errors or times out.
+
+    With a ``shared`` store, every write also goes to disk and local misses (or expired local
+    entries) are looked up there, so worker processes reuse each other's responses. Use ``aget``
+    on the event loop; it reads the disk off the loop.
+    """
+    def __init__(self, max_entries: int = 10000, negative_ttl: float = 60.0,
+                 stale_ttl: float = 300.0, error_ttl: float = 3600.0, enabled: bool = True,
+                 shared: Optional[DiskCacheStore] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def on_change(self, listener: Callable[[str], None]) -> None:
+        """
+        Call ``listener(key)`` whenever a cached response is replaced by a different one.
+        """
+        self._listeners.append(listener)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Return the entry for ``key`` while it is fresh or still usable as stale data, else None.
+        """
+        if _bypass.get():
+            return None
+        entry = self._entries.get(key)
+        if self.shared is not None and (entry is None or not entry.is_fresh()):
+            entry = self._merge_shared(key, self.shared.get(key))
+        return self._usable(key, entry)
+
+    async def aget(self, key: str) -> Optional[CacheEntry]:
+        """
+        ``get`` for the event loop: the shared store is read on its own thread.
+        """
+        if _bypass.get():
+            return None
+        entry = self._entries.get(key)
+        if self.shared is not None and (entry is None or not entry.is_fresh()):
+            entry = self._merge_shared(key, await self.shared.aget(key))
+        return self._usable(key, entry)
+
+    def _merge_shared(self, key: str, shared_entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        """
+        The newer of the local entry for ``key`` and ``shared_entry``, kept locally.
+        """
+        entry = self._entries.get(key)
+        if shared_entry is not None and (entry is None or shared_entry.expires_at > entry.expires_at):
+            entry = shared_entry
+            self._store_local(key, entry)
+        return entry
+
+    def _usable(self, key: str, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        if entry is None:
+            _record(key, None)
+            return None
+        if not (entry.is_fresh() or entry.can_revalidate() or entry.can_serve_on_error()):
+            self._entries.pop(key, None)
+            _record(key, None)
+            return None
+        self._entries.move_to_end(key)
+        _record(key, entry.expires_at - time.time())
+        return entry
+
+    def put(self, key: str, value: Any, ttl: float, negative: bool = False) -> None:
+        if ttl <= 0 or not self.enabled or _bypass.get():
+            _record(key, 0)
+            return
+        if negative:
+            entry = CacheEntry(value, ttl, negative=True)
+        else:
+            entry = CacheEntry(value, ttl, self.stale_ttl, self.error_ttl)
+        previous = self._entries.get(key)
+        self._store_local(key, entry)
+        if self.shared is not None:
+            self.shared.put_later(key, entry)
+        _record(key, ttl)
+        if previous is not None and self._listeners and previous.value != value:
+            for listener in self._listeners:
+                listener(key)
+
+    def _store_local(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put_negative(self, key: str, error: Dict[str, Any]) -> None:
+        """
+        Remember that ``key`` resolved to a not-found ``error`` for the negative TTL.
+        """
+        self.put(key, error, self.negative_ttl, negative=True)
+
+    def begin_refresh(self, key: str) -> bool:
+        """
+        Claim the background refresh of ``key``; False if one is already running.
+        """
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def end_refresh(self, key: str) -> None:
+        self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def ttl_for(endpoint: str) -> float:
+    """
+    Return the freshness lifetime of responses from ``endpoint`` (an endpoint template).
+    """
+    return ENDPOINT_TTLS.get(endpoint, 0)
+
+
+def mark_stale(value: Any, entry: CacheEntry, reason: str) -> Any:
+    """
+    Return a copy of a cached response flagged as stale, for serving when the upstream failed.
+    """
+    if not isinstance(value, dict):
+        return value
+    return dict(value, _stale=True, _stale_age_seconds=round(entry.age, 1), _stale_reason=reason)
+
+
+# Shared cache for the whole process; API clients are created per tool call.
+# SHARED_CACHE_PATH adds an on-disk level shared with the other worker processes.
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+    negative_ttl=float(os.getenv("NEGATIVE_CACHE_TTL", "60")),
+    stale_ttl=float(os.getenv("CACHE_STALE_WHILE_REVALIDATE", "300")),
+    error_ttl=float(os.getenv("CACHE_STALE_IF_ERROR", "3600")),
+    enabled=os.getenv("CACHE_ENABLED", "1").lower() not in ("0", "false", "no"),
+    shared=DiskCacheStore(os.environ["SHARED_CACHE_PATH"]) if os.getenv("SHARED_CACHE_PATH") else None,
+)
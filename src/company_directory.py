@@ -0,0 +1,349 @@
+"""
+Optional local company directory for in-process company name search.
+
+Each tenant gets its own directory, paged in through ``get_companies`` a few pages at a time in
+the background and re-paged every ``COMPANY_DIRECTORY_REFRESH`` seconds; companies not seen in a
+full pass are dropped. Failed pages are retried with exponential backoff. Searches are answered
+from a token-prefix index (with acronyms, so "DB" finds "Deutsche Bank") and a trigram index for
+misspellings, filtered by country and GICS codes. ``search_companies`` only goes upstream when
+the directory has no match.
+"""
+
+import asyncio
+import bisect
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from src.metrics import metrics
+from src.scheduler import priority
+
+# GICS codes nest by prefix: sector (2 digits) > industry group (4) > industry (6) > sub-industry (8).
+GICS_LEVELS = ("sector", "industry_group", "industry", "sub_industry")
+MIN_TRIGRAM_SCORE = 0.3
+# Outcomes of ``CompanyDirectory.refresh_step``.
+PARTIAL, COMPLETE, FAILED = "partial", "complete", "failed"
+
+
+def normalize(text: str) -> str:
+    """
+    Casefold, strip accents and punctuation, and collapse whitespace.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _gics_codes(company: Dict[str, Any]) -> Set[str]:
+    """
+    All GICS codes a company belongs to, including the ancestors of its most specific code.
+    """
+    codes = set()
+    for level in GICS_LEVELS:
+        value = company.get(level)
+        code = value.get("code") if isinstance(value, dict) else value
+        if code:
+            code = str(code)
+            codes.update(code[:n] for n in range(2, len(code) + 1, 2))
+    return codes
+
+
+def _country(company: Dict[str, Any]) -> Optional[str]:
+    country = company.get("country_code") or company.get("country")
+    if isinstance(country, dict):
+        country = country.get("code")
+    return country.upper() if isinstance(country, str) else None
+
+
+class CompanyDirectory:
+    """
+    In-memory company directory with prefix, acronym and trigram indexes.
+    """
+    def __init__(self, refresh_interval: float = 3600.0, pages_per_step: int = 5,
+                 max_pages: Optional[int] = None, retry_delay: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self.pages_per_step = pages_per_step
+        self.max_pages = max_pages
+        self.retry_delay = retry_delay
+        self.companies: Dict[int, Dict[str, Any]] = {}
+        self.ready = False
+        self.last_full_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        # Companies seen in the current pass; the rest are dropped when it completes.
+        self._seen: Set[int] = set()
+        self._names: Dict[int, str] = {}
+        self._token_ids: Dict[str, Set[int]] = {}
+        self._trigram_ids: Dict[str, Set[int]] = {}
+        self._identifier_ids: Dict[str, int] = {}
+        self._sorted_tokens: List[str] = []
+        self._tokens_dirty = False
+        self._next_page = 1
+        self._task: Optional[asyncio.Task] = None
+
+    def _unindex(self, company_id: int) -> None:
+        name = self._names.pop(company_id, None)
+        if name is None:
+            return
+        for token in self._tokens_of(name):
+            ids = self._token_ids.get(token)
+            if ids is not None:
+                ids.discard(company_id)
+                if not ids:
+                    del self._token_ids[token]
+                    self._tokens_dirty = True
+        for gram in trigrams(name):
+            ids = self._trigram_ids.get(gram)
+            if ids is not None:
+                ids.discard(company_id)
+                if not ids:
+                    del self._trigram_ids[gram]
+
+    @staticmethod
+    def _tokens_of(name: str) -> Set[str]:
+        tokens = set(name.split())
+        words = name.split()
+        if len(words) > 1:
+            # Acronyms of the full name and of the name without its last word (usually the legal form).
+            tokens.add("".join(w[0] for w in words))
+            tokens.add("".join(w[0] for w in words[:-1]))
+        return tokens
+
+    def add(self, company: Dict[str, Any]) -> None:
+        """
+        Insert or update one company.
+        """
+        if company.get("id") is None:
+            return
+        company_id = int(company["id"])
+        name = normalize(company.get("name", ""))
+        if self._names.get(company_id) != name:
+            self._unindex(company_id)
+            self._names[company_id] = name
+            for token in self._tokens_of(name):
+                if token not in self._token_ids:
+                    self._tokens_dirty = True
+                self._token_ids.setdefault(token, set()).add(company_id)
+            for gram in trigrams(name):
+                self._trigram_ids.setdefault(gram, set()).add(company_id)
+        for field in ("isin", "lei"):
+            if company.get(field):
+                self._identifier_ids[company[field].upper()] = company_id
+        self.companies[company_id] = company
+
+    def remove(self, company_id: int) -> None:
+        """
+        Drop one company.
+        """
+        company = self.companies.pop(company_id, None)
+        if company is None:
+            return
+        self._unindex(company_id)
+        for field in ("isin", "lei"):
+            value = company.get(field)
+            if value and self._identifier_ids.get(value.upper()) == company_id:
+                del self._identifier_ids[value.upper()]
+
+    def _sweep(self) -> int:
+        """
+        Drop the companies not seen in the pass that just completed; returns how many.
+        """
+        gone = [company_id for company_id in self.companies if company_id not in self._seen]
+        for company_id in gone:
+            self.remove(company_id)
+        self._seen = set()
+        return len(gone)
+
+    def _prefix_matches(self, token: str) -> Set[int]:
+        if self._tokens_dirty:
+            self._sorted_tokens = sorted(self._token_ids)
+            self._tokens_dirty = False
+        ids: Set[int] = set()
+        pos = bisect.bisect_left(self._sorted_tokens, token)
+        while pos < len(self._sorted_tokens) and self._sorted_tokens[pos].startswith(token):
+            ids |= self._token_ids[self._sorted_tokens[pos]]
+            pos += 1
+        return ids
+
+    def _rank(self, query: str) -> List[tuple]:
+        """
+        Return ``(score, name, id)`` tuples for companies matching ``query``, best first.
+        """
+        identifier = self._identifier_ids.get(query.strip().upper())
+        if identifier is not None:
+            return [(2.0, self._names[identifier], identifier)]
+        text = normalize(query)
+        if not text:
+            return []
+        scores: Dict[int, float] = {}
+        tokens = text.split()
+        prefix_ids = None
+        for token in tokens:
+            ids = self._prefix_matches(token)
+            prefix_ids = ids if prefix_ids is None else prefix_ids & ids
+        for company_id in prefix_ids or ():
+            name = self._names[company_id]
+            if name == text:
+                scores[company_id] = 1.5
+            elif name.startswith(text):
+                scores[company_id] = 1.2
+            else:
+                scores[company_id] = 1.0
+        if not scores:
+            # Fall back to trigram similarity for misspellings.
+            query_grams = trigrams(text)
+            overlap: Counter = Counter()
+            for gram in query_grams:
+                overlap.update(self._trigram_ids.get(gram, ()))
+            for company_id, common in overlap.items():
+                # Dice coefficient; a padded name of length n has n + 2 distinct-ish trigrams.
+                score = 2 * common / (len(query_grams) + len(self._names[company_id]) + 2)
+                if score >= MIN_TRIGRAM_SCORE:
+                    scores[company_id] = score
+        return sorted(((score, self._names[cid], cid) for cid, score in scores.items()),
+                      key=lambda item: (-item[0], len(item[1]), item[2]))
+
+    def search(
+        self,
+        search: Optional[str] = None,
+        countries: Optional[Union[str, List[str]]] = None,
+        sector: Optional[str] = None,
+        industry_group: Optional[str] = None,
+        industry: Optional[str] = None,
+        sub_industry: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+    ) -> Dict[str, Any]:
+        """
+        Search the directory; returns the API's pagination envelope.
+        """
+        if search:
+            ranked: Iterable[int] = (cid for _, _, cid in self._rank(search))
+        else:
+            ranked = sorted(self.companies)
+        if isinstance(countries, str):
+            countries = countries.split(",")
+        country_set = {c.strip().upper() for c in countries or [] if c.strip()}
+        codes = [str(c) for c in (sector, industry_group, industry, sub_industry) if c is not None]
+        results = []
+        for company_id in ranked:
+            company = self.companies[company_id]
+            if country_set and _country(company) not in country_set:
+                continue
+            if codes and not set(codes) <= _gics_codes(company):
+                continue
+            results.append(company)
+        start = (max(1, page) - 1) * page_size
+        return {
+            "count": len(results),
+            "next": None,
+            "previous": None,
+            "results": results[start:start + page_size],
+        }
+
+    async def refresh_step(self, api_client) -> str:
+        """
+        Page in the next ``pages_per_step`` pages of /companies/. Returns COMPLETE when a full
+        pass ended, FAILED when a page could not be fetched (``last_error`` says why; the pass
+        resumes at that page), else PARTIAL.
+        """
+        for _ in range(self.pages_per_step):
+            result = await api_client.get_companies(page=self._next_page, page_size=100)
+            if "error" in result:
+                self.last_error = result["error"]
+                return FAILED
+            for company in result.get("results", []):
+                self.add(company)
+                self._seen.add(int(company["id"]))
+            last = not result.get("next") or (self.max_pages and self._next_page >= self.max_pages)
+            self._next_page = 1 if last else self._next_page + 1
+            if last:
+                removed = self._sweep()
+                self.ready = True
+                self.last_full_sync = time.time()
+                metrics.incr("company_directory_full_syncs")
+                metrics.incr("company_directory_removed", removed)
+                return COMPLETE
+        return PARTIAL
+
+    def backoff(self, failures: int) -> float:
+        """
+        Delay before retrying after ``failures`` consecutive failures: exponential from
+        ``retry_delay`` with jitter, capped at the refresh interval.
+        """
+        delay = min(self.refresh_interval, self.retry_delay * 2 ** (failures - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _run(self, api_client) -> None:
+        with priority("background"):
+            while True:
+                try:
+                    state = await self.refresh_step(api_client)
+                except Exception as e:
+                    self.last_error = str(e)
+                    state = FAILED
+                if state == FAILED:
+                    self.failures += 1
+                    delay = self.backoff(self.failures)
+                    metrics.incr("company_directory_sync_failures")
+                    print(f"Company directory refresh failed: {self.last_error}; retrying in {delay:.1f}s",
+                          file=sys.stderr)
+                else:
+                    self.failures = 0
+                    delay = self.refresh_interval if state == COMPLETE else 0
+                await asyncio.sleep(delay)
+
+    def ensure_syncing(self, api_client) -> None:
+        """
+        Start the background sync task if it is not running yet.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(api_client))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+
+def directory_enabled() -> bool:
+    return os.getenv("COMPANY_DIRECTORY", "0").lower() in ("1", "true", "yes")
+
+
+MAX_DIRECTORIES = int(os.getenv("COMPANY_DIRECTORY_TENANTS", "8"))
+# One directory per tenant namespace, since the companies visible may differ between API keys.
+# Only synced when COMPANY_DIRECTORY is enabled; the least recently used is dropped beyond MAX_DIRECTORIES.
+_directories: "OrderedDict[Optional[str], CompanyDirectory]" = OrderedDict()
+
+
+def company_directory(namespace: Optional[str] = None) -> CompanyDirectory:
+    directory = _directories.get(namespace)
+    if directory is None:
+        directory = _directories[namespace] = CompanyDirectory(
+            refresh_interval=float(os.getenv("COMPANY_DIRECTORY_REFRESH", "3600")),
+            max_pages=int(os.getenv("COMPANY_DIRECTORY_MAX_PAGES", "0")) or None,
+        )
+        while len(_directories) > max(1, MAX_DIRECTORIES):
+            _directories.popitem(last=False)[1].stop()
+    _directories.move_to_end(namespace)
+    return directory
+
+
+def directory_entries() -> int:
+    """
+    Companies held by all directories.
+    """
+    return sum(len(d) for d in _directories.values())
@@ -0,0 +1,139 @@
+"""
+Per-tool-call deadline budgets shared by every upstream request the call makes.
+
+The budget comes from the client (``_meta.timeout`` on the MCP request, or the ``x-request-timeout``
+HTTP header, in seconds) or from ``TOOL_TIMEOUT``; bulk tools that page through whole result sets
+get ``BULK_TOOL_TIMEOUT`` instead. It is stored in a context variable, so every
+RealAPIClient request made by the tool (including rate-limit waits) sees the remaining time and
+sets its httpx timeouts from it. When the budget runs out the tool call is cancelled, which also
+aborts its in-flight upstream requests and frees their connections.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from src.metrics import metrics
+
+DEFAULT_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "60"))
+MAX_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_MAX", "300"))
+BULK_TIMEOUT = float(os.getenv("BULK_TOOL_TIMEOUT", "3600"))
+# Tools that read every page of a result set; their budget is BULK_TOOL_TIMEOUT.
+BULK_TOOLS = frozenset({"export_results", "aggregate_filings", "watchlist_latest_filings"})
+TIMEOUT_HEADER = "x-request-timeout"
+
+# Absolute time.monotonic() deadline of the current tool call, or None for no deadline.
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current deadline budget runs out before an upstream request can start."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """
+    Run the block with at most ``seconds`` left; an enclosing, earlier deadline still applies.
+    ``None`` clears the deadline (for detached background work).
+    """
+    if seconds is None:
+        token = _deadline.set(None)
+    else:
+        current = _deadline.get()
+        new = time.monotonic() + max(0.0, seconds)
+        token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left in the current budget (never negative), or None without a deadline.
+    """
+    current = _deadline.get()
+    return None if current is None else max(0.0, current - time.monotonic())
+
+
+def check() -> Optional[float]:
+    """
+    Return the remaining budget, raising DeadlineExceeded if it is used up.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("deadline exceeded")
+    return left
+
+
+def _client_timeout(meta: Any) -> Optional[float]:
+    value = None
+    if meta is not None:
+        extra = meta.model_dump() if hasattr(meta, "model_dump") else dict(meta)
+        value = extra.get("timeout")
+    if value is None:
+        try:
+            from fastmcp.server.dependencies import get_http_headers
+        except ImportError:
+            return None
+        value = get_http_headers(include_all=True).get(TIMEOUT_HEADER)
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def tool_budget(meta: Any = None, tool: Optional[str] = None) -> float:
+    """
+    Budget of a tool call: the client's timeout capped at TOOL_TIMEOUT_MAX, else TOOL_TIMEOUT.
+    For bulk tools both the default and the cap are BULK_TOOL_TIMEOUT.
+    """
+    bulk = tool in BULK_TOOLS
+    requested = _client_timeout(meta)
+    if requested is None or requested <= 0:
+        return BULK_TIMEOUT if bulk else DEFAULT_TIMEOUT
+    return min(requested, BULK_TIMEOUT if bulk else MAX_TIMEOUT)
+
+
+def _request_meta(context: Any) -> Any:
+    """
+    The ``_meta`` of an MCP request, from the request params or the fastmcp request context.
+    """
+    meta = getattr(context.message, "meta", None)
+    if meta is None and context.fastmcp_context is not None:
+        try:
+            meta = context.fastmcp_context.request_context.meta
+        except (AttributeError, LookupError, ValueError):
+            meta = None
+    return meta
+
+
+try:
+    from fastmcp.exceptions import ToolError
+    from fastmcp.server.middleware import Middleware
+except ImportError:  # fastmcp without middleware support
+    Middleware = None
+
+
+if Middleware is not None:
+    class DeadlineMiddleware(Middleware):
+        """
+        Give every tool call a deadline budget and cancel the call when it runs out.
+        """
+        async def on_call_tool(self, context, call_next):
+            budget = tool_budget(_request_meta(context), context.message.name)
+            scope = asyncio.timeout(budget)
+            with deadline(budget):
+                try:
+                    async with scope:
+                        return await call_next(context)
+                except TimeoutError:
+                    if not scope.expired():
+                        raise
+                    metrics.incr("tool_deadline_exceeded", tool=context.message.name)
+                    raise ToolError(f"Deadline exceeded: {context.message.name} did not finish within {budget:g}s")
+else:
+    DeadlineMiddleware = None
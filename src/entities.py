@@ -0,0 +1,158 @@
+"""
+Entity cache seeded from the objects nested in API responses.
+
+Filing lists embed their company, filing type and source; company lists embed sector, industry
+group, industry and sub-industry. Every such object is stored per entity, keyed by ID (and by
+GICS code for the taxonomy), so a later detail lookup can be answered without a request.
+
+Nested objects are often abbreviated. An entity is only *full*, and only used to answer a detail
+lookup, when it has every field the detail endpoint returned the last time it was called for
+that kind of entity; before any detail response has been seen, all entities are *partial*.
+"""
+
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from src.cache import PUBLIC_ENDPOINTS, ttl_for
+from src.metrics import metrics
+
+# Entity kind -> endpoint template of its detail lookup.
+DETAIL_ENDPOINTS = {
+    "companies": "/companies/{id}/",
+    "filing-types": "/filing-types/{id}/",
+    "sources": "/sources/{id}/",
+    "sectors": "/sectors/",
+    "industry-groups": "/industry-groups/{id}/",
+    "industries": "/industries/{id}/",
+    "sub-industries": "/sub-industries/{id}/",
+}
+# Field holding a nested object -> its entity kind.
+NESTED_FIELDS = {
+    "company": "companies",
+    "filing_type": "filing-types",
+    "source": "sources",
+    "sector": "sectors",
+    "industry_group": "industry-groups",
+    "industry": "industries",
+    "sub_industry": "sub-industries",
+}
+# Taxonomy list endpoints whose items are also what a by-code lookup returns.
+TAXONOMY_LISTS = {
+    "/sectors/": "sectors",
+    "/industry-groups/": "industry-groups",
+    "/industries/": "industries",
+    "/sub-industries/": "sub-industries",
+}
+_ENDPOINT_KINDS = {endpoint: kind for kind, endpoint in DETAIL_ENDPOINTS.items() if "{id}" in endpoint}
+_PATH_ID = re.compile(r"/(\d+)/$")
+
+Key = Tuple[Optional[str], str, str, Any]
+
+
+class EntityStore:
+    """
+    Bounded LRU store of entities by kind and ID or code, each with its own expiry.
+    """
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entities: "OrderedDict[Key, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # Fields of the most recent detail response per kind; a full entity has all of them.
+        self._detail_fields: Dict[str, FrozenSet[str]] = {}
+
+    @staticmethod
+    def _keys(kind: str, entity: Dict[str, Any], namespace: Optional[str]):
+        # Tenant-specific data stays per tenant, like in the response cache.
+        scope = None if DETAIL_ENDPOINTS[kind] in PUBLIC_ENDPOINTS else namespace
+        if entity.get("id") is not None:
+            yield (scope, kind, "id", int(entity["id"]))
+        if kind in TAXONOMY_LISTS.values() and entity.get("code"):
+            yield (scope, kind, "code", str(entity["code"]))
+
+    def is_full(self, kind: str, entity: Dict[str, Any]) -> bool:
+        fields = self._detail_fields.get(kind)
+        return fields is not None and fields.issubset(entity)
+
+    def add(self, kind: str, entity: Any, namespace: Optional[str] = None, detail: bool = False) -> None:
+        """
+        Store one entity; ``detail`` marks a complete detail response, which defines the full field set.
+        """
+        if not isinstance(entity, dict) or self.max_entries <= 0:
+            return
+        if detail:
+            self._detail_fields[kind] = frozenset(entity)
+        expires = time.time() + ttl_for(DETAIL_ENDPOINTS[kind])
+        for key in self._keys(kind, entity, namespace):
+            current = self._entities.get(key)
+            value = entity
+            if current is not None and current[1] > time.time() and not self.is_full(kind, entity):
+                # Add the fields of an abbreviated copy to what is known, keeping the older expiry.
+                value, expires = dict(current[0], **entity), min(expires, current[1])
+            self._entities[key] = (value, expires)
+            self._entities.move_to_end(key)
+        while len(self._entities) > self.max_entries:
+            self._entities.popitem(last=False)
+
+    def _add_nested(self, item: Any, namespace: Optional[str]) -> None:
+        if not isinstance(item, dict):
+            return
+        for field, kind in NESTED_FIELDS.items():
+            self.add(kind, item.get(field), namespace)
+
+    def observe(self, endpoint: str, data: Any, namespace: Optional[str] = None) -> None:
+        """
+        Seed the store from an API response from ``endpoint``.
+        """
+        if not isinstance(data, dict) or "error" in data:
+            return
+        if endpoint in _ENDPOINT_KINDS:
+            self.add(_ENDPOINT_KINDS[endpoint], data, namespace, detail=True)
+            self._add_nested(data, namespace)
+        elif endpoint in TAXONOMY_LISTS:
+            for item in data.get("results", []):
+                self.add(TAXONOMY_LISTS[endpoint], item, namespace, detail=True)
+                self._add_nested(item, namespace)
+        elif endpoint == "/companies/":
+            for company in data.get("results", []):
+                self.add("companies", company, namespace)
+                self._add_nested(company, namespace)
+        elif endpoint == "/filings/":
+            for filing in data.get("results", []):
+                self._add_nested(filing, namespace)
+        elif endpoint == "/filings/{id}/":
+            self._add_nested(data, namespace)
+
+    def lookup(self, kind: str, by: str, value: Any, namespace: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of a full, unexpired entity of ``kind`` whose ``by`` ("id" or "code") is ``value``.
+        """
+        if self.max_entries <= 0:
+            return None
+        scope = None if DETAIL_ENDPOINTS[kind] in PUBLIC_ENDPOINTS else namespace
+        found = self._entities.get((scope, kind, by, value))
+        if found is None or found[1] <= time.time():
+            result = "miss"
+        elif not self.is_full(kind, found[0]):
+            result = "partial"
+        else:
+            result = "hit"
+        metrics.incr("entity_cache_lookups", kind=kind, result=result)
+        return dict(found[0]) if result == "hit" else None
+
+    def lookup_path(self, endpoint: str, path: str, namespace: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer a detail request (``companies/42/`` for endpoint ``/companies/{id}/``) from the store.
+        """
+        kind = _ENDPOINT_KINDS.get(endpoint)
+        match = _PATH_ID.search(path)
+        if kind is None or match is None:
+            return None
+        return self.lookup(kind, "id", int(match.group(1)), namespace)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+
+entity_store = EntityStore(max_entries=int(os.getenv("ENTITY_CACHE_SIZE", "50000")))
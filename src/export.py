@@ -0,0 +1,314 @@
+"""
+Streaming export of filing and company result sets to NDJSON, CSV or Parquet files.
+
+Pages are written as they arrive, so memory stays constant however many rows are exported.
+After every page a checkpoint (``<output>.checkpoint.json``) records the next page and the file
+length; an interrupted export, or one stopped at ``max_rows``, resumes from there. Parquet output
+needs the optional pyarrow package and is staged as NDJSON first, then converted in batches.
+File writes, hashing and the Parquet conversion run in worker threads, off the event loop.
+
+Usage:
+    python -m src.export filings --output de-annual.csv --format csv --filter countries=DE --filter type=ANNREP
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from src.cache import uncached
+from src.metrics import metrics
+from src.pagination import START_CURSOR, fetch_filings_keyset
+from src.scheduler import priority
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+FILING_FILTERS = {
+    "added_to_platform_from", "added_to_platform_to", "company", "company_isin", "countries",
+    "dissemination_datetime_from", "dissemination_datetime_to", "language", "languages", "lei",
+    "release_datetime_from", "release_datetime_to", "search", "source", "type",
+}
+COMPANY_FILTERS = {"search", "countries", "sector", "industry_group", "industry", "sub_industry"}
+PAGE_SIZE = 100
+PARQUET_BATCH_ROWS = 10000
+
+
+class ExportError(RuntimeError):
+    """Raised when an export cannot start or the upstream API returns an error."""
+
+
+def flatten(row: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten nested objects into dotted columns (``company.name``); lists become JSON strings.
+    """
+    flat: Dict[str, Any] = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            flat[name] = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+        else:
+            flat[name] = value
+    return flat
+
+
+def _csv_bytes(rows: List[Dict[str, Any]], columns: List[str], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(flatten(row) for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_bytes(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(row, separators=(",", ":"), ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+
+def _file_sha256(path: str, length: Optional[int] = None):
+    """
+    Hash the first ``length`` bytes of ``path`` (all of it if None) in fixed-size chunks.
+    """
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, "rb") as fh:
+        while remaining is None or remaining > 0:
+            chunk = fh.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest
+
+
+def _resume_file(path: str, length: int):
+    """
+    Truncate ``path`` to the checkpointed ``length`` (dropping anything written after the
+    checkpoint) and return the SHA-256 state of what is left.
+    """
+    digest = _file_sha256(path, length)
+    with open(path, "r+b") as fh:
+        fh.truncate(length)
+    return digest
+
+
+def _append_page(out, chunk: bytes, digest, checkpoint_path: str, checkpoint: Dict[str, Any]) -> None:
+    """
+    Append one page to ``out`` durably, then record the checkpoint (atomically replaced).
+    """
+    out.write(chunk)
+    out.flush()
+    os.fsync(out.fileno())
+    digest.update(chunk)
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(checkpoint, fh)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _write_parquet(staging: str, output: str, columns: List[str]) -> None:
+    """
+    Convert staged NDJSON rows to Parquet one batch at a time. Every column is stored as a string,
+    since API fields are not consistently typed across rows (numbers, codes and nulls mix).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.string()) for name in columns])
+
+    def to_table(rows: List[Dict[str, Any]]):
+        flat = [flatten(row) for row in rows]
+        return pa.table({name: [None if r.get(name) is None else str(r[name]) for r in flat] for name in columns},
+                        schema=schema)
+
+    tmp_path = f"{output}.tmp"
+    with pq.ParquetWriter(tmp_path, schema) as writer, open(staging, "r", encoding="utf-8") as fh:
+        batch: List[Dict[str, Any]] = []
+        for line in fh:
+            batch.append(json.loads(line))
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(to_table(batch))
+                batch = []
+        if batch:
+            writer.write_table(to_table(batch))
+    os.replace(tmp_path, output)
+
+
+async def export_results(
+    api_client,
+    kind: str,
+    output: str,
+    format: str = "ndjson",
+    filters: Optional[Dict[str, Any]] = None,
+    resume: bool = True,
+    max_rows: Optional[int] = None,
+    progress: Optional[Callable[[int, Optional[int]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Export every filing or company matching ``filters`` to ``output`` and return a summary with
+    the path, row count and SHA-256 of the file.
+
+    Filings are read with cursor pagination in ascending release order, so the checkpoint stays
+    valid and no rows are repeated or skipped when filings are published during the export. When
+    some matching filings have no release datetime, all of them are read by row offset in ID
+    order instead; new filings get higher IDs, so they also append at the end. CSV and Parquet columns
+    are taken from the first page; fields that only appear later are kept in NDJSON output only.
+    """
+    if kind not in ("filings", "companies"):
+        raise ExportError(f"Unknown export kind {kind!r}; use 'filings' or 'companies'")
+    if format not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format {format!r}; use one of {', '.join(EXPORT_FORMATS)}")
+    if format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ExportError("Parquet export requires pyarrow (pip install pyarrow)")
+    allowed = FILING_FILTERS if kind == "filings" else COMPANY_FILTERS
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    unknown = sorted(set(filters) - allowed)
+    if unknown:
+        raise ExportError(f"Unsupported {kind} filters: {', '.join(unknown)}")
+
+    async def read_offset(position: int, limit: int):
+        number, skip = divmod(position, PAGE_SIZE)
+        if kind == "filings":
+            page = await api_client.get_filings(page=number + 1, page_size=PAGE_SIZE, ordering="id", **filters)
+        else:
+            page = await api_client.get_companies(page=number + 1, page_size=PAGE_SIZE, **filters)
+        if "error" in page:
+            raise ExportError(f"{kind} page {number + 1}: {page['error']}")
+        results = page.get("results", [])
+        rows = results[skip:skip + limit]
+        more = skip + len(rows) < len(results) or bool(page.get("next"))
+        return rows, page.get("count", 0) - position, position + len(rows) if more else None
+
+    async def read(position, limit: int):
+        """
+        Read up to ``limit`` rows at ``position``; returns them, the rows left from it on, and the
+        position after the last row returned (None at the end).
+        """
+        if isinstance(position, int):
+            return await read_offset(position, limit)
+        page = await fetch_filings_keyset(api_client, limit, cursor=position, ordering="release_datetime",
+                                          **filters)
+        if "unordered" in page and position == START_CURSOR:
+            # Filings without a release datetime cannot be placed by a cursor; read them all in ID order.
+            metrics.incr("export_offset_fallbacks")
+            return await read_offset(0, limit)
+        if "error" in page:
+            raise ExportError(f"filings after cursor {position}: {page['error']}")
+        return page["results"], page["remaining"], page["next_cursor"]
+
+    output = os.path.abspath(output)
+    data_path = f"{output}.ndjson.part" if format == "parquet" else output
+    checkpoint_path = f"{output}.checkpoint.json"
+    job = {"kind": kind, "format": format, "filters": filters}
+    # Filings are read with cursor pagination, companies (and filings that cannot be placed by a
+    # cursor) by row offset, so a stop mid-page resumes exactly.
+    state = {"position": START_CURSOR if kind == "filings" else 0, "rows": 0, "bytes": 0, "columns": None}
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as fh:
+            saved = json.load(fh)
+        if saved.get("job") != job:
+            raise ExportError(f"{checkpoint_path} belongs to a different export; remove it or choose another output")
+        state = saved["state"]
+        metrics.incr("export_resumes")
+
+    digest = hashlib.sha256()
+    if state["bytes"]:
+        # Drop anything written after the last checkpoint and continue the checksum from there.
+        digest = await asyncio.to_thread(_resume_file, data_path, state["bytes"])
+    total = None
+    exhausted = False
+    with open(data_path, "ab" if state["bytes"] else "wb") as out, uncached(), priority("bulk"):
+        while max_rows is None or state["rows"] < max_rows:
+            limit = PAGE_SIZE if max_rows is None else min(PAGE_SIZE, max_rows - state["rows"])
+            rows, left, next_position = await read(state["position"], limit)
+            total = state["rows"] + left
+            if state["columns"] is None and rows:
+                columns: Dict[str, None] = {}
+                for row in rows:
+                    columns.update(dict.fromkeys(flatten(row)))
+                state["columns"] = list(columns)
+            if format == "csv":
+                chunk = _csv_bytes(rows, state["columns"] or [], header=state["bytes"] == 0)
+            else:
+                chunk = _ndjson_bytes(rows)
+            state["rows"] += len(rows)
+            state["bytes"] += len(chunk)
+            state["position"] = next_position
+            await asyncio.to_thread(_append_page, out, chunk, digest, checkpoint_path, {"job": job, "state": state})
+            metrics.incr("export_pages", kind=kind)
+            if progress is not None:
+                await progress(state["rows"], total if max_rows is None else min(total or max_rows, max_rows))
+            if next_position is None:
+                exhausted = True
+                break
+
+    if format == "parquet":
+        await asyncio.to_thread(_write_parquet, data_path, output, state["columns"] or [])
+        digest = await asyncio.to_thread(_file_sha256, output)
+    if exhausted:
+        # An export stopped at ``max_rows`` keeps its checkpoint (and Parquet staging file) to resume from.
+        if format == "parquet":
+            os.unlink(data_path)
+        os.unlink(checkpoint_path)
+    metrics.incr("export_rows", state["rows"], kind=kind)
+    return {
+        "path": output,
+        "format": format,
+        "rows": state["rows"],
+        "bytes": os.path.getsize(output),
+        "sha256": digest.hexdigest(),
+        "complete": exhausted,
+    }
+
+
+def _parse_filters(items: List[str]) -> Dict[str, Any]:
+    filters = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"Invalid --filter {item!r}; expected key=value")
+        filters[key.strip()] = value.strip()
+    return filters
+
+
+def main():
+    """
+    Command-line entry point for exporting filings or companies.
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export Financial Reports API filings or companies to a file")
+    parser.add_argument("kind", choices=["filings", "companies"])
+    parser.add_argument("--output", required=True, help="File to write")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--filter", action="append", default=[], help="API filter as key=value (repeatable)")
+    parser.add_argument("--max-rows", type=int, help="Stop after this many rows")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    from src.real_api.real_client import RealAPIClient
+
+    async def run():
+        client = RealAPIClient(os.getenv("API_KEY"), os.getenv("API_BASE_URL", "https://api.financialreports.eu/"))
+        try:
+            return await export_results(client, args.kind, args.output, args.format, _parse_filters(args.filter),
+                                        resume=not args.restart, max_rows=args.max_rows)
+        finally:
+            await client.aclose()
+
+    try:
+        summary = asyncio.run(run())
+    except ExportError as e:
+        raise SystemExit(f"Export failed: {e}")
+    print(f"Wrote {summary['rows']} rows to {summary['path']} (sha256 {summary['sha256']})")
+
+
+if __name__ == "__main__":
+    main()
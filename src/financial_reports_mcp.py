@@ -12,6 +12,26 @@ from typing import List, Dict, Any, Optional, Union
 from pydantic import BaseModel, Field
 
 from src.api_client import APIClient
+from src.aggregation import aggregate_filings as aggregate
+from src.cache import response_cache
+from src.company_directory import company_directory, directory_enabled, directory_entries
+from src.deadlines import DeadlineMiddleware
+from src.entities import entity_store
+from src.export import ExportError, export_results as export_to_file
+from src.financial_tables import extract_financial_tables as extract_filing_tables
+from src.identifiers import resolve_identifiers
+from src.loop_monitor import LoopMonitorMiddleware, monitor as loop_monitor
+from src.metrics import metrics
+from src.pagination import fetch_filings, fetch_filings_keyset
+from src.prefetch import prefetcher
+from src.processing import normalize_processed_filing
+from src.real_api.real_client import RealAPIClient
+from src.resources import ResourceCacheMiddleware, resource_cache
+from src.scheduler import scheduler
+from src.serving import DrainMiddleware, serve_http, serve_stdio, transport_name
+from src.similarity import find_similar_filings as rank_similar_filings
+from src.tenants import tenants
+from src.watchlist import watchlist_latest
 
 print("[DEBUG] MCP Server API_KEY at startup:", os.getenv("API_KEY"), "repr:", repr(os.getenv("API_KEY")))
 
@@ -33,11 +53,38 @@ class FilingSearchParams(BaseModel):
     countries: Optional[Union[str, List[str]]] = Field(None, description="Filter by one or more country codes")
     type: Optional[str] = Field(None, description="Optional filter by filing type code (e.g., 'ANNREP') (real API: 'type')")
     language: Optional[str] = Field(None, description="Optional filter by language code (e.g., 'en', 'de')")
+    ordering: Optional[str] = Field(None, description="Sort order, e.g. '-release_datetime' (default) or 'release_datetime'")
     page: int = Field(1, description="Page number for pagination")
     page_size: int = Field(10, description="Number of results per page (max 100)")
+    limit: Optional[int] = Field(None, description="Fetch this many filings in one call (up to 1000); page then counts in units of limit")
+    cursor: Optional[str] = Field(None, description="Cursor pagination: '*' for the first page, then the previous response's next_cursor (ordering by release_datetime or dissemination_datetime)")
+
+class FilingFilters(BaseModel):
+    """Filters selecting the filings to aggregate (subset of the real API's /filings/ filters)."""
+    company: Optional[int] = Field(None, description="Filter by company ID")
+    company_isin: Optional[str] = Field(None, description="Filter by company ISIN")
+    countries: Optional[Union[str, List[str]]] = Field(None, description="Filter by one or more country codes")
+    type: Optional[str] = Field(None, description="Filter by filing type code (e.g., 'ANNREP')")
+    language: Optional[str] = Field(None, description="Filter by language code (e.g., 'en', 'de')")
+    source: Optional[int] = Field(None, description="Filter by source ID")
+    search: Optional[str] = Field(None, description="Full-text search in filing titles")
+    release_datetime_from: Optional[str] = Field(None, description="Released on or after (ISO 8601)")
+    release_datetime_to: Optional[str] = Field(None, description="Released on or before (ISO 8601)")
+    sector: Optional[str] = Field(None, description="Filter by the company's GICS sector code (e.g., '40' for Financials)")
+    industry_group: Optional[str] = Field(None, description="Filter by the company's GICS industry group code")
+    industry: Optional[str] = Field(None, description="Filter by the company's GICS industry code (e.g., '401010' for Banks)")
+    sub_industry: Optional[str] = Field(None, description="Filter by the company's GICS sub-industry code")
 
 # Create an MCP server
 mcp = FastMCP("Financial Reports API")
+if DrainMiddleware is not None:
+    mcp.add_middleware(DrainMiddleware())
+if LoopMonitorMiddleware is not None and loop_monitor.enabled:
+    mcp.add_middleware(LoopMonitorMiddleware())
+if DeadlineMiddleware is not None:
+    mcp.add_middleware(DeadlineMiddleware())
+if ResourceCacheMiddleware is not None:
+    mcp.add_middleware(ResourceCacheMiddleware())
 
 # Tools for Financial Reports API
 
@@ -186,17 +233,75 @@ async def get_source(source_id: int) -> dict:
     return await api_client.get_source(source_id)
 
 @mcp.tool()
-async def get_processed_filing(processed_filing_id: int) -> dict:
+async def get_processed_filing(processed_filing_id: int, format: str = "raw") -> dict:
     """
     Get processed content for a filing by its ProcessedFiling ID.
     
     Args:
         processed_filing_id (int): The processed filing ID.
+        format (str, optional): "raw" for the content as stored, or "normalized" for cleaned text
+            with a list of sections and the tables found in it.
     Returns:
         dict: Processed filing content.
     """
+    if format not in ("raw", "normalized"):
+        return {"error": f"Unknown format {format!r}; use 'raw' or 'normalized'"}
+    api_client = await APIClient.create()
+    result = await api_client.get_processed_filing(processed_filing_id)
+    if format == "normalized":
+        return await normalize_processed_filing(result)
+    return result
+
+@mcp.tool()
+async def extract_financial_tables(processed_filing_id: int, max_tables: int = 10) -> Dict[str, Any]:
+    """
+    Extract the numeric tables of a processed filing and locate key metrics (revenue, operating
+    income, EBITDA, net income, total assets, total equity, cash, EPS) without reading the full text.
+    
+    Args:
+        processed_filing_id (int): The processed filing ID (``processed_filing_id`` of a filing).
+        max_tables (int, optional): Maximum number of tables to return (metrics are searched in all of them).
+    Returns:
+        Dict[str, Any]: ``metrics`` (label, currency, scale and value per period, scaled to units),
+        and ``tables`` with their section, currency, scale, column headers and rows of numbers as reported.
+    """
     api_client = await APIClient.create()
-    return await api_client.get_processed_filing(processed_filing_id)
+    return await extract_filing_tables(api_client, processed_filing_id, max_tables=max_tables)
+
+@mcp.tool()
+async def find_similar_filings(
+    filing_id: int,
+    company: int = None,
+    sector: str = None,
+    type: str = None,
+    countries: Union[str, List[str]] = None,
+    language: str = None,
+    k: int = 10,
+) -> Dict[str, Any]:
+    """
+    Find the filings whose text is most similar to a given filing (TF-IDF cosine similarity,
+    computed locally over the processed content of the filings matching the filters).
+    
+    Args:
+        filing_id (int): The filing to compare against.
+        company (int, optional): Only compare with filings of this company ID.
+        sector (str, optional): Only compare with companies under this GICS sector, industry group,
+            industry or sub-industry code (2, 4, 6 or 8 digits).
+        type (str, optional): Only compare with filings of this type code (e.g. 'ANNREP').
+        countries (str or list, optional): Only compare with companies from these country codes.
+        language (str, optional): Only compare with filings in this language code.
+        k (int, optional): Number of similar filings to return.
+    Returns:
+        Dict[str, Any]: The seed ``filing``, how many filings were ``compared``, and ``results`` with
+        each filing's ``score`` (0 to 1) and the ``shared_terms`` that contributed most.
+    """
+    api_client = await APIClient.create()
+    if isinstance(countries, str):
+        countries = [c.strip() for c in countries.split(",") if c.strip()]
+    return await rank_similar_filings(
+        api_client, filing_id, company=company, gics_code=sector, type=type,
+        countries=countries, language=language, k=k,
+    )
 
 @mcp.tool()
 async def get_schema(format: str = None, lang: str = None) -> dict:
@@ -223,6 +328,25 @@ async def search_companies(params: CompanySearchParams) -> List[Dict[str, Any]]:
         List[Dict[str, Any]]: List of matching companies.
     """
     api_client = await APIClient.create()
+    if directory_enabled() and isinstance(api_client, RealAPIClient):
+        directory = company_directory(api_client.cache_namespace)
+        directory.ensure_syncing(api_client)
+        if directory.ready:
+            local = directory.search(
+                search=params.search,
+                countries=params.countries,
+                sector=params.sector,
+                industry_group=params.industry_group,
+                industry=params.industry,
+                sub_industry=params.sub_industry,
+                page=params.page,
+                page_size=params.page_size
+            )
+            if local["results"]:
+                metrics.incr("company_directory_hits")
+                prefetcher.schedule(api_client, local["results"])
+                return local["results"]
+            metrics.incr("company_directory_misses")
     result = await api_client.get_companies(
         search=params.search,
         countries=params.countries,
@@ -233,6 +357,8 @@ async def search_companies(params: CompanySearchParams) -> List[Dict[str, Any]]:
         page=params.page,
         page_size=params.page_size
     )
+    if isinstance(api_client, RealAPIClient):
+        prefetcher.schedule(api_client, result.get("results", []))
     return result.get("results", [])
 
 
@@ -251,27 +377,146 @@ async def get_company_detail(company_id: int) -> Dict[str, Any]:
 
 
 @mcp.tool()
-async def get_latest_filings(params: FilingSearchParams) -> List[Dict[str, Any]]:
+async def get_latest_filings(params: FilingSearchParams) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Get the latest financial filings, optionally filtered by company, ISIN, type, language, etc.
     
     Args:
-        params (FilingSearchParams): Search parameters (company, company_isin, countries, type, language, page, page_size)
+        params (FilingSearchParams): Search parameters (company, company_isin, countries, type, language, ordering, page, page_size, limit, cursor)
     Returns:
-        List[Dict[str, Any]]: List of filings.
+        List[Dict[str, Any]]: List of filings, or with ``limit`` a dict with ``count`` (total matches),
+        ``returned``, ``has_more`` and ``results``, or with ``cursor`` a dict with ``results``,
+        ``remaining`` and ``next_cursor`` (None after the last page).
     """
     api_client = await APIClient.create()
-    result = await api_client.get_filings(
+    filters = dict(
         company=params.company,
         company_isin=params.company_isin,
         countries=params.countries,
         type=params.type,
         language=params.language,
-        page=params.page,
-        page_size=params.page_size
+        ordering=params.ordering,
     )
+    if params.cursor:
+        return await fetch_filings_keyset(api_client, params.page_size, cursor=params.cursor, **filters)
+    if params.limit:
+        return await fetch_filings(api_client, params.limit, offset=(max(1, params.page) - 1) * params.limit, **filters)
+    result = await api_client.get_filings(page=params.page, page_size=params.page_size, **filters)
     return result.get("results", [])
 
+@mcp.tool()
+async def aggregate_filings(
+    filters: Optional[FilingFilters] = None,
+    group_by: List[str] = ["type"],
+    metrics: List[str] = ["count"],
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Count filings per group without returning the filings themselves.
+    
+    Args:
+        filters (FilingFilters): Which filings to include (company, countries, type, language, release date range, GICS sector/industry codes, ...)
+        group_by (List[str]): Any of "type", "country", "language", "month", "company", "source"
+        metrics (List[str]): Any of "count", "first", "last" (earliest/latest filing per group)
+    Returns:
+        Dict[str, Any]: Total ``count``, how the groups were computed, and one row per group.
+    """
+    api_client = await APIClient.create()
+
+    async def progress(done: int, total: int) -> None:
+        if ctx is not None:
+            await ctx.report_progress(done, total)
+
+    return await aggregate(
+        api_client,
+        (filters or FilingFilters()).model_dump(),
+        group_by=list(group_by),
+        wanted=list(metrics),
+        progress=progress,
+    )
+
+@mcp.tool()
+async def export_results(
+    kind: str,
+    filename: str,
+    format: str = "ndjson",
+    filters: Optional[Dict[str, Any]] = None,
+    resume: bool = True,
+    max_rows: Optional[int] = None,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Export all filings or companies matching the filters to a file on the server, instead of returning them.
+    
+    Args:
+        kind (str): "filings" or "companies"
+        filename (str): File name inside the server's export directory (EXPORT_DIR)
+        format (str): "ndjson", "csv" or "parquet"
+        filters (Dict[str, Any]): API filters, e.g. {"countries": "DE", "type": "ANNREP"}
+        resume (bool): Continue an interrupted export of the same file from its last completed page
+        max_rows (int): Optional maximum number of rows
+    Returns:
+        Dict[str, Any]: The file path, row count, size and SHA-256 checksum.
+    """
+    if not filename or os.path.basename(filename) != filename:
+        return {"error": "filename must be a plain file name without directories"}
+    export_dir = os.getenv("EXPORT_DIR", "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    api_client = await APIClient.create()
+
+    async def progress(done: int, total: Optional[int]) -> None:
+        if ctx is not None:
+            await ctx.report_progress(done, total)
+
+    try:
+        return await export_to_file(api_client, kind, os.path.join(export_dir, filename), format, filters,
+                                    resume=resume, max_rows=max_rows, progress=progress)
+    except ExportError as e:
+        return {"error": f"Error: {e}"}
+
+@mcp.tool()
+async def resolve_companies(identifiers: List[str]) -> List[Dict[str, Any]]:
+    """
+    Resolve ISINs, LEIs or tickers to companies in one batch.
+
+    Identifiers already seen in earlier responses are answered locally; the rest are looked up
+    with as few upstream searches as possible.
+
+    Args:
+        identifiers (List[str]): ISINs, LEIs and/or tickers, in any mix.
+    Returns:
+        List[Dict[str, Any]]: One entry per identifier with its type, company_id, a company summary
+        (or None if not found), and whether it came from the local index or an upstream search.
+    """
+    api_client = await APIClient.create()
+    return await resolve_identifiers(api_client, identifiers)
+
+@mcp.tool()
+async def watchlist_latest_filings(
+    identifiers: List[str],
+    types: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Get the latest filing of every company on a watchlist in one call.
+
+    Args:
+        identifiers (List[str]): ISINs, LEIs and/or tickers of the holdings (duplicates are merged).
+        types (List[str]): Optional filing type codes (e.g. ["ANNREP", "HALFYEAR"]); the latest filing of any of them is returned.
+        since (str): Optional ISO 8601 date or datetime; filings released at or after it are flagged ``changed``.
+    Returns:
+        Dict[str, Any]: ``count``, ``resolved`` and ``changed`` totals, and one row per identifier with
+        company_id, company_name, latest_filing (id, title, type, release_datetime, ...) and changed.
+    """
+    api_client = await APIClient.create()
+
+    async def progress(done: int, total: int) -> None:
+        if ctx is not None:
+            await ctx.report_progress(done, total)
+
+    return await watchlist_latest(api_client, identifiers, types=types, since=since, progress=progress)
+
 @mcp.tool()
 async def get_filing_detail(filing_id: int) -> Dict[str, Any]:
     """
@@ -313,6 +558,41 @@ async def list_filing_types() -> List[Dict[str, Any]]:
     result = await api_client.get_filing_types()
     return result.get("results", [])
 
+@mcp.tool()
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Get the server's internal metrics, such as cache hits and upstream traffic per endpoint.
+
+    Args:
+        None
+    Returns:
+        Dict[str, Any]: Counters and summaries keyed by metric name and labels.
+    """
+    snapshot = metrics.snapshot()
+    snapshot["cache_entries"] = len(response_cache)
+    snapshot["active_tenants"] = len(tenants)
+    snapshot["company_directory_entries"] = directory_entries()
+    snapshot["scheduler"] = scheduler.stats()
+    snapshot["prefetched_unread"] = len(prefetcher)
+    snapshot["entity_cache_entries"] = len(entity_store)
+    snapshot["resource_cache_entries"] = len(resource_cache)
+    return snapshot
+
+@mcp.tool()
+async def get_loop_health() -> Dict[str, Any]:
+    """
+    Get the event-loop health report: maximum loop lag, and the stalls (callbacks that blocked the
+    loop longer than the threshold) per tool or resource, with the stacks of the most recent ones.
+    Requires LOOP_MONITOR=1.
+
+    Args:
+        None
+    Returns:
+        Dict[str, Any]: ``max_lag_ms``, ``stalls_by_activity`` (count, total and max duration) and
+        ``recent_stalls`` (activity, duration, stack).
+    """
+    return loop_monitor.report()
+
 # Resources for common queries
 
 @mcp.resource("financial-reports://sectors")
@@ -480,6 +760,8 @@ Please help me:
 First, you'll need to list_sectors to find the correct sector code for financials,
 then search for banking companies using search_companies,
 and finally use get_latest_filings with filing_type="ANNREP" to find annual reports.
+For the key figures, call extract_financial_tables with each report's processed_filing_id
+instead of reading the full report.
 """
 
 def run_cli():
@@ -503,17 +785,32 @@ def run_cli():
         default=int(os.getenv("MCP_PORT", "8000")),
         help="Port to run the server on (default: 8000 or MCP_PORT env var)"
     )
+    parser.add_argument(
+        "--transport",
+        default=os.getenv("MCP_TRANSPORT", "stdio"),
+        help="Transport to serve: stdio, sse or streamable-http (default: stdio or MCP_TRANSPORT env var)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("MCP_WORKERS", "1")),
+        help="Number of HTTP worker processes; more than 1 serves over HTTP with a shared cache and rate limit (default: 1 or MCP_WORKERS env var)"
+    )
     args = parser.parse_args()
-    
-    # Print startup information
-    print(f"Starting Financial Reports MCP Server on {args.host}:{args.port}")
-        
-    # Set environment variables for FastMCP (it uses these internally)
-    os.environ["MCP_HOST"] = args.host
-    os.environ["MCP_PORT"] = str(args.port)
-    
-    # Run the server
-    mcp.run()
+    try:
+        transport = transport_name(args.transport)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.workers > 1:
+        from src.workers import serve_workers
+        serve_workers(args.host, args.port, args.workers, transport="sse" if transport == "sse" else "streamable-http")
+        return
+
+    if transport == "stdio":
+        serve_stdio(mcp)
+    else:
+        serve_http(mcp, args.host, args.port, transport)
 
 # Main execution - this allows running the server directly
 if __name__ == "__main__":
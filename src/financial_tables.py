@@ -0,0 +1,284 @@
+"""
+Extraction of numeric financial tables from processed filings.
+
+Tables come from the normalized content (see ``src.processing``). Cells are parsed into NumPy
+float arrays column by column: thousands separators in either convention, decimal commas,
+negatives in parentheses or with a minus sign, percentages, currency symbols and dashes for
+empty values. A table whose only separators are single dots followed by three digits ("12.345") is read
+as dot-grouped thousands unless the filing's language groups digits with commas. The scale and
+currency of each table ("in EUR millions", "TEUR", ...) are read
+from its header and section title. Common metrics such as revenue, net income and total assets
+are then located by matching row labels.
+
+NumPy is optional for the server but required for this module's ``extract_financial_tables``.
+"""
+
+import importlib.util
+import os
+import re
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.cache import ttl_for
+from src.metrics import metrics
+from src.processing import content_field, normalize_content, pipeline
+
+# Metric -> row label pattern (English and German annual report wording).
+METRIC_PATTERNS = {
+    "revenue": r"^(total |net )?(revenues?|sales|turnover|umsatz(erlöse)?|umsatzerloese)\b",
+    "operating_income": r"^(operating (income|profit|result)|ebit\b|betriebsergebnis)",
+    "ebitda": r"^(adjusted )?ebitda\b",
+    "net_income": r"^(net (income|profit|earnings|result)|profit (for the (year|period)|after tax)|"
+                  r"(konzern|jahres)(überschuss|ergebnis))",
+    "total_assets": r"^(total assets|bilanzsumme|summe (der )?aktiva)",
+    "total_equity": r"^(total (shareholders'? |stockholders'? )?equity|(summe )?eigenkapital)",
+    "cash": r"^cash and cash equivalents|^zahlungsmittel",
+    "eps": r"^(basic |diluted )?(earnings per share|eps\b|ergebnis je aktie)",
+}
+_METRIC_RES = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in METRIC_PATTERNS.items()}
+
+_SCALES = (
+    (re.compile(r"\b(billions?|bn|mrd\.?|milliarden)\b", re.IGNORECASE), 1e9),
+    (re.compile(r"\b(millions?|mn|mio\.?|m)\b|\b[A-Z]{3}\s?m\b|[€$£]\s?m\b", re.IGNORECASE), 1e6),
+    (re.compile(r"\b(thousands?|tsd\.?|k)\b|'000|\bT(EUR|USD|CHF|GBP)\b", re.IGNORECASE), 1e3),
+)
+_CURRENCIES = (
+    ("EUR", re.compile(r"€|\bT?EUR\b")), ("USD", re.compile(r"\$|\bT?USD\b")), ("GBP", re.compile(r"£|\bGBP\b")),
+    ("CHF", re.compile(r"\bT?CHF\b")), ("SEK", re.compile(r"\bSEK\b")), ("NOK", re.compile(r"\bNOK\b")),
+    ("DKK", re.compile(r"\bDKK\b")), ("JPY", re.compile(r"¥|\bJPY\b")), ("PLN", re.compile(r"\bPLN\b")),
+)
+_NUMBER_RE = re.compile(r"\d+(\.\d+)?")
+# Removed from every cell before parsing.
+_NOISE = ("€", "$", "£", "¥", "%", "*", " ", "\u00a0", "\u202f", "\u2009", "'")
+_MINUS = ("-", "−", "–", "—")
+# Languages whose reports group thousands with commas; "12.345" is a decimal in these.
+COMMA_GROUPING_LANGUAGES = frozenset({"en", "ga", "he", "ja", "ko", "mt", "th", "zh"})
+MIN_NUMERIC_SHARE = 0.5
+MAX_TABLES = 25
+MAX_ROWS = 60
+
+
+def available() -> bool:
+    return importlib.util.find_spec("numpy") is not None
+
+
+def parse_numbers(cells: List[str], language: Optional[str] = None):
+    """
+    Parse the cells of one table into a float64 array; cells that are not numbers become NaN.
+    ``language`` is the filing's language code, used when the separators alone are ambiguous.
+    """
+    import numpy as np
+
+    a = np.char.strip(np.asarray(cells, dtype=str))
+    if not len(a):
+        return np.empty(0)
+    negative = np.char.startswith(a, "(") & np.char.endswith(a, ")")
+    a = np.char.strip(a, "()")
+    for minus in _MINUS:
+        negative |= np.char.startswith(a, minus)
+        a = np.char.lstrip(a, minus)
+    for noise in _NOISE:
+        a = np.char.replace(a, noise, "")
+    # One convention per table: a decimal comma ("12,5", "1.234,5") or repeated dots ("1.234.567")
+    # anywhere mean dots group thousands; otherwise commas do ("1,234.5"). Without commas, a table
+    # whose dots are all followed by exactly three digits ("12.345", "11.987") groups thousands
+    # too, unless the filing is in a language that groups with commas.
+    last_comma, last_dot = np.char.rfind(a, ","), np.char.rfind(a, ".")
+    length = np.char.str_len(a)
+    decimal_comma = (last_comma > last_dot) & ((last_dot >= 0) | (length - last_comma - 1 != 3))
+    dotted = last_dot >= 0
+    dot_groups = (
+        dotted.any() and (last_comma < 0).all() and (length - last_dot - 1 == 3)[dotted].all()
+        and (language or "").lower()[:2] not in COMMA_GROUPING_LANGUAGES
+    )
+    if decimal_comma.any() or (np.char.count(a, ".") > 1).any() or dot_groups:
+        a = np.char.replace(np.char.replace(a, ".", ""), ",", ".")
+    else:
+        a = np.char.replace(a, ",", "")
+    valid = np.fromiter((_NUMBER_RE.fullmatch(x) is not None for x in a), bool, len(a))
+    values = np.full(len(a), np.nan)
+    values[valid] = a[valid].astype(np.float64)
+    values[negative] *= -1
+    return values
+
+
+def detect_scale(text: str) -> Tuple[float, Optional[str]]:
+    """
+    Return the scale factor and currency code announced in a table's header or caption.
+    """
+    scale = next((factor for pattern, factor in _SCALES if pattern.search(text)), 1.0)
+    currency = next((code for code, pattern in _CURRENCIES if pattern.search(text)), None)
+    return scale, currency
+
+
+def _clean(value: float) -> Optional[float]:
+    return None if value != value else round(float(value), 6)
+
+
+def numeric_table(table: Dict[str, Any], language: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Convert one normalized table into labelled numeric columns, or None if it is not numeric.
+    The first column holds the row labels; columns that are mostly non-numeric are dropped.
+    """
+    import numpy as np
+
+    rows = [r for r in table["rows"] if len(r) > 1 and r[0]]
+    if not rows:
+        return None
+    width = max(len(r) for r in rows)
+    grid = [r[1:] + [""] * (width - len(r)) for r in rows]
+    values = parse_numbers([cell for row in grid for cell in row], language).reshape(len(rows), width - 1)
+    numeric = ~np.isnan(values)
+    keep = numeric.mean(axis=0) >= MIN_NUMERIC_SHARE
+    if not keep.any():
+        return None
+    header = (table.get("header") or [""] * width) + [""] * width
+    kept = np.flatnonzero(keep)
+    names = [(header[i + 1] or "").strip() for i in kept]
+    # Metric values are keyed by column name, so blank and repeated headers get the column number.
+    columns = [
+        name if name and names.count(name) == 1 else f"{name} (column {i + 1})" if name else f"column {i + 1}"
+        for name, i in zip(names, kept)
+    ]
+    values = values[:, keep]
+    filled = numeric[:, keep].any(axis=1)
+    scale, currency = detect_scale(" ".join(filter(None, [table.get("section") or ""] + header[:width])))
+    return {
+        "section": table.get("section"),
+        "scale": scale,
+        "currency": currency,
+        "columns": columns,
+        "labels": [r[0] for r, f in zip(rows, filled) if f],
+        "values": values[filled],
+    }
+
+
+def find_metrics(tables: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Locate common metrics by row label; the first matching row in document order wins.
+    """
+    import numpy as np
+
+    found: Dict[str, Dict[str, Any]] = {}
+    for index, table in enumerate(tables):
+        for name, pattern in _METRIC_RES.items():
+            if name in found:
+                continue
+            for label, row in zip(table["labels"], table["values"]):
+                if pattern.search(label.strip()):
+                    present = np.flatnonzero(~np.isnan(row))
+                    if not len(present):
+                        continue
+                    scale = 1.0 if name == "eps" else table["scale"]
+                    found[name] = {
+                        "label": label,
+                        "table": index,
+                        "currency": table["currency"],
+                        "scale": scale,
+                        "values": {table["columns"][i]: _clean(row[i] * scale) for i in present},
+                    }
+                    break
+    return found
+
+
+def extract_tables(normalized: Dict[str, Any], max_tables: int = MAX_TABLES,
+                   language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build compact numeric tables and located metrics from a normalized document in ``language``.
+    """
+    tables = [t for t in (numeric_table(t, language) for t in normalized["tables"]) if t is not None]
+    found = find_metrics(tables)
+    return {
+        "tables_found": len(normalized["tables"]),
+        "numeric_tables": len(tables),
+        "metrics": found,
+        "tables": [
+            {
+                "index": i,
+                "section": t["section"],
+                "currency": t["currency"],
+                "scale": t["scale"],
+                "columns": t["columns"],
+                "rows": [[label] + [_clean(v) for v in row] for label, row in zip(t["labels"][:MAX_ROWS], t["values"])],
+                "truncated": len(t["labels"]) > MAX_ROWS,
+            }
+            for i, t in enumerate(tables[:max_tables])
+        ],
+    }
+
+
+def extract_tables_from_text(text: str, language: Optional[str] = None, max_tables: int = MAX_TABLES) -> Dict[str, Any]:
+    """
+    Normalize document ``text`` and extract its tables; runs in the normalization pool.
+    """
+    return extract_tables(normalize_content(text), max_tables=max_tables, language=language)
+
+
+class ExtractionCache:
+    """
+    Extraction results per processed filing (and tenant), kept for the processed filing TTL.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Optional[str], int], Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def get(self, key: Tuple[Optional[str], int]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Tuple[Optional[str], int], value: Dict[str, Any]) -> None:
+        self._entries[key] = (value, time.time() + ttl_for("/processed-filings/{id}/"))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+async def filing_language(api_client, processed: Dict[str, Any]) -> Optional[str]:
+    """
+    Language code of the filing a processed filing belongs to, or None if it cannot be found.
+    """
+    filing = processed.get("filing")
+    if not isinstance(filing, dict) or "language" not in filing:
+        if filing is None:
+            return None
+        filing = await api_client.get_filing_detail(filing.get("id") if isinstance(filing, dict) else filing)
+        if "error" in filing:
+            return None
+    language = filing.get("language")
+    if isinstance(language, dict):
+        language = language.get("code")
+    return language or None
+
+
+extraction_cache = ExtractionCache(max_entries=int(os.getenv("TABLE_CACHE_SIZE", "256")))
+
+
+async def extract_financial_tables(api_client, processed_filing_id: int, max_tables: int = MAX_TABLES) -> Dict[str, Any]:
+    """
+    Extract the numeric tables and key metrics of a processed filing, cached per filing.
+    Normalization and parsing run in the normalization pool (inline for small documents).
+    """
+    if not available():
+        return {"error": "Financial table extraction requires numpy (pip install numpy)"}
+    key = (getattr(api_client, "cache_namespace", None), int(processed_filing_id))
+    cached = extraction_cache.get(key)
+    if cached is None:
+        filing = await api_client.get_processed_filing(processed_filing_id)
+        if "error" in filing:
+            return filing
+        field = content_field(filing)
+        if field is None:
+            return {"error": f"Processed filing {processed_filing_id} has no text content"}
+        started = time.perf_counter()
+        language = await filing_language(api_client, filing)
+        cached = await pipeline.apply(partial(extract_tables_from_text, language=language), filing[field])
+        metrics.observe("table_extraction_ms", (time.perf_counter() - started) * 1000)
+        extraction_cache.put(key, cached)
+    else:
+        metrics.incr("table_extraction_cache_hits")
+    return dict(cached, processed_filing_id=processed_filing_id, tables=cached["tables"][:max_tables])
@@ -0,0 +1,132 @@
+"""
+Opt-in request hedging for idempotent detail endpoints.
+
+If an upstream request has not answered by the observed p95 latency of its endpoint, one duplicate
+request is sent and whichever response arrives first wins; the other is cancelled. Hedges are
+limited to a small share of the hedge-eligible requests, so hedging can never double the load.
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from src.metrics import metrics
+
+# Endpoints whose GETs are idempotent and cheap enough to duplicate.
+HEDGED_ENDPOINTS = {"/companies/{id}/", "/filings/{id}/", "/processed-filings/{id}/"}
+
+
+class LatencyWindow:
+    """
+    Latencies of the most recent ``size`` successful requests, with a cached percentile.
+    """
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self._p95: Optional[float] = None
+        self._since_update = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self._since_update += 1
+
+    def p95(self) -> float:
+        # Re-sorting a few hundred samples is cheap, but not worth doing on every request.
+        if self._p95 is None or self._since_update >= 20:
+            ordered = sorted(self.samples)
+            self._p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            self._since_update = 0
+        return self._p95
+
+
+class Hedger:
+    """
+    Decides when to hedge, within a budget of ``budget`` hedges per primary request.
+    """
+    def __init__(self, enabled: bool = False, budget: float = 0.05, min_samples: int = 20,
+                 min_delay: float = 0.02, endpoints=HEDGED_ENDPOINTS):
+        self.enabled = enabled
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.endpoints = set(endpoints)
+        self._latency: Dict[str, LatencyWindow] = {}
+        self._primaries = 0.0
+        self._hedges = 0.0
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        if endpoint in self.endpoints:
+            self._latency.setdefault(endpoint, LatencyWindow()).record(seconds)
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """
+        Seconds to wait before hedging a request to ``endpoint``, or None to never hedge it.
+        """
+        if not self.enabled or endpoint not in self.endpoints:
+            return None
+        window = self._latency.get(endpoint)
+        if window is None or len(window.samples) < self.min_samples:
+            return None
+        return max(self.min_delay, window.p95())
+
+    def _count_primary(self) -> None:
+        self._primaries += 1
+        if self._primaries >= 1000:
+            # Halve both counts so the budget follows recent traffic rather than all-time totals.
+            self._primaries /= 2
+            self._hedges /= 2
+
+    def _allow_hedge(self) -> bool:
+        if self._hedges + 1 > self.budget * self._primaries:
+            metrics.incr("hedges_over_budget")
+            return False
+        self._hedges += 1
+        return True
+
+    async def run(
+        self,
+        endpoint: str,
+        attempt: Callable[[], Awaitable[Any]],
+        may_send: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Any:
+        """
+        Await ``attempt()``, sending one duplicate if it is slower than the endpoint's p95.
+
+        ``may_send`` is awaited before a hedge goes out (e.g. for a rate-limit token). A failed
+        attempt only wins if the other one fails too.
+        """
+        delay = self.delay(endpoint)
+        if delay is None:
+            return await attempt()
+        self._count_primary()
+        primary = asyncio.ensure_future(attempt())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._allow_hedge() or (may_send is not None and not await may_send()):
+                return await primary
+            metrics.incr("hedges_sent", endpoint=endpoint)
+            hedge = asyncio.ensure_future(attempt())
+            tasks.add(hedge)
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is not None or not pending:
+                    winner = winner or done.pop()
+                    if winner is hedge:
+                        metrics.incr("hedge_wins", endpoint=endpoint)
+                    return winner.result()
+                tasks = pending
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # mark a losing attempt's error as retrieved
+
+
+hedger = Hedger(
+    enabled=os.getenv("HEDGE_REQUESTS", "0").lower() in ("1", "true", "yes"),
+    budget=float(os.getenv("HEDGE_BUDGET_PERCENT", "5")) / 100,
+    min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+)
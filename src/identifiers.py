@@ -0,0 +1,166 @@
+"""
+In-memory identifier index for resolving ISINs, LEIs and tickers to company IDs.
+The index is fed by every companies and filings response the server receives, per tenant.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.metrics import metrics
+
+ISIN_PATTERN = re.compile(r"^[A-Z]{2}[A-Z0-9]{9}[0-9]$")
+LEI_PATTERN = re.compile(r"^[A-Z0-9]{18}[0-9]{2}$")
+
+# Company fields kept alongside the ID, enough to answer "which company is this?".
+SUMMARY_FIELDS = ("id", "name", "isin", "lei", "ticker", "country_code", "country")
+
+
+def identifier_type(identifier: str) -> str:
+    """
+    Classify an identifier as "isin", "lei" or "ticker".
+    """
+    value = identifier.strip().upper()
+    if ISIN_PATTERN.match(value):
+        return "isin"
+    if LEI_PATTERN.match(value):
+        return "lei"
+    return "ticker"
+
+
+def _tickers(company: Dict[str, Any]) -> List[str]:
+    tickers = company.get("tickers") or []
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    for field in ("ticker", "symbol"):
+        if company.get(field):
+            tickers.append(company[field])
+    return [t.get("symbol") or t.get("ticker") if isinstance(t, dict) else t for t in tickers if t]
+
+
+class IdentifierIndex:
+    """
+    Bounded LRU hash index of ISIN, LEI and ticker to company ID, with a short company summary
+    per ID, kept per tenant namespace like the response cache. Entries older than ``max_age``
+    seconds are treated as unknown and resolved again.
+    """
+    def __init__(self, max_age: float = 86400.0, max_entries: int = 100000):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[Tuple[Optional[str], str, str], Tuple[int, float]]" = OrderedDict()
+        self._companies: "OrderedDict[Tuple[Optional[str], int], Dict[str, Any]]" = OrderedDict()
+
+    def _index(self, key: Tuple[Optional[str], str, str], company_id: int, now: float) -> None:
+        self._ids[key] = (company_id, now)
+        self._ids.move_to_end(key)
+
+    def observe_company(self, company: Dict[str, Any], namespace: Optional[str] = None) -> None:
+        """
+        Index one company object (from /companies/ or nested in a filing).
+        """
+        if not isinstance(company, dict) or company.get("id") is None or self.max_entries <= 0:
+            return
+        company_id = int(company["id"])
+        now = time.time()
+        summary = self._companies.setdefault((namespace, company_id), {})
+        self._companies.move_to_end((namespace, company_id))
+        summary.update({k: company[k] for k in SUMMARY_FIELDS if company.get(k) is not None})
+        for kind, value in (("isin", company.get("isin")), ("lei", company.get("lei"))):
+            if value:
+                self._index((namespace, kind, value.upper()), company_id, now)
+        for ticker in _tickers(company):
+            self._index((namespace, "ticker", str(ticker).upper()), company_id, now)
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+        while len(self._companies) > self.max_entries:
+            self._companies.popitem(last=False)
+
+    def observe(self, endpoint: str, data: Any, namespace: Optional[str] = None) -> None:
+        """
+        Index the companies contained in an API response from ``endpoint``.
+        """
+        if not isinstance(data, dict) or "error" in data:
+            return
+        if endpoint == "/companies/{id}/":
+            self.observe_company(data, namespace)
+        elif endpoint == "/companies/":
+            for company in data.get("results", []):
+                self.observe_company(company, namespace)
+        elif endpoint == "/filings/{id}/":
+            self.observe_company(data.get("company"), namespace)
+        elif endpoint == "/filings/":
+            for filing in data.get("results", []):
+                self.observe_company(filing.get("company"), namespace)
+
+    def lookup(self, identifier: str, namespace: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the summary of the company for ``identifier`` if it is indexed and not stale.
+        """
+        value = identifier.strip().upper()
+        key = (namespace, identifier_type(value), value)
+        found = self._ids.get(key)
+        if found is None:
+            return None
+        company_id, seen_at = found
+        if time.time() - seen_at > self.max_age:
+            return None
+        self._ids.move_to_end(key)
+        return dict(self._companies.get((namespace, company_id), {"id": company_id}))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+async def resolve_identifiers(api_client, identifiers: Iterable[str], concurrency: int = 5) -> List[Dict[str, Any]]:
+    """
+    Resolve identifiers to companies, answering indexed ones locally.
+
+    Unknown identifiers are deduplicated and searched upstream in small concurrent waves; every
+    search result is indexed before the next wave, so one search often resolves several pending
+    identifiers (e.g. a ticker search also yields that company's ISIN and LEI).
+
+    Identifiers cannot share a search: ``/companies/`` has no identifier-list filter, and the
+    terms of one ``search`` value must all match the same company, so a combined search of two
+    companies' ISINs finds neither. Searches are kept to one per identifier not resolved by an
+    earlier wave.
+    """
+    namespace = getattr(api_client, "cache_namespace", None)
+    requested = [i for i in identifiers if i and i.strip()]
+    pending = []
+    for identifier in dict.fromkeys(i.strip().upper() for i in requested):
+        if identifier_index.lookup(identifier, namespace) is None:
+            pending.append(identifier)
+    local = len(set(i.strip().upper() for i in requested)) - len(pending)
+    metrics.incr("identifier_index_hits", local)
+    searched = set()
+    while pending:
+        wave, pending = pending[:concurrency], pending[concurrency:]
+        results = await asyncio.gather(*(api_client.get_companies(search=i, page_size=10) for i in wave))
+        searched.update(wave)
+        metrics.incr("identifier_index_searches", len(wave))
+        for result in results:
+            for company in result.get("results", []) if "error" not in result else []:
+                identifier_index.observe_company(company, namespace)
+        pending = [i for i in pending if identifier_index.lookup(i, namespace) is None]
+
+    resolved = []
+    for identifier in requested:
+        key = identifier.strip().upper()
+        company = identifier_index.lookup(key, namespace)
+        resolved.append({
+            "identifier": identifier,
+            "type": identifier_type(key),
+            "company_id": company["id"] if company else None,
+            "company": company,
+            "source": "not_found" if company is None else ("upstream" if key in searched else "index"),
+        })
+    return resolved
+
+
+# Shared index for the whole process; entries are keyed by tenant namespace.
+identifier_index = IdentifierIndex(
+    max_age=float(os.getenv("IDENTIFIER_INDEX_MAX_AGE", "86400")),
+    max_entries=int(os.getenv("IDENTIFIER_INDEX_SIZE", "100000")),
+)
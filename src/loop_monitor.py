@@ -0,0 +1,183 @@
+"""
+Event-loop health monitor.
+
+A heartbeat task wakes every ``LOOP_MONITOR_INTERVAL_MS`` and records how late it woke up as
+``event_loop_lag_ms``. A watchdog thread checks the heartbeat; when it is overdue by more than
+``LOOP_STALL_THRESHOLD_MS``, something is running on the loop without yielding, and the thread
+captures the loop thread's stack at that moment; every callback running longer than threshold
+plus interval is caught. The stall is attributed to the tool call or resource read that was
+running: the monitor middleware labels each call's task, and tasks it creates inherit the label
+through the loop's task factory.
+
+Stalls are counted per activity in ``event_loop_stalls`` and the most recent ones, with their
+stacks, are kept for the ``get_loop_health`` tool. Disabled unless ``LOOP_MONITOR=1``.
+"""
+
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Any, Dict, Optional
+
+from src.metrics import metrics
+
+STACK_DEPTH = 15
+
+
+class LoopMonitor:
+    """
+    Loop lag sampler plus a watchdog thread that records the stack of long-running callbacks.
+    """
+    def __init__(self, enabled: bool = False, interval: float = 0.05, threshold: float = 0.1, history: int = 50):
+        self.enabled = enabled
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._beat = 0.0
+        self._lock = threading.Lock()
+        self._stall: Optional[Dict[str, Any]] = None
+        self._recent: "deque[Dict[str, Any]]" = deque(maxlen=history)
+        self._by_activity: Dict[str, Dict[str, float]] = {}
+        self._labels: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+        self._max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start monitoring the running loop (idempotent; no-op when disabled).
+        """
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if self._loop.get_task_factory() is None:
+            self._loop.set_task_factory(self._task_factory)
+        self._beat = time.monotonic()
+        self._task = self._loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+
+    def _task_factory(self, loop, coro, **kwargs):
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+        parent = asyncio.current_task(loop)
+        label = self._labels.get(parent) if parent is not None else None
+        if label is not None:
+            self._labels[task] = label
+        return task
+
+    def label(self, activity: Optional[str]) -> Optional[str]:
+        """
+        Attribute the current task (and the tasks it creates) to ``activity``; returns the previous label.
+        """
+        task = asyncio.current_task()
+        if task is None:
+            return None
+        previous = self._labels.get(task)
+        if activity is None:
+            self._labels.pop(task, None)
+        else:
+            self._labels[task] = activity
+        return previous
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            with self._lock:
+                self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, time.monotonic() - expected) * 1000
+            metrics.observe("event_loop_lag_ms", lag_ms)
+            self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+            with self._lock:
+                stall, self._stall = self._stall, None
+            if stall is not None:
+                stall["duration_ms"] = round(lag_ms, 1)
+                self._finish(stall)
+
+    def _finish(self, stall: Dict[str, Any]) -> None:
+        activity = stall["activity"] or "unattributed"
+        metrics.incr("event_loop_stalls", activity=activity)
+        metrics.observe("event_loop_stall_ms", stall["duration_ms"], activity=activity)
+        totals = self._by_activity.setdefault(activity, {"stalls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        totals["stalls"] += 1
+        totals["total_ms"] = round(totals["total_ms"] + stall["duration_ms"], 1)
+        totals["max_ms"] = max(totals["max_ms"], stall["duration_ms"])
+        self._recent.append(stall)
+
+    def _watchdog(self) -> None:
+        """
+        Runs in a thread: capture the loop thread's stack once per stall.
+        """
+        while self._task is not None and not self._task.done():
+            time.sleep(self.interval / 2)
+            with self._lock:
+                overdue = time.monotonic() - self._beat - self.interval
+                if overdue < self.threshold or self._stall is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread)
+                try:
+                    task = asyncio.current_task(self._loop)
+                except RuntimeError:
+                    task = None
+                self._stall = {
+                    "at": time.time(),
+                    "activity": self._labels.get(task) if task is not None else None,
+                    "detected_after_ms": round(overdue * 1000, 1),
+                    "stack": traceback.format_stack(frame)[-STACK_DEPTH:] if frame is not None else [],
+                }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Lag and stall summary, with the stacks of the most recent stalls.
+        """
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self._max_lag_ms, 1),
+            "stalls_by_activity": dict(sorted(self._by_activity.items(), key=lambda kv: -kv[1]["total_ms"])),
+            "recent_stalls": list(self._recent)[::-1],
+        }
+
+
+monitor = LoopMonitor(
+    enabled=os.getenv("LOOP_MONITOR", "0").lower() in ("1", "true", "yes"),
+    interval=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50")) / 1000,
+    threshold=float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100")) / 1000,
+)
+
+
+try:
+    from fastmcp.server.middleware import Middleware
+except ImportError:  # fastmcp without middleware support
+    Middleware = None
+
+
+if Middleware is not None:
+    class LoopMonitorMiddleware(Middleware):
+        """
+        Start the monitor with the first request and label each tool call and resource read.
+        """
+        async def _labelled(self, activity: str, context, call_next):
+            monitor.start()
+            previous = monitor.label(activity)
+            try:
+                return await call_next(context)
+            finally:
+                monitor.label(previous)
+
+        async def on_call_tool(self, context, call_next):
+            return await self._labelled(f"tool:{context.message.name}", context, call_next)
+
+        async def on_read_resource(self, context, call_next):
+            # IDs are replaced so the label (also a metrics label) names the resource, not the entity.
+            uri = re.sub(r"/\d+(?=/|$)", "/{id}", str(context.message.uri))
+            return await self._labelled(f"resource:{uri}", context, call_next)
+else:
+    LoopMonitorMiddleware = None
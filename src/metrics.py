@@ -0,0 +1,63 @@
+"""
+In-process metrics for the Financial Reports MCP server.
+Counters and simple timing summaries keyed by name and labels, exposed through the get_metrics tool.
+"""
+
+from typing import Any, Dict, Tuple
+
+
+def _label_key(labels: Dict[str, Any]) -> str:
+    return ",".join(f"{k}={labels[k]}" for k in sorted(labels)) or "_"
+
+
+class Metrics:
+    """
+    Registry of counters and value summaries (count/sum/min/max).
+    """
+    def __init__(self):
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._summaries: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increment the counter ``name`` for the given labels.
+        """
+        key = (name, _label_key(labels))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Record one observation (e.g. a latency or a byte count) in the summary ``name``.
+        """
+        key = (name, _label_key(labels))
+        summary = self._summaries.get(key)
+        if summary is None:
+            self._summaries[key] = {"count": 1, "sum": value, "min": value, "max": value}
+            return
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["min"] = min(summary["min"], value)
+        summary["max"] = max(summary["max"], value)
+
+    def counter(self, name: str, **labels) -> float:
+        return self._counters.get((name, _label_key(labels)), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return all metrics as ``{"counters": {name: {labels: value}}, "summaries": {...}}``.
+        """
+        counters: Dict[str, Dict[str, float]] = {}
+        for (name, labels), value in sorted(self._counters.items()):
+            counters.setdefault(name, {})[labels] = value
+        summaries: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (name, labels), summary in sorted(self._summaries.items()):
+            summaries.setdefault(name, {})[labels] = dict(summary, avg=summary["sum"] / summary["count"])
+        return {"counters": counters, "summaries": summaries}
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._summaries.clear()
+
+
+# Shared registry for the whole process.
+metrics = Metrics()
@@ -0,0 +1,286 @@
+"""
+Helpers for reading more results than one API page holds.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from src.metrics import metrics
+
+# The API rejects page sizes above 100.
+MAX_PAGE_SIZE = 100
+MAX_LIMIT = int(os.getenv("MAX_FILINGS_LIMIT", "1000"))
+FETCH_CONCURRENCY = int(os.getenv("FILINGS_FETCH_CONCURRENCY", "4"))
+
+
+async def fetch_filings(
+    api_client,
+    limit: int,
+    offset: int = 0,
+    concurrency: int = FETCH_CONCURRENCY,
+    **filters,
+) -> Dict[str, Any]:
+    """
+    Fetch up to ``limit`` filings starting at ``offset`` in the requested ordering.
+
+    The first page is fetched alone to learn the total count; the remaining pages of the planned
+    range are fetched concurrently (at most ``concurrency`` at a time) and merged in page order.
+    Filings that moved to the next page while it was fetched (because a new filing was published)
+    appear twice and are dropped; when that leaves the result short, one more page is read.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    first_page = offset // MAX_PAGE_SIZE + 1
+    skip = offset % MAX_PAGE_SIZE
+
+    first = await api_client.get_filings(page=first_page, page_size=MAX_PAGE_SIZE, **filters)
+    if "error" in first:
+        return first
+    count = first.get("count", len(first.get("results", [])))
+    wanted = max(0, min(limit, count - offset))
+    last_page = first_page + math.ceil((skip + wanted) / MAX_PAGE_SIZE) - 1
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(page: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await api_client.get_filings(page=page, page_size=MAX_PAGE_SIZE, **filters)
+
+    pages = [first] + list(await asyncio.gather(*(fetch(p) for p in range(first_page + 1, last_page + 1))))
+    for page in pages:
+        if "error" in page:
+            return page
+
+    results: List[Dict[str, Any]] = []
+    seen = set()
+    duplicates = 0
+    next_page = last_page + 1
+    has_more = bool(pages[-1].get("next"))
+
+    def merge(items: List[Dict[str, Any]]) -> None:
+        nonlocal duplicates
+        for item in items:
+            key = item.get("id")
+            if key is not None and key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            results.append(item)
+
+    for page in pages:
+        merge(page.get("results", []))
+    while len(results) - skip < wanted and has_more:
+        extra = await api_client.get_filings(page=next_page, page_size=MAX_PAGE_SIZE, **filters)
+        if "error" in extra:
+            break
+        pages.append(extra)
+        merge(extra.get("results", []))
+        has_more = bool(extra.get("next"))
+        next_page += 1
+
+    metrics.incr("bulk_pages_fetched", len(pages))
+    metrics.incr("bulk_duplicates_removed", duplicates)
+    selected = results[skip:skip + wanted]
+    return {
+        "count": count,
+        "offset": offset,
+        "limit": limit,
+        "returned": len(selected),
+        "has_more": offset + len(selected) < count,
+        "pages_fetched": len(pages),
+        "duplicates_removed": duplicates,
+        "results": selected,
+    }
+
+
+# Cursor (keyset) pagination: each page is the first page of a window that ends (or starts) at
+# the last datetime already returned, so its cost does not grow with depth and filings published
+# during the scan cannot shift rows between pages. Rows are ordered by (datetime, id); the API
+# only orders by the datetime, so ties are put in ID order here.
+CURSOR_FIELDS = ("release_datetime", "dissemination_datetime")
+START_CURSOR = "*"
+# Upper bound on window requests for one page, reached only when thousands of filings share a datetime.
+MAX_WINDOW_REQUESTS = 50
+
+
+class PaginationError(RuntimeError):
+    """Raised by iter_filings when the API returns an error."""
+
+
+def _fingerprint(filters: Dict[str, Any]) -> str:
+    canonical = json.dumps({k: str(v) for k, v in filters.items()}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode an opaque cursor; raises ValueError if it is malformed.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("malformed cursor") from e
+    if not isinstance(state, dict) or not {"f", "v", "id"} <= set(state):
+        raise ValueError("malformed cursor")
+    if not isinstance(state["v"], str) or not isinstance(state["id"], int):
+        raise ValueError("malformed cursor")
+    return state
+
+
+async def _window_is_exclusive(api_client, field: str, value: str, filing_id: int) -> bool:
+    """
+    True if the filing the cursor points at still has ``value`` but was not returned by a window
+    starting (or ending) at ``value``, i.e. the API's ``*_from``/``*_to`` filters are exclusive.
+    """
+    filing = await api_client.get_filing_detail(filing_id)
+    return "error" not in filing and filing.get(field) == value
+
+
+async def fetch_filings_keyset(
+    api_client,
+    page_size: int = MAX_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    ordering: Optional[str] = None,
+    **filters,
+) -> Dict[str, Any]:
+    """
+    Fetch one page of filings in cursor mode and return it with the ``next_cursor`` and the
+    number of matching filings ``remaining`` from this page on (the total on the first page).
+
+    ``ordering`` must be (descending or ascending) ``release_datetime`` or
+    ``dissemination_datetime``. The cursor holds the ``(datetime, id)`` of the last filing
+    returned; the next page narrows the matching ``*_to`` (or ``*_from``) filter to that datetime
+    and drops the filings at or before that key, so ties are never lost or repeated. When the
+    page ends inside a run of filings sharing a datetime, the window is read until the run ends.
+    A filing without a value for the ordering field cannot be placed and returns an error whose
+    ``unordered`` key holds that filing's ID.
+    """
+    ordering = ordering or "-release_datetime"
+    field = ordering.lstrip("-")
+    descending = ordering.startswith("-")
+    if field not in CURSOR_FIELDS:
+        return {"error": f"Error: cursor pagination supports ordering by {' or '.join(CURSOR_FIELDS)}."}
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    filters = {k: v for k, v in filters.items() if v is not None}
+    fingerprint = _fingerprint(dict(filters, ordering=ordering))
+
+    window = dict(filters)
+    after = None
+    if cursor and cursor != START_CURSOR:
+        try:
+            state = decode_cursor(cursor)
+        except ValueError:
+            return {"error": "Error: invalid cursor."}
+        if state["f"] != fingerprint:
+            return {"error": "Error: this cursor belongs to a scan with different filters or ordering."}
+        after = (state["v"], state["id"])
+        window[f"{field}_to" if descending else f"{field}_from"] = state["v"]
+
+    def key(filing: Dict[str, Any]) -> Tuple[str, int]:
+        return filing[field], filing["id"]
+
+    def is_new(filing: Dict[str, Any]) -> bool:
+        return after is None or (key(filing) < after if descending else key(filing) > after)
+
+    rows: List[Dict[str, Any]] = []
+    remaining = None
+    returned_before = 0
+    window_page = requests = 1
+    request_size = min(MAX_PAGE_SIZE, page_size + 1)
+    while True:
+        response = await api_client.get_filings(page=window_page, page_size=request_size, ordering=ordering, **window)
+        if "error" in response:
+            return response
+        batch = response.get("results", [])
+        if remaining is None and after is None and response.get("next"):
+            # Later windows filter on the datetime, which drops filings without one; the database
+            # sorts those to one end of the ordering, so also look at the end this page does not show.
+            tail = await api_client.get_filings(page=1, page_size=1, ordering=field if descending else f"-{field}",
+                                                **filters)
+            if "error" in tail:
+                return tail
+            batch_ends = batch + tail.get("results", [])
+        else:
+            batch_ends = batch
+        missing = next((f for f in batch_ends if f.get(field) is None or f.get("id") is None), None)
+        if missing is not None:
+            return {"error": f"Error: filing {missing.get('id')} has no {field}, so cursor pagination cannot "
+                             f"place it; add a {field}_from/{field}_to filter or use page-based pagination.",
+                    "unordered": missing.get("id")}
+        if remaining is None:
+            remaining = response.get("count", 0)
+            if after is not None and (not batch or batch[0][field] != after[0]) \
+                    and await _window_is_exclusive(api_client, field, *after):
+                return {"error": f"Error: the API's {field} filters exclude their bound, so cursor "
+                                 f"pagination would skip filings; use page-based pagination."}
+        fresh = [f for f in batch if is_new(f)]
+        returned_before += len(batch) - len(fresh)
+        rows.extend(fresh)
+        if not response.get("next"):
+            break
+        # The API orders by the datetime alone, so every filing sharing the datetime at the page
+        # cut must be read before the cut can be placed by ID.
+        if len(rows) > page_size:
+            rows.sort(key=key, reverse=descending)
+            if batch[-1][field] != rows[page_size - 1][field]:
+                break
+        if request_size < MAX_PAGE_SIZE:
+            # A long run of ties: read the window again in full-size pages.
+            request_size, rows, returned_before = MAX_PAGE_SIZE, [], 0
+            requests += 1
+            continue
+        if window_page >= MAX_WINDOW_REQUESTS:
+            return {"error": f"Error: more than {MAX_WINDOW_REQUESTS * request_size} filings share one {field}; "
+                             f"narrow the filters or use page-based pagination."}
+        window_page += 1
+        requests += 1
+    metrics.incr("keyset_pages")
+    if requests > 1:
+        metrics.incr("keyset_window_requests", requests - 1)
+
+    rows.sort(key=key, reverse=descending)
+    results = rows[:page_size]
+    has_more = len(rows) > page_size or bool(response.get("next"))
+    next_cursor = None
+    if has_more and results:
+        value, last_id = key(results[-1])
+        next_cursor = encode_cursor({"f": fingerprint, "v": value, "id": last_id})
+    return {
+        "remaining": max(0, remaining - returned_before),
+        "returned": len(results),
+        "next_cursor": next_cursor,
+        "results": results,
+    }
+
+
+async def iter_filings(
+    api_client,
+    page_size: int = MAX_PAGE_SIZE,
+    ordering: Optional[str] = None,
+    cursor: Optional[str] = None,
+    **filters,
+) -> AsyncIterator[Tuple[Dict[str, Any], Optional[str]]]:
+    """
+    Iterate over every filing matching ``filters`` in cursor mode.
+
+    Yields ``(filing, cursor)`` pairs, where ``cursor`` resumes the scan after the page the
+    filing belongs to (None on the last page). Raises PaginationError on API errors.
+    """
+    while True:
+        page = await fetch_filings_keyset(api_client, page_size, cursor=cursor, ordering=ordering, **filters)
+        if "error" in page:
+            raise PaginationError(page["error"])
+        for filing in page["results"]:
+            yield filing, page["next_cursor"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
@@ -0,0 +1,102 @@
+"""
+Predictive prefetch of the calls that usually follow a company search.
+
+Agents typically follow ``search_companies`` with ``get_company_detail`` and ``get_latest_filings``
+for one of the hits. With PREFETCH enabled, the detail and the first page of filings of the top
+``PREFETCH_TOP_N`` hits are fetched in the background at low priority, so those follow-up calls
+are answered from the cache.
+
+Every prefetched response is counted in ``prefetch_requests``; it counts as a ``prefetch_hits``
+when a later request reads it and as ``prefetch_wasted`` if nothing has within PREFETCH_WINDOW
+seconds.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Tuple
+
+from src.deadlines import deadline
+from src.metrics import metrics
+from src.scheduler import priority
+
+# Set while a prefetch task runs, so the client can tell its requests apart.
+_prefetching: ContextVar[bool] = ContextVar("prefetching", default=False)
+
+
+class Prefetcher:
+    """
+    Warms the cache for the top ``top_n`` results of a company search.
+    """
+    def __init__(self, enabled: bool = False, top_n: int = 3, window: float = 300, max_pending: int = 50):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.window = window
+        self.max_pending = max_pending
+        # Cache key -> (expiry of the hit window, endpoint) of prefetched responses not read yet.
+        self._warmed: Dict[str, Tuple[float, str]] = {}
+        self._tasks = set()
+
+    def track(self, key: str, endpoint: str) -> None:
+        """
+        Called by the client after storing an upstream response; remembers prefetched ones.
+        """
+        if _prefetching.get():
+            self._warmed[key] = (time.monotonic() + self.window, endpoint)
+            metrics.incr("prefetch_requests", endpoint=endpoint)
+
+    def claim(self, key: str) -> None:
+        """
+        Called by the client for every regular request; counts a hit if ``key`` was prefetched.
+        """
+        if self._warmed and not _prefetching.get():
+            entry = self._warmed.pop(key, None)
+            if entry is not None:
+                metrics.incr("prefetch_hits", endpoint=entry[1])
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._warmed.items() if expires <= now]:
+            _, endpoint = self._warmed.pop(key)
+            metrics.incr("prefetch_wasted", endpoint=endpoint)
+
+    async def _warm(self, company_id: int, api_client) -> None:
+        _prefetching.set(True)
+        # Prefetches outlive the search call and must not compete with interactive requests.
+        with deadline(None), priority("background"):
+            try:
+                await api_client.get_company_detail(company_id)
+                await api_client.get_filings(company=company_id, page=1, page_size=10)
+            except Exception as e:
+                metrics.incr("prefetch_errors")
+                print(f"Prefetch for company {company_id} failed: {e}", file=sys.stderr)
+
+    def schedule(self, api_client, companies: List[Dict[str, Any]]) -> None:
+        """
+        Start background prefetches for the first ``top_n`` of ``companies``.
+        """
+        if not self.enabled or self.top_n <= 0:
+            return
+        self._expire()
+        loop = asyncio.get_running_loop()
+        for company in companies[:self.top_n]:
+            if company.get("id") is None:
+                continue
+            if len(self._tasks) >= self.max_pending:
+                metrics.incr("prefetch_dropped")
+                break
+            task = loop.create_task(self._warm(company["id"], api_client))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def __len__(self) -> int:
+        return len(self._warmed)
+
+
+prefetcher = Prefetcher(
+    enabled=os.getenv("PREFETCH", "0").lower() in ("1", "true", "yes"),
+    top_n=int(os.getenv("PREFETCH_TOP_N", "3")),
+    window=float(os.getenv("PREFETCH_WINDOW", "300")),
+)
@@ -0,0 +1,237 @@
+"""
+Normalization of processed filing content, run in a process pool.
+
+Processed filings carry their text as Markdown with embedded HTML. ``normalize_content`` turns it
+into plain Markdown with normalized whitespace, a list of sections (headings with offsets) and the
+tables it contains. The work is CPU-bound, so on the server it runs in worker processes: at most
+``NORMALIZE_MAX_PENDING`` documents are queued for the pool at once (further callers wait), and
+results are memoized by the SHA-256 of the content, so repeated and concurrent requests for the
+same filing are normalized once.
+"""
+
+import asyncio
+import hashlib
+import html
+import multiprocessing
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from src.metrics import metrics
+
+# Fields that hold the document text, in order of preference.
+CONTENT_FIELDS = ("markdown", "content", "html", "text")
+
+_TABLE_RE = re.compile(r"<table\b.*?</table>", re.IGNORECASE | re.DOTALL)
+_ROW_RE = re.compile(r"<tr\b.*?</tr>", re.IGNORECASE | re.DOTALL)
+_CELL_RE = re.compile(r"<t[hd]\b[^>]*>(.*?)</t[hd]>", re.IGNORECASE | re.DOTALL)
+_HEADING_TAG_RE = re.compile(r"<h([1-6])\b[^>]*>(.*?)</h\1>", re.IGNORECASE | re.DOTALL)
+_BREAK_RE = re.compile(r"<br\s*/?>|</(p|div|li|section|article|blockquote)>", re.IGNORECASE)
+_DROP_RE = re.compile(r"<(script|style)\b.*?</\1>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACES_RE = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_SEPARATOR_RE = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+
+
+def _inline_text(fragment: str) -> str:
+    return _SPACES_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", fragment))).strip()
+
+
+def _html_table(match: "re.Match") -> str:
+    """
+    Rewrite an HTML table as a Markdown pipe table, taking its first row as the header.
+    """
+    rows = [[_inline_text(c).replace("|", "\\|") for c in _CELL_RE.findall(row)]
+            for row in _ROW_RE.findall(match.group(0))]
+    rows = [r for r in rows if r]
+    if not rows:
+        return "\n"
+    width = max(len(r) for r in rows)
+    lines = ["| " + " | ".join(r + [""] * (width - len(r))) + " |" for r in rows]
+    lines.insert(1, "|" + "---|" * width)
+    return "\n\n" + "\n".join(lines) + "\n\n"
+
+
+def _split_row(line: str) -> List[str]:
+    cells = re.split(r"(?<!\\)\|", line.strip().strip("|"))
+    return [c.strip().replace("\\|", "|") for c in cells]
+
+
+def strip_markup(text: str) -> str:
+    """
+    Convert embedded HTML to Markdown text and normalize whitespace.
+    """
+    text = _DROP_RE.sub("", text.replace("\r\n", "\n").replace("\r", "\n"))
+    text = _TABLE_RE.sub(_html_table, text)
+    text = _HEADING_TAG_RE.sub(lambda m: f"\n\n{'#' * int(m.group(1))} {_inline_text(m.group(2))}\n\n", text)
+    text = _BREAK_RE.sub("\n", text)
+    text = html.unescape(_TAG_RE.sub("", text))
+    lines = [_SPACES_RE.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def normalize_content(text: str) -> Dict[str, Any]:
+    """
+    Normalize one document: cleaned ``text``, ``sections`` (level, title, offset and length of
+    each heading's section in ``text``) and ``tables`` (header, rows and enclosing section).
+    """
+    text = strip_markup(text)
+    sections: List[Dict[str, Any]] = []
+    tables: List[Dict[str, Any]] = []
+    block: List[str] = []
+    offset = 0
+
+    def close_table() -> None:
+        if len(block) >= 2:
+            rows = [_split_row(line) for line in block]
+            header = None
+            if len(rows) > 1 and _SEPARATOR_RE.match(block[1].strip()):
+                header, rows = rows[0], rows[2:]
+            tables.append({
+                "section": sections[-1]["title"] if sections else None,
+                "header": header,
+                "rows": rows,
+            })
+        block.clear()
+
+    for line in text.split("\n"):
+        heading = _HEADING_RE.match(line)
+        if heading:
+            if sections:
+                sections[-1]["length"] = offset - sections[-1]["offset"]
+            sections.append({"level": len(heading.group(1)), "title": heading.group(2), "offset": offset})
+        if line.startswith("|") and line.rstrip().endswith("|"):
+            block.append(line)
+        else:
+            close_table()
+        offset += len(line) + 1
+    close_table()
+    if sections:
+        sections[-1]["length"] = len(text) - sections[-1]["offset"]
+    return {"text": text, "sections": sections, "tables": tables}
+
+
+def content_field(filing: Dict[str, Any]) -> Optional[str]:
+    """
+    Name of the field holding the document text of a processed filing, if any.
+    """
+    return next((f for f in CONTENT_FIELDS if isinstance(filing.get(f), str)), None)
+
+
+class NormalizationPipeline:
+    """
+    Runs ``normalize_content`` in a process pool with a bounded queue and a content-hash memo.
+    Documents smaller than ``inline_bytes`` are normalized on the calling thread, where a
+    round trip to a worker would cost more than the work itself.
+    """
+    def __init__(self, workers: int = 2, max_pending: int = 8, memo_size: int = 256, inline_bytes: int = 20000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.memo_size = memo_size
+        self.inline_bytes = inline_bytes
+        self._memo: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._running: Dict[str, asyncio.Future] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned rather than forked workers: the server process has threads and an event loop.
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _run(self, text: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return await self.apply(normalize_content, text)
+        finally:
+            metrics.observe("normalize_ms", (time.perf_counter() - started) * 1000)
+
+    async def apply(self, func: Callable[[str], Any], text: str) -> Any:
+        """
+        Run ``func(text)`` (a module-level function, so workers can import it) in the pool,
+        or inline for small documents. Not memoized.
+        """
+        if self.workers <= 0 or len(text) < self.inline_bytes:
+            metrics.incr("normalize_runs", where="inline")
+            return func(text)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.max_pending))
+        queued = time.monotonic()
+        async with self._slots:
+            metrics.observe("normalize_queue_wait_ms", (time.monotonic() - queued) * 1000)
+            metrics.incr("normalize_runs", where="pool")
+            loop = asyncio.get_running_loop()
+            pool = self._executor()
+            try:
+                return await loop.run_in_executor(pool, func, text)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); reap the broken pool, start a fresh one
+                # and retry once. Calls that failed on the same pool share the replacement.
+                if self._pool is pool:
+                    metrics.incr("normalize_pool_restarts")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = None
+                return await loop.run_in_executor(self._executor(), func, text)
+
+    async def normalize(self, text: str) -> Dict[str, Any]:
+        """
+        Return the normalized form of ``text``, from the memo when it was normalized before.
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        memo = self._memo.get(digest)
+        if memo is not None:
+            self._memo.move_to_end(digest)
+            metrics.incr("normalize_memo_hits")
+            return memo
+        running = self._running.get(digest)
+        if running is not None:
+            metrics.incr("normalize_memo_hits")
+            return await asyncio.shield(running)
+        future = asyncio.ensure_future(self._run(text))
+        self._running[digest] = future
+        future.add_done_callback(lambda f: self._finish(digest, f))
+        # Shielded, so a cancelled caller does not abort work that others may be waiting for.
+        return await asyncio.shield(future)
+
+    def _finish(self, digest: str, future: asyncio.Future) -> None:
+        self._running.pop(digest, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._memo[digest] = future.result()
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def close(self) -> None:
+        """
+        Shut down the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+async def normalize_processed_filing(filing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return ``filing`` with its document text replaced by a ``normalized`` object.
+    Errors and filings without text are returned unchanged.
+    """
+    field = content_field(filing) if isinstance(filing, dict) and "error" not in filing else None
+    if field is None:
+        return filing
+    result = {k: v for k, v in filing.items() if k != field}
+    result["normalized"] = await pipeline.normalize(filing[field])
+    return result
+
+
+pipeline = NormalizationPipeline(
+    workers=int(os.getenv("NORMALIZE_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("NORMALIZE_MAX_PENDING", "8")),
+    memo_size=int(os.getenv("NORMALIZE_MEMO_SIZE", "256")),
+)
@@ -0,0 +1,128 @@
+"""
+Upstream rate limiting for the Financial Reports API clients.
+A token bucket per named bucket, either in-process or shared by all worker processes
+on one host through a SQLite database.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from src.metrics import metrics
+
+
+class RateLimiter:
+    """
+    In-process token bucket limiter: ``rate`` requests per second with bursts of up to ``burst``.
+    A rate of 0 disables limiting.
+    """
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def _take(self, bucket: str) -> float:
+        """
+        Take one token from ``bucket``; return 0 on success, else the seconds to wait for a token.
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(bucket, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._buckets[bucket] = (tokens - 1, now)
+            return 0.0
+        self._buckets[bucket] = (tokens, now)
+        return (1 - tokens) / self.rate
+
+    async def _take_async(self, bucket: str) -> float:
+        """
+        ``_take`` for use on the event loop; overridden where taking a token may block.
+        """
+        return self._take(bucket)
+
+    async def try_acquire(self, bucket: str = "default") -> bool:
+        """
+        Take a token for ``bucket`` if one is available right now, without waiting for a refill.
+        """
+        return self.rate <= 0 or await self._take_async(bucket) <= 0
+
+    async def acquire(self, bucket: str = "default") -> None:
+        """
+        Wait until a request may be sent for ``bucket``.
+        """
+        if self.rate <= 0:
+            return
+        started = time.monotonic()
+        while True:
+            wait = await self._take_async(bucket)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        waited = time.monotonic() - started
+        if waited > 0:
+            metrics.observe("rate_limit_wait_ms", waited * 1000, bucket=bucket)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Token bucket limiter whose buckets live in a SQLite database, so that N worker processes
+    share one upstream quota instead of each getting their own.
+
+    Tokens are taken on a dedicated thread that owns the connection: ``BEGIN IMMEDIATE`` waits
+    (up to the busy timeout) while another worker holds the lock, which must not block the event loop.
+    """
+    def __init__(self, path: str, rate: float, burst: Optional[float] = None):
+        super().__init__(rate, burst)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit-db")
+
+    async def _take_async(self, bucket: str) -> float:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._take, bucket)
+
+    def _take(self, bucket: str) -> float:
+        # Wall-clock time, since monotonic clocks are not comparable across processes.
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (bucket,)).fetchone()
+            tokens, updated = row if row else (self.burst, now)
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (bucket, tokens, now)
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return wait
+
+
+def create_limiter() -> RateLimiter:
+    """
+    Build the upstream limiter from UPSTREAM_RATE_LIMIT / UPSTREAM_BURST, shared across processes
+    when RATE_LIMIT_DB points at a SQLite file.
+    """
+    rate = float(os.getenv("UPSTREAM_RATE_LIMIT", "0"))
+    burst = os.getenv("UPSTREAM_BURST")
+    burst = float(burst) if burst else None
+    path = os.getenv("RATE_LIMIT_DB")
+    if path and rate > 0:
+        return SharedRateLimiter(path, rate, burst)
+    return RateLimiter(rate, burst)
+
+
+# Shared limiter for the whole process.
+upstream_limiter = create_limiter()
@@ -1,16 +1,83 @@
+import asyncio
+import json
 import os
+import re
+import time
 from typing import Optional, Any, Dict, Union
 import httpx
 
+from src.cache import PUBLIC_ENDPOINTS, CacheEntry, bypassed, canonical_key, mark_stale, response_cache, ttl_for
+from src.deadlines import DeadlineExceeded, check as check_deadline, deadline
+from src.entities import TAXONOMY_LISTS, entity_store
+from src.hedging import hedger
+from src.identifiers import identifier_index
+from src.metrics import metrics
+from src.prefetch import prefetcher
+from src.rate_limit import upstream_limiter
+from src.scheduler import current_priority, priority, scheduler
+
+
+def _accept_encoding() -> str:
+    """
+    Content codings the installed httpx can decode. brotli and zstd need optional packages, and
+    httpx only decodes zstd from 0.27.1, so ask httpx rather than probing for the packages.
+    """
+    try:
+        from httpx._decoders import SUPPORTED_DECODERS
+    except ImportError:  # private module moved; stick to what every httpx decodes
+        return "gzip, deflate"
+    return ", ".join(c for c in ("gzip", "deflate", "br", "zstd") if c in SUPPORTED_DECODERS)
+
+
+ACCEPT_ENCODING = _accept_encoding()
+# Upper bound for a single upstream request; a tool call's remaining deadline may shorten it.
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "30"))
+
+# Keeps background refresh tasks referenced until they finish.
+_background_tasks = set()
+
 class RealAPIClient:
     """
     Real client for Financial Reports API, fully aligned with the OpenAPI spec. Uses direct HTTP requests for all endpoints.
     """
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.financialreports.eu/"):
+    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.financialreports.eu/",
+                 cache_namespace: Optional[str] = None):
         self.api_key = api_key or os.getenv("API_KEY")
         
         self.base_url = base_url.rstrip("/")
         self.headers = {"x-api-key": self.api_key}
+        # Tenant label: prefixes cache keys of non-public data and names the rate-limit bucket.
+        self.cache_namespace = cache_namespace
+        self.in_flight = 0
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        """
+        Return this client's connection pool, creating it on first use.
+        """
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "20")),
+                max_keepalive_connections=int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "10")),
+            ))
+        return self._http
+
+    async def aclose(self) -> None:
+        """
+        Close the connection pool.
+        """
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _cache_key(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Cache key of a request; public reference data is shared by all tenants.
+        """
+        key = canonical_key(f"{self.base_url}/{path}", params)
+        if self.cache_namespace and self._endpoint(path) not in PUBLIC_ENDPOINTS:
+            key = f"{self.cache_namespace}|{key}"
+        return key
 
     @staticmethod
     def _format_error(error: Any) -> dict:
@@ -41,6 +108,204 @@ class RealAPIClient:
             msg = f"Error: {str(error)}"
             return {"error": msg}
 
+    @staticmethod
+    def _format_timeout(endpoint: str, detail: str) -> dict:
+        """
+        Format a timeout distinctly from other errors, so callers can tell "slow" from "failed".
+        """
+        return {
+            "error": f"Error: Timed out waiting for {endpoint} ({detail}). Try again, or narrow the request.",
+            "timeout": True,
+        }
+
+    @staticmethod
+    def _endpoint(path: str) -> str:
+        """
+        Return the endpoint template of a request path, used as the metrics label.
+        """
+        return "/" + re.sub(r"/\d+/", "/{id}/", path)
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None, log_request: bool = False) -> Dict[str, Any]:
+        """
+        Perform a GET request against the API and return the decoded JSON body or a formatted error.
+
+        Fresh cached responses are returned directly. Expired responses still inside the
+        stale-while-revalidate window are returned immediately while one background refresh runs.
+        404 responses are remembered in the negative cache for the same canonical request.
+        Detail requests for entities already seen in full inside other responses are answered
+        from the entity store.
+        """
+        key = self._cache_key(path, params)
+        endpoint = self._endpoint(path)
+        if self.cache_namespace:
+            metrics.incr("tenant_requests", tenant=self.cache_namespace)
+        prefetcher.claim(key)
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            if cached.negative:
+                metrics.incr("negative_cache_hits", endpoint=endpoint)
+                return cached.value
+            if cached.is_fresh():
+                metrics.incr("cache_hits", endpoint=endpoint)
+                return cached.value
+            if cached.can_revalidate():
+                metrics.incr("cache_stale_hits", endpoint=endpoint)
+                if response_cache.begin_refresh(key):
+                    task = asyncio.get_running_loop().create_task(self._refresh(path, params, key, endpoint))
+                    _background_tasks.add(task)
+                    task.add_done_callback(_background_tasks.discard)
+                return cached.value
+        local = entity_store.lookup_path(endpoint, path, self.cache_namespace)
+        if local is not None:
+            return local
+        metrics.incr("cache_misses", endpoint=endpoint)
+        return await self._fetch(path, params, key, endpoint, stale=cached, log_request=log_request)
+
+    async def _refresh(self, path: str, params: Optional[Dict[str, Any]], key: str, endpoint: str) -> None:
+        try:
+            # Background refreshes outlive the tool call that triggered them, so drop its deadline.
+            with deadline(None), priority("background"):
+                await self._fetch(path, params, key, endpoint)
+            metrics.incr("cache_revalidations", endpoint=endpoint)
+        finally:
+            response_cache.end_refresh(key)
+
+    async def _fetch(self, path: str, params: Optional[Dict[str, Any]], key: str, endpoint: str,
+                     stale: Optional[CacheEntry] = None, log_request: bool = False) -> Dict[str, Any]:
+        """
+        Fetch a response from the upstream API and store it in the cache.
+        If the upstream fails and ``stale`` is still inside its stale-if-error window, the stale
+        response is returned instead, marked with ``_stale``.
+
+        The request first waits for a scheduler slot in the current priority class, then for a
+        rate-limit token. All of it is bounded by the remaining deadline of the current tool call
+        and by UPSTREAM_TIMEOUT; running out of either returns a timeout error.
+        """
+        url = f"{self.base_url}/{path}"
+        klass = current_priority()
+        scheduled = False
+        try:
+            left = check_deadline()
+            async with asyncio.timeout(left):
+                await scheduler.acquire(klass)
+                scheduled = True
+                await upstream_limiter.acquire(self.cache_namespace or "default")
+            # What is left after queueing bounds the request itself.
+            left = check_deadline()
+        except (DeadlineExceeded, TimeoutError):
+            if scheduled:
+                scheduler.release(klass)
+            metrics.incr("upstream_timeouts", endpoint=endpoint, phase="queued")
+            if stale is not None and stale.can_serve_on_error():
+                return mark_stale(stale.value, stale, "deadline exceeded")
+            return self._format_timeout(endpoint, "deadline exceeded before the request was sent")
+        except asyncio.CancelledError:
+            if scheduled:
+                scheduler.release(klass)
+            raise
+        budget = UPSTREAM_TIMEOUT if left is None else min(UPSTREAM_TIMEOUT, left)
+        if self.cache_namespace:
+            metrics.incr("tenant_upstream_requests", tenant=self.cache_namespace)
+        self.in_flight += 1
+        try:
+            try:
+                if log_request:
+                    print(f"[API REQUEST] GET {url}" + (f" params={params}" if params else ""))
+                bucket = self.cache_namespace or "default"
+                async with asyncio.timeout(budget):
+                    data = await hedger.run(
+                        endpoint,
+                        lambda: self._stream_json(self._client(), url, params, endpoint, budget),
+                        may_send=lambda: upstream_limiter.try_acquire(bucket),
+                    )
+                response_cache.put(key, data, ttl_for(endpoint))
+                identifier_index.observe(endpoint, data, self.cache_namespace)
+                if not bypassed():
+                    entity_store.observe(endpoint, data, self.cache_namespace)
+                prefetcher.track(key, endpoint)
+                return data
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status == 404:
+                    error = self._format_error(e.response)
+                    response_cache.put_negative(key, error)
+                    metrics.incr("negative_cache_stores", endpoint=endpoint)
+                    return error
+                if (status >= 500 or status == 429) and stale is not None and stale.can_serve_on_error():
+                    metrics.incr("cache_stale_if_error", endpoint=endpoint)
+                    return mark_stale(stale.value, stale, f"upstream HTTP status {status}")
+                return self._format_error(e.response)
+            except (httpx.TimeoutException, TimeoutError, DeadlineExceeded) as e:
+                metrics.incr("upstream_timeouts", endpoint=endpoint, phase="in_flight")
+                if stale is not None and stale.can_serve_on_error():
+                    metrics.incr("cache_stale_if_error", endpoint=endpoint)
+                    return mark_stale(stale.value, stale, f"upstream timed out ({type(e).__name__})")
+                return self._format_timeout(endpoint, f"no response within {budget:g}s")
+            except asyncio.CancelledError:
+                # The tool call was cancelled; leaving the stream context closed the connection.
+                metrics.incr("upstream_cancelled", endpoint=endpoint)
+                raise
+            except Exception as e:
+                if isinstance(e, httpx.TransportError) and stale is not None and stale.can_serve_on_error():
+                    metrics.incr("cache_stale_if_error", endpoint=endpoint)
+                    return mark_stale(stale.value, stale, f"upstream unavailable ({type(e).__name__})")
+                return self._format_error(e)
+        finally:
+            self.in_flight -= 1
+            scheduler.release(klass)
+
+    async def _stream_json(self, client: httpx.AsyncClient, url: str, params: Optional[Dict[str, Any]], endpoint: str,
+                           timeout: float = UPSTREAM_TIMEOUT) -> Any:
+        """
+        GET ``url`` with compression negotiated and decode the body incrementally as it streams in,
+        so only the decompressed body is ever buffered. Records wire and decoded bytes per endpoint.
+        """
+        headers = dict(self.headers, **{"Accept-Encoding": ACCEPT_ENCODING})
+        started = time.perf_counter()
+        async with client.stream("GET", url, headers=headers, params=params, timeout=timeout) as resp:
+            if resp.is_error:
+                await resp.aread()
+                resp.raise_for_status()
+            body = bytearray()
+            async for chunk in resp.aiter_bytes():
+                body += chunk
+            encoding = resp.headers.get("content-encoding", "identity")
+            metrics.incr("upstream_responses", endpoint=endpoint, encoding=encoding)
+            metrics.observe("upstream_bytes_compressed", resp.num_bytes_downloaded, endpoint=endpoint)
+            metrics.observe("upstream_bytes_uncompressed", len(body), endpoint=endpoint)
+            elapsed = time.perf_counter() - started
+            metrics.observe("upstream_time_to_last_byte_ms", elapsed * 1000, endpoint=endpoint)
+            hedger.record(endpoint, elapsed)
+        return json.loads(body)
+
+    async def _get_by_code(self, path: str, code: str, not_found: str, log_request: bool = False) -> Dict[str, Any]:
+        """
+        Look up a single taxonomy item by its GICS code through the list endpoint at ``path``.
+        An empty result is cached negatively with the ``not_found`` message.
+        """
+        params = {"code": code}
+        key = self._cache_key(path, params)
+        endpoint = self._endpoint(path) + "?code"
+        cached = await response_cache.aget(key)
+        if cached is not None and cached.negative:
+            metrics.incr("negative_cache_hits", endpoint=endpoint)
+            return cached.value
+        kind = TAXONOMY_LISTS.get(self._endpoint(path))
+        local = entity_store.lookup(kind, "code", str(code), self.cache_namespace) if kind else None
+        if local is not None:
+            return local
+        data = await self._get(path, params, log_request=log_request)
+        if "error" in data:
+            return data
+        # The API returns a paginated list, so extract the first result
+        results = data.get("results", [])
+        if not results:
+            error = {"error": not_found}
+            response_cache.put_negative(key, error)
+            metrics.incr("negative_cache_stores", endpoint=endpoint)
+            return error
+        return results[0]
+
     async def get_companies(
         self,
         search: Optional[str] = None,
@@ -70,38 +335,13 @@ class RealAPIClient:
             params['search'] = search
         params['page'] = page
         params['page_size'] = page_size
-        url = f"{self.base_url}/companies/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("companies/", params)
 
     async def get_company_detail(self, company_id: int) -> Dict[str, Any]:
         """
         Retrieve detailed information for a single company by its ID.
         """
-        url = f"{self.base_url}/companies/{company_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(url, headers=self.headers)
-                
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"companies/{company_id}/")
 
     async def get_filings(
         self,
@@ -148,39 +388,13 @@ class RealAPIClient:
         if source: params['source'] = source
         if type: params['type'] = type
         params.update({k: v for k, v in extra_filters.items() if v is not None})
-        url = f"{self.base_url}/filings/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("filings/", params)
 
     async def get_filing_detail(self, filing_id: int) -> Dict[str, Any]:
         """
         Retrieve detailed information for a single filing by its ID.
         """
-        url = f"{self.base_url}/filings/{filing_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url}")
-                resp = await client.get(url, headers=self.headers)
-                
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"filings/{filing_id}/", log_request=True)
 
     async def get_filing_types(self, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -189,39 +403,13 @@ class RealAPIClient:
         params = {'page': page, 'page_size': page_size}
         if search:
             params['search'] = search
-        url = f"{self.base_url}/filing-types/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("filing-types/", params)
 
     async def get_filing_type(self, filing_type_id: int) -> Dict[str, Any]:
         """
         Retrieve details for a single filing type by its primary key.
         """
-        url = f"{self.base_url}/filing-types/{filing_type_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url}")
-                resp = await client.get(url, headers=self.headers)
-                
-
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"filing-types/{filing_type_id}/", log_request=True)
 
     async def get_industries(self, industry_group_code: Optional[str] = None, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
         params = {'page': page, 'page_size': page_size}
@@ -229,53 +417,16 @@ class RealAPIClient:
             params['industry_group_code'] = str(industry_group_code)
         if search:
             params['search'] = search
-        url = f"{self.base_url}/industries/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                
-                
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("industries/", params)
 
     async def get_industry(self, industry_id: int) -> Dict[str, Any]:
         """
         Retrieve details for a single GICS Industry by its primary key.
         """
-        url = f"{self.base_url}/industries/{industry_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url}")
-                resp = await client.get(url, headers=self.headers)
-                
-
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"industries/{industry_id}/", log_request=True)
 
     async def get_industry_by_code(self, code: str) -> dict:
-        url = f"{self.base_url}/industries/"
-        params = {"code": code}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=self.headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            results = data.get("results", [])
-            if not results:
-                return {"error": f"Industry with code {code} not found."}
-            return results[0]
+        return await self._get_by_code("industries/", code, f"Industry with code {code} not found.")
 
     async def get_industry_groups(self, sector_code: Optional[str] = None, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -286,49 +437,16 @@ class RealAPIClient:
             params['sector_code'] = sector_code
         if search:
             params['search'] = search
-        url = f"{self.base_url}/industry-groups/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("industry-groups/", params)
 
     async def get_industry_group(self, group_id: int) -> Dict[str, Any]:
         """
         Retrieve details for a single GICS Industry Group by its primary key.
         """
-        url = f"{self.base_url}/industry-groups/{group_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url}")
-                resp = await client.get(url, headers=self.headers)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"industry-groups/{group_id}/", log_request=True)
 
     async def get_industry_group_by_code(self, code: str) -> dict:
-        url = f"{self.base_url}/industry-groups/"
-        params = {"code": code}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=self.headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            results = data.get("results", [])
-            if not results:
-                return {"error": f"Industry group with code {code} not found."}
-            return results[0]
+        return await self._get_by_code("industry-groups/", code, f"Industry group with code {code} not found.")
     
     async def get_sectors(self, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -337,41 +455,13 @@ class RealAPIClient:
         params = {'page': page, 'page_size': page_size}
         if search:
             params['search'] = search
-        url = f"{self.base_url}/sectors/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("sectors/", params)
 
     async def get_sector(self, sector_code: str) -> Dict[str, Any]:
         """
         Retrieve details for a single GICS Sector by its code.
         """
-        url = f"{self.base_url}/sectors/"
-        params = {'code': sector_code}
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url} params={params}")
-                resp = await client.get(url, headers=self.headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                # The API returns a paginated list, so extract the first result
-                results = data.get("results", [])
-                if not results:
-                    return {"error": f"Sector with code {sector_code} not found."}
-                return results[0]
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get_by_code("sectors/", sector_code, f"Sector with code {sector_code} not found.", log_request=True)
 
     async def get_sub_industries(self, industry_code: Optional[str] = None, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
         params = {'page': page, 'page_size': page_size}
@@ -379,104 +469,35 @@ class RealAPIClient:
             params['industry_code'] = str(industry_code)
         if search:
             params['search'] = search
-        url = f"{self.base_url}/sub-industries/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("sub-industries/", params)
 
     async def get_sub_industry(self, sub_industry_id: int) -> Dict[str, Any]:
         """
         Retrieve details for a single GICS Sub-Industry by its primary key.
         """
-        url = f"{self.base_url}/sub-industries/{sub_industry_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url}")
-                resp = await client.get(url, headers=self.headers)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"sub-industries/{sub_industry_id}/", log_request=True)
 
     async def get_sub_industry_by_code(self, code: str) -> dict:
-        url = f"{self.base_url}/sub-industries/"
-        params = {"code": code}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=self.headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            results = data.get("results", [])
-            if not results:
-                return {"error": f"Sub-industry with code {code} not found."}
-            return results[0]
+        return await self._get_by_code("sub-industries/", code, f"Sub-industry with code {code} not found.")
     
     async def get_sources(self, page: int = 1, page_size: int = 100) -> Dict[str, Any]:
         """
         Retrieve a list of all available data sources.
         """
         params = {'page': page, 'page_size': page_size}
-        url = f"{self.base_url}/sources/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get("sources/", params)
 
     async def get_source(self, source_id: int) -> Dict[str, Any]:
         """
         Retrieve details for a single data source by its primary key.
         """
-        url = f"{self.base_url}/sources/{source_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url}")
-                resp = await client.get(url, headers=self.headers)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"sources/{source_id}/", log_request=True)
 
     async def get_processed_filing(self, processed_filing_id: int) -> Dict[str, Any]:
         """
         Retrieve the processed content for a single filing by the ProcessedFiling ID.
         """
-        url = f"{self.base_url}/processed-filings/{processed_filing_id}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"[API REQUEST] GET {url}")
-                resp = await client.get(url, headers=self.headers)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except httpx.HTTPStatusError as e:
-                return self._format_error(e.response)
-            except Exception as e:
-                return self._format_error(e)
+        return await self._get(f"processed-filings/{processed_filing_id}/", log_request=True)
 
     async def get_schema(self, format: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -487,15 +508,4 @@ class RealAPIClient:
             params['format'] = format
         if lang:
             params['lang'] = lang
-        url = f"{self.base_url}/schema/"
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                resp = await client.get(url, headers=self.headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                return data
-            except Exception as e:
-                import logging
-                return {"error": str(e)}
+        return await self._get("schema/", params)
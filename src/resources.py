@@ -0,0 +1,188 @@
+"""
+Read cache for ``financial-reports://`` resources.
+
+MCP clients re-read the same resources (company profiles, filing types, sectors) on every context
+rebuild. Rendered reads are cached per tenant and expanded URI. While a resource is rendered, the
+response cache records which upstream responses it read (see ``src.cache.recording``); the
+rendered result lives as long as the freshest of them does (at most ``RESOURCE_CACHE_TTL``), and
+is dropped as soon as one of those responses is replaced by different data. Results read from
+stale responses, and results rendered after an upstream read failed (or that carry an ``error``
+payload), are not cached.
+
+Every read carries an ``etag`` (a hash of the content) and a ``version`` that increments when the
+content of a URI changes, in the result ``_meta``, so clients can tell whether to rebuild.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from src.cache import recording, response_cache
+from src.metrics import metrics
+from src.tenants import request_api_key, tenant_id
+
+Key = Tuple[Optional[str], str]
+
+
+def content_etag(result: Any) -> str:
+    """
+    Hash of the contents of a resource read result, whichever shape fastmcp returned.
+    """
+    digest = hashlib.sha256()
+    for item in getattr(result, "contents", result):
+        content = getattr(item, "content", item)
+        digest.update(content.encode("utf-8") if isinstance(content, str) else bytes(content))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def has_error(result: Any) -> bool:
+    """
+    True if a resource read result is a JSON object with an ``error`` key.
+    """
+    for item in getattr(result, "contents", result):
+        content = getattr(item, "content", item)
+        if isinstance(content, str) and content.lstrip().startswith("{"):
+            try:
+                value = json.loads(content)
+            except ValueError:
+                continue
+            if isinstance(value, dict) and "error" in value:
+                return True
+    return False
+
+
+def with_meta(result: Any, **meta: Any) -> Any:
+    """
+    Return ``result`` with ``meta`` added to its ``_meta`` (fastmcp versions with result metadata only).
+    """
+    if not hasattr(result, "model_copy") or not hasattr(result, "meta"):
+        return result
+    return result.model_copy(update={"meta": dict(result.meta or {}, **meta)})
+
+
+class ResourceCache:
+    """
+    LRU cache of rendered resource reads with per-entry expiry and dependency invalidation.
+    """
+    def __init__(self, max_entries: int = 1024, max_ttl: float = 300.0, enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[Key, Tuple[Any, str, int, float, Set[str]]]" = OrderedDict()
+        # Response key -> resource reads rendered from it.
+        self._dependents: Dict[str, Set[Key]] = {}
+        # Last etag and version per URI; kept after invalidation, so versions keep increasing.
+        self._versions: "OrderedDict[Key, Tuple[str, int]]" = OrderedDict()
+
+    def get(self, key: Key) -> Optional[Tuple[Any, str, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[3] <= time.time():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0], entry[1], entry[2]
+
+    def version(self, key: Key, etag: str) -> int:
+        """
+        Version of ``key`` for content ``etag``: unchanged content keeps its version.
+        """
+        last = self._versions.get(key)
+        version = last[1] if last is not None and last[0] == etag else (last[1] + 1 if last else 1)
+        self._versions[key] = (etag, version)
+        self._versions.move_to_end(key)
+        while len(self._versions) > 4 * self.max_entries:
+            self._versions.popitem(last=False)
+        return version
+
+    def put(self, key: Key, result: Any, etag: str, version: int, ttl: float, reads: Set[str]) -> None:
+        if not self.enabled or ttl <= 0:
+            return
+        self._drop(key)
+        self._entries[key] = (result, etag, version, time.time() + ttl, reads)
+        for read in reads:
+            self._dependents.setdefault(read, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for read in entry[4]:
+            dependents = self._dependents.get(read)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[read]
+
+    def invalidate(self, response_key: str) -> None:
+        """
+        Drop the reads rendered from the response at ``response_key`` (called when it changed).
+        """
+        for key in list(self._dependents.get(response_key, ())):
+            self._drop(key)
+            metrics.incr("resource_cache_invalidations")
+
+    def ttl_for(self, reads: Dict[str, Optional[float]]) -> float:
+        """
+        Lifetime of a read rendered from ``reads``: until the first of them expires, or 0 (not
+        cached) if one of them failed and left no response behind.
+        """
+        if any(r is None for r in reads.values()):
+            return 0.0
+        return min(list(reads.values()) + [self.max_ttl])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+resource_cache = ResourceCache(
+    max_entries=int(os.getenv("RESOURCE_CACHE_SIZE", "1024")),
+    max_ttl=float(os.getenv("RESOURCE_CACHE_TTL", "300")),
+    enabled=os.getenv("RESOURCE_CACHE", "1").lower() not in ("0", "false", "no"),
+)
+response_cache.on_change(resource_cache.invalidate)
+
+
+try:
+    from fastmcp.server.middleware import Middleware
+except ImportError:  # fastmcp without middleware support
+    Middleware = None
+
+
+if Middleware is not None:
+    class ResourceCacheMiddleware(Middleware):
+        """
+        Serve repeated resource reads from the resource cache and tag every read with its etag.
+        """
+        async def on_read_resource(self, context, call_next):
+            uri = str(context.message.uri)
+            api_key = request_api_key()
+            key = (tenant_id(api_key) if api_key else None, uri)
+            cached = resource_cache.get(key)
+            if cached is not None:
+                metrics.incr("resource_cache_lookups", result="hit")
+                result, etag, version = cached
+                return with_meta(result, etag=etag, version=version, cached=True)
+            metrics.incr("resource_cache_lookups", result="miss")
+            started = time.perf_counter()
+            with recording() as reads:
+                result = await call_next(context)
+            metrics.observe("resource_render_ms", (time.perf_counter() - started) * 1000)
+            if getattr(result, "input_required", None) is not None:
+                return result
+            etag = content_etag(result)
+            version = resource_cache.version(key, etag)
+            ttl = 0.0 if has_error(result) else resource_cache.ttl_for(reads)
+            if ttl <= 0:
+                metrics.incr("resource_cache_skipped")
+            resource_cache.put(key, result, etag, version, ttl, set(reads))
+            return with_meta(result, etag=etag, version=version, cached=False)
+else:
+    ResourceCacheMiddleware = None
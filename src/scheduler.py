@@ -0,0 +1,133 @@
+"""
+Priority scheduling of upstream requests.
+
+Every upstream request takes a slot from one process-wide scheduler before it is sent. Requests
+belong to one of three classes, taken from a context variable so that tasks inherit the class
+of the code that started them:
+
+- ``interactive``: tool calls a user is waiting on (the default)
+- ``bulk``: large jobs started by a tool, such as exports and filing statistics
+- ``background``: work nobody is waiting on, such as cache revalidation and index syncing
+
+Queued interactive requests always start before queued bulk requests, which start before
+background ones. ``INTERACTIVE_RESERVED`` of the ``UPSTREAM_CONCURRENCY`` slots can only be used
+by interactive requests, so a busy bulk job never leaves an interactive call waiting for a slot.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+from src.metrics import metrics
+
+PRIORITIES = ("interactive", "bulk", "background")
+
+_priority: ContextVar[str] = ContextVar("priority", default="interactive")
+
+
+@contextmanager
+def priority(name: str):
+    """
+    Run the block (and tasks started from it) with upstream requests in priority class ``name``.
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority {name!r}; use one of {', '.join(PRIORITIES)}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class PriorityScheduler:
+    """
+    Limits concurrent upstream requests to ``limit`` (0 disables the limit), with ``reserved``
+    slots kept for interactive requests.
+    """
+    def __init__(self, limit: int, reserved: int = 0):
+        self.limit = limit
+        self.reserved = max(0, min(reserved, limit - 1))
+        self.active: Dict[str, int] = {name: 0 for name in PRIORITIES}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {name: deque() for name in PRIORITIES}
+
+    def _has_room(self, name: str) -> bool:
+        capacity = self.limit if name == "interactive" else self.limit - self.reserved
+        return sum(self.active.values()) < capacity
+
+    def _wake(self) -> None:
+        for name in PRIORITIES:
+            waiters = self._waiters[name]
+            while waiters and self._has_room(name):
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self.active[name] += 1
+                    waiter.set_result(None)
+            if waiters:
+                # Lower classes keep waiting while a higher class is queued.
+                return
+
+    async def acquire(self, name: str) -> None:
+        """
+        Wait for a slot for a request in class ``name``.
+        """
+        if self.limit <= 0:
+            return
+        started = time.monotonic()
+        queued_ahead = any(self._waiters[other] for other in PRIORITIES[:PRIORITIES.index(name) + 1])
+        if not queued_ahead and self._has_room(name):
+            self.active[name] += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[name].append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was granted just as the caller was cancelled; hand it on.
+                    self.release(name)
+                elif waiter in self._waiters[name]:
+                    self._waiters[name].remove(waiter)
+                raise
+        metrics.observe("scheduler_queue_wait_ms", (time.monotonic() - started) * 1000, priority=name)
+
+    def release(self, name: str) -> None:
+        if self.limit <= 0:
+            return
+        self.active[name] -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, name: Optional[str] = None):
+        """
+        Hold a slot for the block, in class ``name`` or the current context's class.
+        """
+        name = name or current_priority()
+        await self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Active and queued requests per class.
+        """
+        return {
+            name: {"active": self.active[name], "queued": len(self._waiters[name])}
+            for name in PRIORITIES
+        }
+
+
+# Shared scheduler for the whole process (all tenant clients).
+scheduler = PriorityScheduler(
+    limit=int(os.getenv("UPSTREAM_CONCURRENCY", "16")),
+    reserved=int(os.getenv("INTERACTIVE_RESERVED", "4")),
+)
@@ -0,0 +1,237 @@
+"""
+Production serving mode: transport selection, event loop, HTTP tuning and graceful drain.
+
+``--transport`` (or ``MCP_TRANSPORT``) selects stdio, SSE or streamable HTTP explicitly. HTTP
+transports run under uvicorn with uvloop when it is installed (``MCP_EVENT_LOOP``), a listen
+backlog of ``MCP_BACKLOG`` and keep-alive connections held for ``MCP_KEEP_ALIVE`` seconds, which
+should exceed the idle timeout of any load balancer in front.
+
+On SIGTERM or SIGINT the server stops accepting connections, rejects new tool calls (clients retry
+them on another instance), waits up to ``MCP_GRACEFUL_TIMEOUT`` seconds for the tool calls in
+flight to finish, and then closes the upstream connection pools and the normalization workers.
+Open connections (such as SSE streams) get whatever is left of that budget before they are closed.
+"""
+
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+from typing import Optional
+
+from src.metrics import metrics
+
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+TRANSPORT_ALIASES = {"http": "streamable-http", "streamable_http": "streamable-http"}
+BACKLOG = int(os.getenv("MCP_BACKLOG", "2048"))
+KEEP_ALIVE = float(os.getenv("MCP_KEEP_ALIVE", "75"))
+GRACEFUL_TIMEOUT = float(os.getenv("MCP_GRACEFUL_TIMEOUT", "30"))
+# Pause between the last response and closing connections, so clients read it before the close.
+FLUSH_DELAY = 0.5
+
+
+def transport_name(value: Optional[str]) -> str:
+    """
+    Canonical transport name for ``value`` ("stdio" when unset).
+    """
+    name = (value or "stdio").strip().lower()
+    name = TRANSPORT_ALIASES.get(name, name)
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {value!r}; use one of {', '.join(TRANSPORTS)}")
+    return name
+
+
+def event_loop_name() -> str:
+    """
+    Event loop implementation to use: "uvloop" when requested (``MCP_EVENT_LOOP=uvloop``) or
+    available (``auto``, the default), else "asyncio".
+    """
+    requested = os.getenv("MCP_EVENT_LOOP", "auto").lower()
+    if requested == "asyncio":
+        return "asyncio"
+    if importlib.util.find_spec("uvloop") is not None:
+        return "uvloop"
+    if requested == "uvloop":
+        raise SystemExit("MCP_EVENT_LOOP=uvloop but uvloop is not installed (pip install .[serving])")
+    return "asyncio"
+
+
+class Drain:
+    """
+    Counts tool calls and MCP POST requests in flight and, once draining, turns new tool calls away.
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self.draining = False
+        self._idle: Optional[asyncio.Event] = None
+
+    def begin(self) -> None:
+        self.draining = True
+
+    def enter(self) -> None:
+        self.in_flight += 1
+        if self._idle is not None:
+            self._idle.clear()
+
+    def exit(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0 and self._idle is not None:
+            self._idle.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait until nothing is in flight; False if ``timeout`` ran out first.
+        """
+        if self.in_flight == 0:
+            return True
+        if self._idle is None:
+            self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+drain = Drain()
+
+
+def track_requests(app):
+    """
+    Wrap an ASGI app so each POST counts as in flight until its response is sent. A streamable
+    HTTP tool result is written after the tool call returns, so the drain waits for the POST too.
+    """
+    async def tracked(scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            return await app(scope, receive, send)
+        drain.enter()
+        try:
+            return await app(scope, receive, send)
+        finally:
+            drain.exit()
+
+    return tracked
+
+
+async def close_upstream() -> None:
+    """
+    Close the upstream connection pools of every tenant and stop the normalization workers.
+    """
+    from src.processing import pipeline
+    from src.tenants import tenants
+
+    await tenants.aclose()
+    pipeline.close()
+
+
+try:
+    from fastmcp.exceptions import ToolError
+    from fastmcp.server.middleware import Middleware
+except ImportError:  # fastmcp without middleware support
+    Middleware = None
+
+
+if Middleware is not None:
+    class DrainMiddleware(Middleware):
+        """
+        Track tool calls in flight and reject new ones while the server drains.
+        """
+        async def on_call_tool(self, context, call_next):
+            if drain.draining:
+                metrics.incr("tool_calls_rejected_draining", tool=context.message.name)
+                raise ToolError("The server is shutting down; retry the call")
+            drain.enter()
+            try:
+                return await call_next(context)
+            finally:
+                drain.exit()
+else:
+    DrainMiddleware = None
+
+
+def _server_class():
+    import uvicorn
+
+    class DrainingServer(uvicorn.Server):
+        """
+        uvicorn server that drains tool calls between closing its listeners and its connections,
+        and closes the upstream pools last. (uvicorn re-raises the signal once ``serve`` returns,
+        so nothing after it would run.)
+        """
+        async def shutdown(self, sockets=None):
+            budget = self.config.timeout_graceful_shutdown or GRACEFUL_TIMEOUT
+            started = time.monotonic()
+            drain.begin()
+            for server in getattr(self, "servers", []):
+                server.close()
+            print(f"Draining {drain.in_flight} request(s) in flight", file=sys.stderr)
+            if not await drain.wait(budget):
+                metrics.incr("drain_timeouts")
+                print(f"Drain timed out with {drain.in_flight} request(s) in flight", file=sys.stderr)
+            await asyncio.sleep(FLUSH_DELAY)
+            # uvicorn then waits for open connections (SSE streams) with its own graceful timeout;
+            # give it only what is left of the budget, so the whole shutdown stays within it.
+            configured = self.config.timeout_graceful_shutdown
+            self.config.timeout_graceful_shutdown = max(0.0, budget - (time.monotonic() - started))
+            try:
+                await super().shutdown(sockets)
+            finally:
+                self.config.timeout_graceful_shutdown = configured
+            await close_upstream()
+
+    return DrainingServer
+
+
+def _run(main) -> None:
+    """
+    Run the coroutine ``main`` on the selected event loop.
+    """
+    if event_loop_name() == "uvloop":
+        import uvloop
+        if hasattr(uvloop, "run"):
+            uvloop.run(main)
+            return
+        uvloop.install()
+    asyncio.run(main)
+
+
+def serve_uvicorn(config) -> None:
+    """
+    Run a uvicorn server for ``config`` (with ``loop="none"``) until SIGTERM/SIGINT, then drain
+    tool calls and close upstream pools.
+    """
+    _run(_server_class()(config).serve())
+
+
+def serve_http(mcp, host: str, port: int, transport: str) -> None:
+    """
+    Serve ``mcp`` over an HTTP transport with the production settings.
+    """
+    import uvicorn
+
+    config = uvicorn.Config(
+        track_requests(mcp.http_app(transport=transport)),
+        host=host,
+        port=port,
+        loop="none",  # serve_uvicorn sets up the loop
+        lifespan="on",
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEP_ALIVE,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        log_level=os.getenv("MCP_LOG_LEVEL", "info").lower(),
+    )
+    print(f"Serving {transport} on {host}:{port} ({event_loop_name()} event loop)", file=sys.stderr)
+    serve_uvicorn(config)
+
+
+def serve_stdio(mcp) -> None:
+    """
+    Serve ``mcp`` over stdio, closing upstream pools when the client disconnects.
+    """
+    async def main() -> None:
+        try:
+            await mcp.run_async(transport="stdio")
+        finally:
+            await close_upstream()
+
+    _run(main())
@@ -0,0 +1,325 @@
+"""
+Local TF-IDF similarity search over processed filings.
+
+Each indexed filing is one row of a sparse (CSR) matrix of sublinear term frequencies. Rows are
+added incrementally: new documents are buffered and stacked onto the matrix on the next query
+(in a worker thread), the vocabulary only grows, and IDF weights and row norms are recomputed
+from the matrix when documents have been added. A query is one sparse matrix-vector product over the candidate rows,
+so scoring thousands of filings takes milliseconds. Everything runs locally; no model service
+is involved.
+
+``find_similar_filings`` indexes the seed filing and up to ``SIMILARITY_MAX_CANDIDATES`` filings
+matching the filters on demand (content is fetched at bulk priority, normalized through the
+memoized pipeline and tokenized in its process pool), then ranks every indexed filing that matches the filters.
+Indexes are kept per tenant and started afresh when a query would not fit in
+``SIMILARITY_MAX_DOCUMENTS``. Requires numpy and scipy (``pip install .[similarity]``).
+"""
+
+import asyncio
+import importlib.util
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.metrics import metrics
+from src.pagination import fetch_filings
+from src.processing import content_field, pipeline
+from src.scheduler import priority
+from src.snapshot_api.snapshot_client import _code, company_country, processed_filing_ref
+
+MAX_DOCUMENTS = int(os.getenv("SIMILARITY_MAX_DOCUMENTS", "20000"))
+MAX_CANDIDATES = int(os.getenv("SIMILARITY_MAX_CANDIDATES", "200"))
+CONCURRENCY = int(os.getenv("SIMILARITY_CONCURRENCY", "4"))
+# Terms kept per document, by frequency; the long tail adds little but memory.
+MAX_TERMS = 4000
+# GICS code length -> company filter of that taxonomy level.
+GICS_LEVELS = {2: "sector", 4: "industry_group", 6: "industry", 8: "sub_industry"}
+# Companies in a GICS group up to which filings are queried per company instead of filtered.
+PER_COMPANY_QUERIES = 25
+
+_TOKEN_RE = re.compile(r"[^\W\d_]{3,}")
+STOPWORDS = frozenset("""
+    the and for are was were with that this from have has had not but all any can its our their
+    which will would been being into than then there these those such other also may per under
+    over more most only each between within during about after before while where when who whom
+    der die das und mit von für ist sind wird wurde werden auf den dem des ein eine einer eines
+    als auch bei nach aus zum zur oder nicht sich wie über unter durch
+""".split())
+
+
+def available() -> bool:
+    return all(importlib.util.find_spec(name) is not None for name in ("numpy", "scipy"))
+
+
+def _company_id(filing: Dict[str, Any]) -> Any:
+    company = filing.get("company")
+    return company.get("id") if isinstance(company, dict) else company
+
+
+def document_terms(text: str) -> Dict[str, int]:
+    """
+    Term counts of normalized (markup-free) text, lowercased, stopwords dropped.
+    """
+    counts = Counter(t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS)
+    return dict(counts.most_common(MAX_TERMS))
+
+
+class SimilarityIndex:
+    """
+    Incrementally built TF-IDF index of filings with cosine-similarity search.
+    """
+    def __init__(self, max_documents: int = MAX_DOCUMENTS):
+        import numpy as np
+        from scipy import sparse
+
+        self.np = np
+        self.sparse = sparse
+        self.max_documents = max_documents
+        self.vocabulary: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.rows: Dict[int, int] = {}
+        self.meta: List[Dict[str, Any]] = []
+        self._matrix = sparse.csr_matrix((0, 0))
+        self._pending: List[Dict[int, float]] = []
+        self._idf = np.empty(0)
+        self._norms = np.empty(0)
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def __contains__(self, filing_id: int) -> bool:
+        return filing_id in self.rows
+
+    @property
+    def full(self) -> bool:
+        return len(self.meta) >= self.max_documents
+
+    def add(self, filing: Dict[str, Any], counts: Dict[str, int]) -> bool:
+        """
+        Add one filing with its term counts; returns False if it is indexed already or the index is full.
+        """
+        if filing["id"] in self.rows or self.full or not counts:
+            return False
+        row: Dict[int, float] = {}
+        for term, count in counts.items():
+            column = self.vocabulary.get(term)
+            if column is None:
+                column = self.vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+            row[column] = 1.0 + math.log(count)
+        self.rows[filing["id"]] = len(self.meta)
+        company = filing.get("company") if isinstance(filing.get("company"), dict) else {}
+        self.meta.append({
+            "filing_id": filing["id"],
+            "title": filing.get("title"),
+            "company_id": _company_id(filing),
+            "company_name": company.get("name"),
+            "country": company_country(company),
+            "type": _code(filing.get("filing_type") or filing.get("type")),
+            "language": _code(filing.get("language")),
+            "release_datetime": filing.get("release_datetime"),
+        })
+        self._pending.append(row)
+        return True
+
+    def _flush(self, pending: List[Dict[int, float]], width: int) -> None:
+        """
+        Stack ``pending`` rows onto the matrix, widened to ``width`` terms, and refresh IDF weights
+        and row norms.
+        """
+        np, sparse = self.np, self.sparse
+        if not pending and self._matrix.shape[1] == width:
+            return
+        indptr = np.cumsum([0] + [len(r) for r in pending])
+        indices = np.fromiter((c for r in pending for c in r), np.int64, indptr[-1])
+        data = np.fromiter((v for r in pending for v in r.values()), np.float64, indptr[-1])
+        added = sparse.csr_matrix((data, indices, indptr), shape=(len(pending), width))
+        current = self._matrix
+        current.resize((current.shape[0], width))
+        matrix = sparse.vstack([current, added], format="csr")
+        df = np.bincount(matrix.indices, minlength=width)
+        self._idf = np.log((1 + matrix.shape[0]) / (1 + df)) + 1.0
+        self._norms = np.sqrt(matrix.multiply(matrix) @ (self._idf ** 2))
+        self._matrix = matrix
+
+    def select(self, company_ids: Optional[Set[int]] = None, types: Optional[Set[str]] = None,
+               countries: Optional[Set[str]] = None, languages: Optional[Set[str]] = None):
+        """
+        Row indices of indexed filings matching every given filter. Rows added since the last
+        flush are included; ``similar`` skips those not in the matrix yet.
+        """
+        np = self.np
+        mask = np.ones(len(self.meta), dtype=bool)
+        for field, wanted in (("company_id", company_ids), ("type", types), ("country", countries),
+                              ("language", languages)):
+            if wanted is not None:
+                mask &= np.fromiter((m[field] in wanted for m in self.meta), bool, len(self.meta))
+        return np.flatnonzero(mask)
+
+    def similar(self, filing_id: int, rows, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        The ``k`` filings among ``rows`` most similar to the indexed filing ``filing_id``,
+        as of the last flush.
+        """
+        np = self.np
+        # Rows and terms added on the event loop meanwhile are not in this flushed matrix.
+        matrix, idf, norms = self._matrix, self._idf, self._norms
+        seed = self.rows[filing_id]
+        query = matrix.getrow(seed)
+        weights = np.zeros(matrix.shape[1])
+        weights[query.indices] = query.data * idf[query.indices] ** 2
+        rows = rows[(rows != seed) & (rows < matrix.shape[0])]
+        if not len(rows):
+            return []
+        denominator = norms[rows] * norms[seed]
+        scores = (matrix[rows] @ weights) / np.where(denominator > 0, denominator, 1.0)
+        top = np.argsort(-scores)[:k] if len(rows) <= k else np.argpartition(-scores, k)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for position in top:
+            row = rows[position]
+            document = matrix.getrow(row)
+            shared = np.intersect1d(document.indices, query.indices)
+            contribution = weights[shared] * document.toarray()[0, shared]
+            results.append(dict(
+                self.meta[row],
+                score=round(float(scores[position]), 4),
+                shared_terms=[self.terms[t] for t in shared[np.argsort(-contribution)[:8]]],
+            ))
+        return results
+
+    async def search(self, filing_id: int, rows, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Flush added filings and run ``similar``, both in a thread: rebuilding the matrix of a large
+        index takes long enough to stall the event loop. Rows keep being added meanwhile.
+        """
+        async with self._lock:
+            pending, self._pending = self._pending, []
+            await asyncio.to_thread(self._flush, pending, len(self.terms))
+            return await asyncio.to_thread(self.similar, filing_id, rows, k)
+
+
+# One index per tenant namespace, since filings may differ between tenants.
+_indexes: Dict[Optional[str], SimilarityIndex] = {}
+
+
+def similarity_index(namespace: Optional[str] = None, room: int = 0) -> SimilarityIndex:
+    """
+    The tenant's index, replaced by an empty one when fewer than ``room`` more filings fit, so a
+    long-running server keeps indexing new filings. Queries already running finish on the old index.
+    """
+    index = _indexes.get(namespace)
+    if index is None or len(index) + room > index.max_documents:
+        if index is not None:
+            metrics.incr("similarity_index_resets")
+        index = _indexes[namespace] = SimilarityIndex()
+    return index
+
+
+async def _company_ids(api_client, gics_code: str, max_pages: int = 10) -> Set[int]:
+    """
+    IDs of the companies classified under a GICS sector, industry group, industry or sub-industry code.
+    """
+    level = GICS_LEVELS.get(len(gics_code))
+    if level is None:
+        raise ValueError(f"Invalid GICS code {gics_code!r}; use a 2, 4, 6 or 8 digit code")
+    ids: Set[int] = set()
+    for page in range(1, max_pages + 1):
+        result = await api_client.get_companies(page=page, page_size=100, **{level: gics_code})
+        if "error" in result:
+            raise ValueError(result["error"])
+        ids.update(c["id"] for c in result.get("results", []))
+        if not result.get("next"):
+            break
+    return ids
+
+
+async def _index_filings(api_client, index: SimilarityIndex, filings: Iterable[Dict[str, Any]]) -> int:
+    """
+    Fetch, tokenize and index the processed content of ``filings`` not indexed yet.
+    """
+    semaphore = asyncio.Semaphore(max(1, CONCURRENCY))
+
+    async def index_one(filing: Dict[str, Any]) -> bool:
+        ref = processed_filing_ref(filing)
+        if ref is None:
+            return False
+        async with semaphore:
+            processed = await api_client.get_processed_filing(ref)
+        field = content_field(processed) if "error" not in processed else None
+        if field is None:
+            return False
+        normalized = await pipeline.normalize(processed[field])
+        return index.add(filing, await pipeline.apply(document_terms, normalized["text"]))
+
+    todo = {f["id"]: f for f in filings if f.get("id") is not None and f["id"] not in index}
+    with priority("bulk"):
+        added = sum(await asyncio.gather(*(index_one(f) for f in todo.values())))
+    metrics.incr("similarity_documents_indexed", added)
+    return added
+
+
+async def find_similar_filings(
+    api_client,
+    filing_id: int,
+    company: Optional[int] = None,
+    gics_code: Optional[str] = None,
+    type: Optional[str] = None,
+    countries: Optional[List[str]] = None,
+    language: Optional[str] = None,
+    k: int = 10,
+) -> Dict[str, Any]:
+    """
+    Rank filings matching the filters by TF-IDF cosine similarity to filing ``filing_id``.
+    """
+    if not available():
+        return {"error": "Similar-filing search requires numpy and scipy (pip install numpy scipy)"}
+    # Room for the seed and every candidate of this query.
+    index = similarity_index(getattr(api_client, "cache_namespace", None), room=MAX_CANDIDATES + 1)
+    seed = await api_client.get_filing_detail(filing_id)
+    if "error" in seed:
+        return seed
+    await _index_filings(api_client, index, [seed])
+    if filing_id not in index:
+        if index.full:
+            return {"error": f"Error: the similarity index is full ({index.max_documents} filings); "
+                             "raise SIMILARITY_MAX_DOCUMENTS"}
+        return {"error": f"Filing {filing_id} has no processed content to compare"}
+
+    countries = [c.strip().upper() for c in countries] if countries else None
+    company_ids = {company} if company else None
+    try:
+        if gics_code:
+            in_group = await _company_ids(api_client, gics_code)
+            company_ids = in_group if company_ids is None else company_ids & in_group
+    except ValueError as e:
+        return {"error": f"Error: {e}"}
+    filters = dict(type=type, countries=countries, language=language)
+    if company_ids is not None and len(company_ids) <= PER_COMPANY_QUERIES:
+        per_company = max(1, MAX_CANDIDATES // max(1, len(company_ids)))
+        pages = await asyncio.gather(*(fetch_filings(api_client, per_company, company=c, **filters) for c in company_ids))
+    else:
+        pages = [await fetch_filings(api_client, MAX_CANDIDATES, **filters)]
+    candidates = [f for p in pages if "error" not in p for f in p["results"]
+                  if company_ids is None or _company_id(f) in company_ids]
+    await _index_filings(api_client, index, candidates[:MAX_CANDIDATES])
+
+    rows = index.select(
+        company_ids=company_ids,
+        types={type} if type else None,
+        countries=set(countries) if countries else None,
+        languages={language} if language else None,
+    )
+    started = time.perf_counter()
+    results = await index.search(filing_id, rows, k=max(1, k))
+    metrics.observe("similarity_query_ms", (time.perf_counter() - started) * 1000)
+    return {
+        "filing": index.meta[index.rows[filing_id]],
+        "indexed": len(index),
+        "compared": int(len(rows[rows != index.rows[filing_id]])),
+        "results": results,
+    }
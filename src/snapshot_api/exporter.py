@@ -0,0 +1,138 @@
+"""
+Snapshot exporter for the Financial Reports API.
+Dumps the taxonomy, sources, filing types, selected companies, their filings and
+processed filings into a compact local dataset that SnapshotAPIClient can serve.
+
+Usage:
+    python -m src.snapshot_api.exporter --output snapshot.json.gz --company 14 --search "Deutsche Bank"
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from src.real_api.real_client import RealAPIClient
+from src.snapshot_api.snapshot_client import SNAPSHOT_VERSION, processed_filing_ref
+
+
+class SnapshotExportError(RuntimeError):
+    """Raised when the upstream API returns an error while exporting a snapshot."""
+
+
+def _check(result: Dict[str, Any], what: str) -> Dict[str, Any]:
+    if "error" in result:
+        raise SnapshotExportError(f"{what}: {result['error']}")
+    return result
+
+
+async def _collect(fetch, what: str, limit: Optional[int] = None, **params) -> List[Dict[str, Any]]:
+    """
+    Page through a list endpoint until it is exhausted or ``limit`` items were collected.
+    """
+    items: List[Dict[str, Any]] = []
+    page = 1
+    while limit is None or len(items) < limit:
+        result = _check(await fetch(page=page, page_size=100, **params), what)
+        items.extend(result.get("results", []))
+        if not result.get("next"):
+            break
+        page += 1
+    return items if limit is None else items[:limit]
+
+
+async def export_snapshot(
+    client: RealAPIClient,
+    output: str,
+    company_ids: Iterable[int] = (),
+    searches: Iterable[str] = (),
+    countries: Optional[List[str]] = None,
+    max_companies_per_search: int = 10,
+    filings_per_company: int = 100,
+    include_processed: bool = True,
+) -> Dict[str, int]:
+    """
+    Export a snapshot dataset to ``output`` and return the number of items per collection.
+
+    Companies are selected by ID and/or by search terms; their filings (newest first, up to
+    ``filings_per_company``) and the processed filings they reference are exported with them.
+    """
+    data: Dict[str, Any] = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": client.base_url,
+    }
+    data["sectors"] = await _collect(client.get_sectors, "sectors")
+    data["industry_groups"] = await _collect(client.get_industry_groups, "industry groups")
+    data["industries"] = await _collect(client.get_industries, "industries")
+    data["sub_industries"] = await _collect(client.get_sub_industries, "sub-industries")
+    data["sources"] = await _collect(client.get_sources, "sources")
+    data["filing_types"] = await _collect(client.get_filing_types, "filing types")
+
+    selected = {int(cid) for cid in company_ids}
+    for term in searches:
+        matches = await _collect(client.get_companies, f"companies matching {term!r}",
+                                 limit=max_companies_per_search, search=term, countries=countries)
+        selected.update(int(c["id"]) for c in matches)
+
+    companies, filings, processed = [], {}, {}
+    for company_id in sorted(selected):
+        companies.append(_check(await client.get_company_detail(company_id), f"company {company_id}"))
+        for filing in await _collect(client.get_filings, f"filings of company {company_id}",
+                                     limit=filings_per_company, company=company_id,
+                                     ordering="-release_datetime"):
+            filings[filing["id"]] = filing
+            ref = processed_filing_ref(filing)
+            if include_processed and ref is not None and ref not in processed:
+                processed[ref] = _check(await client.get_processed_filing(ref), f"processed filing {ref}")
+    data["companies"] = companies
+    data["filings"] = [filings[k] for k in sorted(filings)]
+    data["processed_filings"] = [processed[k] for k in sorted(processed)]
+
+    schema = await client.get_schema(format="json")
+    data["schema"] = {} if "error" in schema else schema
+
+    tmp_path = f"{output}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+        json.dump(data, fh, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, output)
+    return {key: len(value) for key, value in data.items() if isinstance(value, list)}
+
+
+def main():
+    """
+    Command-line entry point for exporting a snapshot dataset.
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export a Financial Reports API snapshot dataset")
+    parser.add_argument("--output", default=os.getenv("SNAPSHOT_PATH", "snapshot.json.gz"),
+                        help="Path of the dataset to write (default: snapshot.json.gz or SNAPSHOT_PATH env var)")
+    parser.add_argument("--company", type=int, action="append", default=[], help="Company ID to include (repeatable)")
+    parser.add_argument("--search", action="append", default=[], help="Company search term to include (repeatable)")
+    parser.add_argument("--countries", help="Comma-separated country codes restricting --search")
+    parser.add_argument("--max-companies-per-search", type=int, default=10)
+    parser.add_argument("--filings-per-company", type=int, default=100)
+    parser.add_argument("--no-processed", action="store_true", help="Skip processed filing content")
+    args = parser.parse_args()
+
+    client = RealAPIClient(os.getenv("API_KEY"), os.getenv("API_BASE_URL", "https://api.financialreports.eu/"))
+    counts = asyncio.run(export_snapshot(
+        client,
+        args.output,
+        company_ids=args.company,
+        searches=args.search,
+        countries=args.countries.split(",") if args.countries else None,
+        max_companies_per_search=args.max_companies_per_search,
+        filings_per_company=args.filings_per_company,
+        include_processed=not args.no_processed,
+    ))
+    print(f"Wrote snapshot to {args.output}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
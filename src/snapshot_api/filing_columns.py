@@ -0,0 +1,170 @@
+"""
+Columnar, NumPy-backed view of the snapshot's filings for vectorized filtering and ordering.
+
+Datetimes are stored as int64 microseconds since the epoch, filing type, country and language
+as dictionary-encoded int32 codes, and company and source IDs as int64 arrays. Rows keep the
+API's default order (newest release first), so default-ordered pages are plain slices; other
+orderings select the top rows with a partial sort.
+
+NumPy is optional: without it ``FilingColumns.available()`` is False and SnapshotAPIClient falls
+back to its per-filing indexes.
+"""
+
+import importlib.util
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DATETIME_FIELDS = ("release_datetime", "dissemination_datetime", "added_to_platform")
+# Sorts before every real datetime, like the empty string did in the string comparisons.
+MISSING = -(2 ** 63)
+
+
+def to_micros(value: Optional[str]) -> int:
+    """
+    Parse an ISO 8601 date or datetime into microseconds since the epoch (naive values are UTC).
+    """
+    if not value:
+        return MISSING
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    delta = parsed - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class FilingColumns:
+    """
+    Column arrays for a list of filings, with vectorized ``select`` and ``page``.
+    """
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("numpy") is not None
+
+    def __init__(
+        self,
+        filings: List[Dict[str, Any]],
+        company_id: Callable[[Dict[str, Any]], Optional[int]],
+        type_code: Callable[[Dict[str, Any]], Optional[str]],
+        country: Callable[[Dict[str, Any]], Optional[str]],
+        language: Callable[[Dict[str, Any]], Optional[str]],
+        source_id: Callable[[Dict[str, Any]], Optional[int]],
+    ):
+        import numpy as np
+
+        self.np = np
+        self.filings = filings
+        n = len(filings)
+        self.ids = np.fromiter((f["id"] for f in filings), np.int64, n)
+        self.company = np.fromiter((self._id_or_missing(company_id(f)) for f in filings), np.int64, n)
+        self.source = np.fromiter((self._id_or_missing(source_id(f)) for f in filings), np.int64, n)
+        self.type, self.type_codes = self._encode(type_code(f) for f in filings)
+        self.country, self.country_codes = self._encode(country(f) for f in filings)
+        self.language, self.language_codes = self._encode(language(f) for f in filings)
+        self.datetimes = {
+            field: np.fromiter((self._micros_or_missing(f.get(field)) for f in filings), np.int64, n)
+            for field in DATETIME_FIELDS
+        }
+
+    @staticmethod
+    def _id_or_missing(value: Optional[int]) -> int:
+        return MISSING if value is None else value
+
+    @staticmethod
+    def _micros_or_missing(value: Optional[str]) -> int:
+        try:
+            return to_micros(value)
+        except ValueError:
+            return MISSING
+
+    def _encode(self, values: Iterable[Optional[str]]) -> Tuple[Any, Dict[str, int]]:
+        """
+        Dictionary-encode string values; code 0 stands for a missing value.
+        """
+        codes: Dict[str, int] = {}
+        encoded = [0 if v is None else codes.setdefault(v, len(codes) + 1) for v in values]
+        return self.np.asarray(encoded, dtype=self.np.int32), codes
+
+    def _in(self, column, codes: Dict[str, int], wanted: Iterable[str]):
+        known = [codes[v] for v in wanted if v in codes]
+        return self.np.isin(column, known)
+
+    def select(
+        self,
+        company_ids: Optional[Sequence[int]] = None,
+        types: Optional[Sequence[str]] = None,
+        countries: Optional[Sequence[str]] = None,
+        languages: Optional[Sequence[str]] = None,
+        source: Optional[int] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+    ):
+        """
+        Return the row indices (in default order) matching every given filter.
+        Raises ValueError for a range bound that is not an ISO 8601 date or datetime.
+        """
+        np = self.np
+        mask = np.ones(len(self.ids), dtype=bool)
+        if company_ids:
+            mask &= np.isin(self.company, np.asarray(list(company_ids), dtype=np.int64))
+        if types:
+            mask &= self._in(self.type, self.type_codes, types)
+        if countries:
+            mask &= self._in(self.country, self.country_codes, countries)
+        if languages:
+            mask &= self._in(self.language, self.language_codes, languages)
+        if source:
+            mask &= self.source == int(source)
+        for field, (low, high) in (ranges or {}).items():
+            column = self.datetimes[field]
+            if low:
+                mask &= column >= to_micros(low)
+            if high:
+                mask &= column <= to_micros(high)
+        return np.flatnonzero(mask)
+
+    def where(self, rows, predicate: Callable[[Dict[str, Any]], bool]):
+        """
+        Narrow ``rows`` with a per-filing predicate, for filters that cannot be vectorized.
+        """
+        keep = self.np.fromiter((predicate(self.filings[i]) for i in rows), bool, len(rows))
+        return rows[keep]
+
+    def page(self, rows, ordering: Optional[str], start: int, size: int):
+        """
+        Return the row indices of ``rows[start:start + size]`` after sorting by ``ordering``
+        (a field name, "-" prefix for descending; None keeps the default order). Ties break on
+        the filing ID in the same direction. Only the rows up to the page end are fully sorted.
+        """
+        np = self.np
+        if not ordering:
+            return rows[start:start + size]
+        field = ordering.lstrip("-")
+        keys = (self.ids if field == "id" else self.datetimes[field])[rows]
+        ids = self.ids[rows]
+        if ordering.startswith("-"):
+            # Bitwise NOT reverses int64 order without overflowing on MISSING.
+            keys, ids = ~keys, ~ids
+        end = start + size
+        candidates = np.arange(len(rows))
+        if end < len(rows):
+            boundary = np.partition(keys, end - 1)[end - 1]
+            candidates = np.flatnonzero(keys <= boundary)
+        order = candidates[np.lexsort((ids[candidates], keys[candidates]))]
+        return rows[order[start:end]]
+
+
+class FilingRows:
+    """
+    Sequence view of selected rows; slicing materializes only the requested page of filings.
+    """
+    def __init__(self, columns: FilingColumns, rows, ordering: Optional[str] = None):
+        self.columns = columns
+        self.rows = rows
+        self.ordering = ordering
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, item: slice) -> List[Dict[str, Any]]:
+        start, stop, _ = item.indices(len(self.rows))
+        selected = self.columns.page(self.rows, self.ordering, start, max(0, stop - start))
+        return [self.columns.filings[i] for i in selected]
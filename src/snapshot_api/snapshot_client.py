@@ -0,0 +1,510 @@
+import gzip
+import json
+import os
+from typing import Optional, Any, Dict, List, Union
+from urllib.parse import urlencode
+
+import httpx
+
+from src.real_api.real_client import RealAPIClient
+from src.snapshot_api.filing_columns import FilingColumns, FilingRows
+
+SNAPSHOT_VERSION = 1
+
+# Collections stored in a snapshot dataset, in export order.
+SNAPSHOT_COLLECTIONS = (
+    "sectors",
+    "industry_groups",
+    "industries",
+    "sub_industries",
+    "sources",
+    "filing_types",
+    "companies",
+    "filings",
+    "processed_filings",
+)
+
+# Orderings accepted by /filings/ (with or without a leading "-").
+FILING_ORDER_FIELDS = ("release_datetime", "dissemination_datetime", "added_to_platform", "id")
+DEFAULT_FILING_ORDERING = "-release_datetime"
+
+
+def _code(value: Any) -> Optional[str]:
+    """
+    Return the code of a nested object (``{"code": ...}``) or a scalar code, as a string.
+    """
+    if isinstance(value, dict):
+        value = value.get("code")
+    return None if value is None else str(value)
+
+
+def _ref_id(value: Any) -> Optional[int]:
+    """
+    Return the ID of a nested object (``{"id": ...}``) or a scalar ID.
+    """
+    if isinstance(value, dict):
+        value = value.get("id")
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _csv(value: Optional[Union[str, list]]) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def company_country(company: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the ISO country code of a company, whichever field the API used for it.
+    """
+    country = company.get("country_code") or company.get("country")
+    if isinstance(country, dict):
+        country = country.get("code") or country.get("iso")
+    return country.upper() if isinstance(country, str) else None
+
+
+def processed_filing_ref(filing: Dict[str, Any]) -> Optional[int]:
+    """
+    Return the ProcessedFiling ID referenced by a filing, if any.
+    """
+    for key in ("processed_filing_id", "processed_filing"):
+        ref = _ref_id(filing.get(key))
+        if ref is not None:
+            return ref
+    return None
+
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    """
+    Read a snapshot dataset (gzip-compressed JSON, or plain JSON) from disk.
+    """
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    data = json.loads(raw)
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {data.get('version')!r} in {path}")
+    return data
+
+
+class SnapshotAPIClient:
+    """
+    Offline client that answers every RealAPIClient endpoint from a local snapshot dataset.
+    All lookups are served from in-memory indexes built once when the snapshot is loaded.
+    """
+    _loaded: Dict[str, "SnapshotAPIClient"] = {}
+
+    def __init__(self, data: Dict[str, Any], base_url: str = "snapshot://local"):
+        self.base_url = base_url.rstrip("/")
+        self.created_at = data.get("created_at")
+        self.schema = data.get("schema") or {}
+        self._build_indexes(data)
+
+    @classmethod
+    def load(cls, path: str) -> "SnapshotAPIClient":
+        """
+        Return the client for a snapshot file, loading and indexing it only once per process.
+        """
+        key = os.path.abspath(path)
+        client = cls._loaded.get(key)
+        if client is None:
+            client = cls(load_snapshot(key))
+            cls._loaded[key] = client
+        return client
+
+    def _build_indexes(self, data: Dict[str, Any]) -> None:
+        def by_id(items):
+            return {int(item["id"]): item for item in items if item.get("id") is not None}
+
+        def by_code(items):
+            return {str(item["code"]): item for item in items if item.get("code") is not None}
+
+        def sorted_by_id(items):
+            return sorted(items, key=lambda item: item.get("id") or 0)
+
+        self.sectors = sorted_by_id(data.get("sectors", []))
+        self.industry_groups = sorted_by_id(data.get("industry_groups", []))
+        self.industries = sorted_by_id(data.get("industries", []))
+        self.sub_industries = sorted_by_id(data.get("sub_industries", []))
+        self.sources = sorted_by_id(data.get("sources", []))
+        self.filing_types = sorted_by_id(data.get("filing_types", []))
+        self.companies = sorted_by_id(data.get("companies", []))
+        self.processed_filings = by_id(data.get("processed_filings", []))
+
+        self.sectors_by_code = by_code(self.sectors)
+        self.industry_groups_by_id = by_id(self.industry_groups)
+        self.industry_groups_by_code = by_code(self.industry_groups)
+        self.industries_by_id = by_id(self.industries)
+        self.industries_by_code = by_code(self.industries)
+        self.sub_industries_by_id = by_id(self.sub_industries)
+        self.sub_industries_by_code = by_code(self.sub_industries)
+        self.sources_by_id = by_id(self.sources)
+        self.filing_types_by_id = by_id(self.filing_types)
+        self.companies_by_id = by_id(self.companies)
+
+        self.company_ids_by_isin: Dict[str, int] = {}
+        self.company_ids_by_lei: Dict[str, int] = {}
+        for company in self.companies:
+            if company.get("isin"):
+                self.company_ids_by_isin[company["isin"].upper()] = company["id"]
+            if company.get("lei"):
+                self.company_ids_by_lei[company["lei"].upper()] = company["id"]
+
+        # Filings are kept in the API's default order; every filter narrows this list
+        # through the secondary indexes below, which preserve that order.
+        filings = list(by_id(data.get("filings", [])).values())
+        filings.sort(key=lambda f: (f.get("release_datetime") or "", f["id"]), reverse=True)
+        self.filings = filings
+        self.filings_by_id = {f["id"]: f for f in filings}
+        self.filings_by_company: Dict[int, List[Dict[str, Any]]] = {}
+        self.filings_by_type: Dict[str, List[Dict[str, Any]]] = {}
+        self.filings_by_country: Dict[str, List[Dict[str, Any]]] = {}
+        self.filings_by_language: Dict[str, List[Dict[str, Any]]] = {}
+        for filing in filings:
+            company_id = _ref_id(filing.get("company"))
+            if company_id is not None:
+                self.filings_by_company.setdefault(company_id, []).append(filing)
+            type_code = _code(filing.get("filing_type") or filing.get("type"))
+            if type_code:
+                self.filings_by_type.setdefault(type_code, []).append(filing)
+            country = self._filing_country(filing)
+            if country:
+                self.filings_by_country.setdefault(country, []).append(filing)
+            language = _code(filing.get("language"))
+            if language:
+                self.filings_by_language.setdefault(language, []).append(filing)
+
+        # Vectorized filtering and ordering when NumPy is installed; the indexes above remain the fallback.
+        self.filing_columns: Optional[FilingColumns] = None
+        if filings and FilingColumns.available():
+            self.filing_columns = FilingColumns(
+                filings,
+                company_id=lambda f: _ref_id(f.get("company")),
+                type_code=lambda f: _code(f.get("filing_type") or f.get("type")),
+                country=self._filing_country,
+                language=lambda f: _code(f.get("language")),
+                source_id=lambda f: _ref_id(f.get("source")),
+            )
+
+    def _filing_country(self, filing: Dict[str, Any]) -> Optional[str]:
+        company = filing.get("company")
+        if not isinstance(company, dict) or not company_country(company):
+            company = self.companies_by_id.get(_ref_id(company), {})
+        return company_country(company)
+
+    @staticmethod
+    def _not_found() -> dict:
+        return RealAPIClient._format_error(httpx.Response(404))
+
+    def _paginate(self, path: str, items: List[Any], page: int, page_size: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Slice ``items`` into one page using the API's DRF-style pagination envelope.
+        """
+        page_size = max(1, min(int(page_size), 100))
+        page = int(page)
+        count = len(items)
+        if page < 1 or (page > 1 and (page - 1) * page_size >= count):
+            return self._not_found()
+
+        def page_url(number):
+            query = {k: v for k, v in params.items() if v is not None}
+            query.update(page=number, page_size=page_size)
+            return f"{self.base_url}/{path}/?{urlencode(sorted(query.items()))}"
+
+        start = (page - 1) * page_size
+        return {
+            "count": count,
+            "next": page_url(page + 1) if start + page_size < count else None,
+            "previous": page_url(page - 1) if page > 1 else None,
+            "results": items[start:start + page_size],
+        }
+
+    @staticmethod
+    def _search(items: List[Dict[str, Any]], search: Optional[str], fields=("name", "code")) -> List[Dict[str, Any]]:
+        if not search:
+            return items
+        needle = search.lower()
+        return [
+            item for item in items
+            if any(needle in str(item.get(field) or "").lower() for field in fields)
+        ]
+
+    async def get_companies(
+        self,
+        search: Optional[str] = None,
+        countries: Optional[Union[str, list]] = None,
+        industry: Optional[str] = None,
+        industry_group: Optional[str] = None,
+        sector: Optional[str] = None,
+        sub_industry: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Retrieve a paginated list of companies.
+        """
+        companies = self.companies
+        if search:
+            needle = search.upper()
+            exact = self.company_ids_by_isin.get(needle) or self.company_ids_by_lei.get(needle)
+            if exact is not None:
+                companies = [self.companies_by_id[exact]]
+            else:
+                companies = self._search(companies, search, fields=("name", "isin", "lei"))
+        country_set = {c.upper() for c in _csv(countries)}
+        if country_set:
+            companies = [c for c in companies if company_country(c) in country_set]
+        for field, code in (("sector", sector), ("industry_group", industry_group),
+                            ("industry", industry), ("sub_industry", sub_industry)):
+            if code is not None:
+                companies = [c for c in companies if _code(c.get(field)) == str(code)]
+        params = {"search": search, "countries": ",".join(_csv(countries)) or None, "industry": industry,
+                  "industry_group": industry_group, "sector": sector, "sub_industry": sub_industry}
+        return self._paginate("companies", companies, page, page_size, params)
+
+    async def get_company_detail(self, company_id: int) -> Dict[str, Any]:
+        """
+        Retrieve detailed information for a single company by its ID.
+        """
+        company = self.companies_by_id.get(_ref_id(company_id))
+        return company if company is not None else self._not_found()
+
+    async def get_filings(
+        self,
+        added_to_platform_from: Optional[str] = None,
+        added_to_platform_to: Optional[str] = None,
+        company: Optional[int] = None,
+        company_isin: Optional[str] = None,
+        countries: Optional[Union[str, list]] = None,
+        dissemination_datetime_from: Optional[str] = None,
+        dissemination_datetime_to: Optional[str] = None,
+        language: Optional[str] = None,
+        languages: Optional[Union[str, list]] = None,
+        lei: Optional[str] = None,
+        ordering: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+        release_datetime_from: Optional[str] = None,
+        release_datetime_to: Optional[str] = None,
+        search: Optional[str] = None,
+        source: Optional[int] = None,
+        type: Optional[str] = None,
+        **extra_filters
+    ) -> Dict[str, Any]:
+        """
+        Retrieve a paginated list of filings with full filtering support.
+        """
+        # Start from the narrowest indexed candidate list, then apply the remaining filters.
+        candidates: List[List[Dict[str, Any]]] = []
+        company_ids = set()
+        if company:
+            company_ids.add(int(company))
+        if company_isin:
+            company_ids.add(self.company_ids_by_isin.get(company_isin.upper(), -1))
+        if lei:
+            company_ids.add(self.company_ids_by_lei.get(lei.upper(), -1))
+        if len(company_ids) > 1:
+            return self._paginate("filings", [], page, page_size, {})
+        if company_ids:
+            candidates.append(self.filings_by_company.get(next(iter(company_ids)), []))
+        if type:
+            candidates.append(self.filings_by_type.get(str(type), []))
+        country_set = {c.upper() for c in _csv(countries)}
+        if len(country_set) == 1:
+            candidates.append(self.filings_by_country.get(next(iter(country_set)), []))
+        language_filter = bool(language or _csv(languages))
+        language_set = set(_csv(languages))
+        if language:
+            language_set = language_set & {language} if language_set else {language}
+        if language_filter and not language_set:
+            return self._paginate("filings", [], page, page_size, {})
+        if len(language_set) == 1:
+            candidates.append(self.filings_by_language.get(next(iter(language_set)), []))
+        if ordering and ordering != DEFAULT_FILING_ORDERING and ordering.lstrip("-") not in FILING_ORDER_FIELDS:
+            return RealAPIClient._format_error(httpx.Response(400))
+        params = {
+            "added_to_platform_from": added_to_platform_from, "added_to_platform_to": added_to_platform_to,
+            "company": company, "company_isin": company_isin, "countries": ",".join(_csv(countries)) or None,
+            "dissemination_datetime_from": dissemination_datetime_from,
+            "dissemination_datetime_to": dissemination_datetime_to, "language": language,
+            "languages": ",".join(_csv(languages)) or None, "lei": lei, "ordering": ordering,
+            "release_datetime_from": release_datetime_from, "release_datetime_to": release_datetime_to,
+            "search": search, "source": source, "type": type,
+        }
+        if self.filing_columns is not None:
+            try:
+                rows = self.filing_columns.select(
+                    company_ids=company_ids,
+                    types=[str(type)] if type else None,
+                    countries=country_set,
+                    languages=language_set if language_filter else None,
+                    source=source,
+                    ranges={
+                        "release_datetime": (release_datetime_from, release_datetime_to),
+                        "dissemination_datetime": (dissemination_datetime_from, dissemination_datetime_to),
+                        "added_to_platform": (added_to_platform_from, added_to_platform_to),
+                    },
+                )
+            except ValueError:
+                return RealAPIClient._format_error(httpx.Response(400))
+            if search:
+                needle = search.lower()
+                rows = self.filing_columns.where(rows, lambda f: needle in (f.get("title") or "").lower())
+            custom = ordering if ordering and ordering != DEFAULT_FILING_ORDERING else None
+            return self._paginate("filings", FilingRows(self.filing_columns, rows, custom), page, page_size, params)
+
+        filings = min(candidates, key=len) if candidates else self.filings
+
+        def keep(filing):
+            if company_ids and _ref_id(filing.get("company")) not in company_ids:
+                return False
+            if type and _code(filing.get("filing_type") or filing.get("type")) != str(type):
+                return False
+            if country_set and self._filing_country(filing) not in country_set:
+                return False
+            if language_filter and _code(filing.get("language")) not in language_set:
+                return False
+            if source and _ref_id(filing.get("source")) != int(source):
+                return False
+            for field, low, high in (
+                ("release_datetime", release_datetime_from, release_datetime_to),
+                ("dissemination_datetime", dissemination_datetime_from, dissemination_datetime_to),
+                ("added_to_platform", added_to_platform_from, added_to_platform_to),
+            ):
+                value = filing.get(field) or ""
+                if low and value < low:
+                    return False
+                if high and value > high:
+                    return False
+            if search and search.lower() not in (filing.get("title") or "").lower():
+                return False
+            return True
+
+        filings = [f for f in filings if keep(f)]
+        if ordering and ordering != DEFAULT_FILING_ORDERING:
+            field = ordering.lstrip("-")
+            filings.sort(key=lambda f: (f.get(field) or "", f["id"]) if field != "id" else f["id"],
+                         reverse=ordering.startswith("-"))
+        return self._paginate("filings", filings, page, page_size, params)
+
+    async def get_filing_detail(self, filing_id: int) -> Dict[str, Any]:
+        """
+        Retrieve detailed information for a single filing by its ID.
+        """
+        filing = self.filings_by_id.get(_ref_id(filing_id))
+        return filing if filing is not None else self._not_found()
+
+    async def get_filing_types(self, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieve a list of all available filing types.
+        """
+        items = self._search(self.filing_types, search)
+        return self._paginate("filing-types", items, page, page_size, {"search": search})
+
+    async def get_filing_type(self, filing_type_id: int) -> Dict[str, Any]:
+        """
+        Retrieve details for a single filing type by its primary key.
+        """
+        item = self.filing_types_by_id.get(_ref_id(filing_type_id))
+        return item if item is not None else self._not_found()
+
+    async def get_industries(self, industry_group_code: Optional[str] = None, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
+        items = self._search(self.industries, search)
+        if industry_group_code is not None:
+            items = [i for i in items if _code(i.get("industry_group")) == str(industry_group_code)]
+        params = {"industry_group_code": industry_group_code, "search": search}
+        return self._paginate("industries", items, page, page_size, params)
+
+    async def get_industry(self, industry_id: int) -> Dict[str, Any]:
+        """
+        Retrieve details for a single GICS Industry by its primary key.
+        """
+        item = self.industries_by_id.get(_ref_id(industry_id))
+        return item if item is not None else self._not_found()
+
+    async def get_industry_by_code(self, code: str) -> dict:
+        item = self.industries_by_code.get(str(code))
+        return item if item is not None else {"error": f"Industry with code {code} not found."}
+
+    async def get_industry_groups(self, sector_code: Optional[str] = None, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieve a list of all available GICS Industry Groups. Can be filtered by parent sector code.
+        """
+        items = self._search(self.industry_groups, search)
+        if sector_code is not None:
+            items = [i for i in items if _code(i.get("sector")) == str(sector_code)]
+        return self._paginate("industry-groups", items, page, page_size, {"sector_code": sector_code, "search": search})
+
+    async def get_industry_group(self, group_id: int) -> Dict[str, Any]:
+        """
+        Retrieve details for a single GICS Industry Group by its primary key.
+        """
+        item = self.industry_groups_by_id.get(_ref_id(group_id))
+        return item if item is not None else self._not_found()
+
+    async def get_industry_group_by_code(self, code: str) -> dict:
+        item = self.industry_groups_by_code.get(str(code))
+        return item if item is not None else {"error": f"Industry group with code {code} not found."}
+
+    async def get_sectors(self, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieve a list of all available GICS Sectors.
+        """
+        items = self._search(self.sectors, search)
+        return self._paginate("sectors", items, page, page_size, {"search": search})
+
+    async def get_sector(self, sector_code: str) -> Dict[str, Any]:
+        """
+        Retrieve details for a single GICS Sector by its code.
+        """
+        item = self.sectors_by_code.get(str(sector_code))
+        return item if item is not None else {"error": f"Sector with code {sector_code} not found."}
+
+    async def get_sub_industries(self, industry_code: Optional[str] = None, page: int = 1, page_size: int = 100, search: Optional[str] = None) -> Dict[str, Any]:
+        items = self._search(self.sub_industries, search)
+        if industry_code is not None:
+            items = [i for i in items if _code(i.get("industry")) == str(industry_code)]
+        return self._paginate("sub-industries", items, page, page_size, {"industry_code": industry_code, "search": search})
+
+    async def get_sub_industry(self, sub_industry_id: int) -> Dict[str, Any]:
+        """
+        Retrieve details for a single GICS Sub-Industry by its primary key.
+        """
+        item = self.sub_industries_by_id.get(_ref_id(sub_industry_id))
+        return item if item is not None else self._not_found()
+
+    async def get_sub_industry_by_code(self, code: str) -> dict:
+        item = self.sub_industries_by_code.get(str(code))
+        return item if item is not None else {"error": f"Sub-industry with code {code} not found."}
+
+    async def get_sources(self, page: int = 1, page_size: int = 100) -> Dict[str, Any]:
+        """
+        Retrieve a list of all available data sources.
+        """
+        return self._paginate("sources", self.sources, page, page_size, {})
+
+    async def get_source(self, source_id: int) -> Dict[str, Any]:
+        """
+        Retrieve details for a single data source by its primary key.
+        """
+        item = self.sources_by_id.get(_ref_id(source_id))
+        return item if item is not None else self._not_found()
+
+    async def get_processed_filing(self, processed_filing_id: int) -> Dict[str, Any]:
+        """
+        Retrieve the processed content for a single filing by the ProcessedFiling ID.
+        """
+        item = self.processed_filings.get(_ref_id(processed_filing_id))
+        return item if item is not None else self._not_found()
+
+    async def get_schema(self, format: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieve the OpenAPI3 schema captured with the snapshot.
+        """
+        return self.schema
@@ -0,0 +1,104 @@
+"""
+Multi-tenant routing of upstream API keys.
+
+In HTTP mode each request may carry its own API key (``x-api-key`` or ``Authorization: Bearer``).
+Every key gets its own RealAPIClient with a dedicated connection pool, rate-limit bucket and cache
+namespace. Idle tenants are evicted least-recently-used first.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.metrics import metrics
+
+API_KEY_HEADER = os.getenv("TENANT_API_KEY_HEADER", "x-api-key").lower()
+
+
+def tenant_id(api_key: str) -> str:
+    """
+    Stable, non-reversible tenant label for an API key, used in cache keys and metrics.
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def request_api_key() -> Optional[str]:
+    """
+    Return the API key sent with the current MCP HTTP request, if any.
+    """
+    try:
+        from fastmcp.server.dependencies import get_http_headers
+    except ImportError:
+        return None
+    headers = get_http_headers(include_all=True)
+    if headers.get(API_KEY_HEADER):
+        return headers[API_KEY_HEADER]
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip() or None
+    return None
+
+
+class TenantRegistry:
+    """
+    LRU registry of per-API-key RealAPIClient instances.
+    """
+    def __init__(self, max_tenants: int = 32, idle_timeout: float = 900.0):
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        self._clients: "OrderedDict[tuple, object]" = OrderedDict()
+        self._last_used = {}
+
+    async def client_for(self, api_key: str, base_url: str):
+        """
+        Return the client for ``api_key``, creating it (and evicting idle tenants) as needed.
+        """
+        from src.real_api.real_client import RealAPIClient
+
+        key = (api_key, base_url)
+        now = time.monotonic()
+        client = self._clients.get(key)
+        if client is None:
+            client = RealAPIClient(api_key, base_url, cache_namespace=tenant_id(api_key))
+            self._clients[key] = client
+            metrics.incr("tenants_created")
+        self._clients.move_to_end(key)
+        self._last_used[key] = now
+        await self._evict(now)
+        return client
+
+    async def _evict(self, now: float) -> None:
+        while self._clients:
+            oldest, client = next(iter(self._clients.items()))
+            idle = now - self._last_used[oldest]
+            if len(self._clients) <= self.max_tenants and idle < self.idle_timeout:
+                break
+            if client.in_flight:
+                # Never close a pool under a running request; retry on the next lookup.
+                break
+            del self._clients[oldest]
+            del self._last_used[oldest]
+            await client.aclose()
+            metrics.incr("tenants_evicted")
+
+    async def aclose(self) -> None:
+        """
+        Close every tenant's connection pool (on shutdown).
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._last_used.clear()
+        for client in clients:
+            await client.aclose()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+# Shared registry for the whole process.
+tenants = TenantRegistry(
+    max_tenants=int(os.getenv("MAX_TENANTS", "32")),
+    idle_timeout=float(os.getenv("TENANT_IDLE_TIMEOUT", "900")),
+)
@@ -0,0 +1,115 @@
+"""
+Latest filing per company for a watchlist of ISINs, LEIs or tickers.
+
+Identifiers are deduplicated and resolved in batch through the identifier index, then the
+newest filing of every distinct company is read with a one-item page per company (and per
+filing type when several are asked for), ``WATCHLIST_CONCURRENCY`` at a time. All requests go
+through the client, so they share its cache, rate limit and scheduler.
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.identifiers import resolve_identifiers
+from src.metrics import metrics
+from src.snapshot_api.filing_columns import to_micros
+from src.snapshot_api.snapshot_client import _code
+
+MAX_IDENTIFIERS = int(os.getenv("WATCHLIST_MAX_IDENTIFIERS", "1000"))
+CONCURRENCY = int(os.getenv("WATCHLIST_CONCURRENCY", "10"))
+
+Progress = Optional[Callable[[int, int], Awaitable[None]]]
+
+
+def _filing_summary(filing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The fields of a filing needed to decide whether to open it.
+    """
+    return {
+        "id": filing.get("id"),
+        "title": filing.get("title"),
+        "type": _code(filing.get("filing_type") or filing.get("type")),
+        "language": _code(filing.get("language")),
+        "release_datetime": filing.get("release_datetime"),
+        "dissemination_datetime": filing.get("dissemination_datetime"),
+        "processed_filing_id": filing.get("processed_filing_id"),
+    }
+
+
+def _release_key(filing: Dict[str, Any]) -> int:
+    try:
+        return to_micros(filing.get("release_datetime"))
+    except ValueError:
+        return to_micros(None)
+
+
+async def watchlist_latest(
+    api_client,
+    identifiers: List[str],
+    types: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    progress: Progress = None,
+    concurrency: int = CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    Return the latest filing (optionally of ``types``) for every distinct identifier, flagged
+    ``changed`` when it was released at or after ``since``.
+    """
+    unique = list(dict.fromkeys(i.strip() for i in identifiers if i and i.strip()))
+    if len(unique) > MAX_IDENTIFIERS:
+        return {"error": f"Too many identifiers ({len(unique)}); the limit is {MAX_IDENTIFIERS} per call"}
+    try:
+        since_micros = to_micros(since) if since else None
+    except ValueError:
+        return {"error": f"Invalid since {since!r}; use an ISO 8601 date or datetime"}
+
+    resolved = await resolve_identifiers(api_client, unique, concurrency=max(1, concurrency))
+    company_ids = list(dict.fromkeys(r["company_id"] for r in resolved if r["company_id"] is not None))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+
+    async def latest(company_id: int) -> Dict[str, Any]:
+        nonlocal done
+        async with semaphore:
+            pages = await asyncio.gather(*(
+                api_client.get_filings(company=company_id, type=t, ordering="-release_datetime", page=1, page_size=1)
+                for t in (types or [None])
+            ))
+        done += 1
+        if progress is not None:
+            await progress(done, len(company_ids))
+        errors = [p for p in pages if "error" in p]
+        if errors:
+            return errors[0]
+        filings = [f for p in pages for f in p.get("results", [])[:1]]
+        return {"filing": max(filings, key=_release_key) if filings else None}
+
+    latest_by_company = dict(zip(company_ids, await asyncio.gather(*(latest(c) for c in company_ids))))
+    metrics.incr("watchlist_companies", len(company_ids))
+
+    results = []
+    for entry in resolved:
+        row = {
+            "identifier": entry["identifier"],
+            "company_id": entry["company_id"],
+            "company_name": (entry["company"] or {}).get("name"),
+            "latest_filing": None,
+            "changed": False,
+        }
+        found = latest_by_company.get(entry["company_id"])
+        if entry["company_id"] is None:
+            row["error"] = "Company not found"
+        elif "error" in found:
+            row["error"] = found["error"]
+        elif found["filing"] is not None:
+            row["latest_filing"] = _filing_summary(found["filing"])
+            row["changed"] = since_micros is not None and _release_key(found["filing"]) >= since_micros
+        results.append(row)
+    return {
+        "count": len(results),
+        "resolved": sum(1 for r in results if r["company_id"] is not None),
+        "changed": sum(1 for r in results if r["changed"]),
+        "since": since,
+        "results": results,
+    }
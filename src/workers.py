@@ -0,0 +1,417 @@
+"""
+Multi-worker HTTP serving mode for the Financial Reports MCP server.
+
+The master process spawns N worker processes, each serving the MCP HTTP app on its own Unix
+socket, and fronts them with a small ASGI router on the public host/port. The router pins every
+MCP session (``mcp-session-id`` header for streamable HTTP, ``session_id`` for SSE) to the worker
+that created it, so stateful sessions keep working. Workers share the on-disk response cache and
+the upstream rate limiter through SQLite files in a common runtime directory.
+
+Send SIGHUP to the master for a rolling restart: workers are replaced one at a time, and each old
+worker stops receiving new sessions and keeps serving its own until they end or the graceful
+timeout runs out, then exits. Sessions idle for ``MCP_SESSION_IDLE_TIMEOUT`` seconds are dropped.
+Requests for a session that was dropped, or lived on a worker that is gone, get a 404, which
+tells MCP clients to start a new session.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import httpx
+
+# Headers that describe a single hop and must not be forwarded by the router.
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host",
+}
+SSE_SESSION_PATTERN = re.compile(rb"session_id=([0-9a-fA-F-]+)")
+SESSION_IDLE_TIMEOUT = float(os.getenv("MCP_SESSION_IDLE_TIMEOUT", "3600"))
+# Dropped session IDs remembered for their 404s.
+LOST_SESSIONS = 10000
+SESSION_NOT_FOUND = b'{"jsonrpc":"2.0","id":null,"error":{"code":-32001,"message":"Session not found"}}'
+# Upper bound on the delay between attempts to replace a worker that keeps failing to start.
+MAX_RESPAWN_DELAY = 60.0
+
+
+def _worker_main(socket_path: str, transport: str, graceful_timeout: float) -> None:
+    """
+    Entry point of a worker process: serve the MCP HTTP app on ``socket_path``.
+    """
+    import uvicorn
+    from src.financial_reports_mcp import mcp
+    from src.serving import serve_uvicorn, track_requests
+
+    app = track_requests(mcp.http_app(transport=transport))
+    config = uvicorn.Config(app, uds=socket_path, log_level="warning", loop="none",
+                            timeout_graceful_shutdown=graceful_timeout, lifespan="on")
+    serve_uvicorn(config)
+
+
+class Worker:
+    def __init__(self, index: int, socket_path: str, process: multiprocessing.Process):
+        self.index = index
+        self.socket_path = socket_path
+        self.process = process
+        self.draining = False
+        self.in_flight = 0
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(uds=socket_path),
+            base_url="http://worker",
+            timeout=httpx.Timeout(None),
+        )
+
+
+class Session:
+    __slots__ = ("worker", "last_used", "open")
+
+    def __init__(self, worker: Worker):
+        self.worker = worker
+        self.last_used = time.monotonic()
+        # Requests of the session being forwarded right now, including open event streams.
+        self.open = 0
+
+
+class WorkerPool:
+    """
+    Starts, monitors and restarts the worker processes, and tracks session affinity.
+    """
+    def __init__(self, workers: int, transport: str, runtime_dir: Optional[str] = None,
+                 graceful_timeout: float = 30.0):
+        self.size = workers
+        self.transport = transport
+        self.graceful_timeout = graceful_timeout
+        self.runtime_dir = runtime_dir or tempfile.mkdtemp(prefix="financial-reports-mcp-")
+        self.workers: List[Worker] = []
+        self.sessions: Dict[str, Session] = {}
+        self._lost: "OrderedDict[str, None]" = OrderedDict()
+        self._generation = itertools.count()
+        self._round_robin = itertools.count()
+        self._context = multiprocessing.get_context("spawn")
+        self._monitor: Optional[asyncio.Task] = None
+        self._restarting = False
+        # Worker index -> (failed respawn attempts, monotonic time of the next attempt).
+        self._respawns: Dict[int, Tuple[int, float]] = {}
+
+    def configure_shared_state(self) -> None:
+        """
+        Point every worker at the same on-disk cache and rate-limit databases.
+        """
+        os.environ.setdefault("SHARED_CACHE_PATH", os.path.join(self.runtime_dir, "cache.sqlite3"))
+        os.environ.setdefault("RATE_LIMIT_DB", os.path.join(self.runtime_dir, "ratelimit.sqlite3"))
+
+    async def _spawn(self, index: int) -> Worker:
+        socket_path = os.path.join(self.runtime_dir, f"worker-{index}-{next(self._generation)}.sock")
+        process = self._context.Process(
+            target=_worker_main, args=(socket_path, self.transport, self.graceful_timeout),
+            name=f"financial-reports-mcp-worker-{index}", daemon=False,
+        )
+        process.start()
+        worker = Worker(index, socket_path, process)
+        try:
+            await self._wait_ready(worker)
+        except BaseException:
+            process.kill()
+            await worker.client.aclose()
+            raise
+        return worker
+
+    @staticmethod
+    async def _wait_ready(worker: Worker, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not worker.process.is_alive():
+                raise RuntimeError(f"Worker {worker.index} exited during startup")
+            if os.path.exists(worker.socket_path):
+                try:
+                    await worker.client.get("/", timeout=1.0)
+                    return
+                except httpx.TransportError:
+                    pass
+            await asyncio.sleep(0.1)
+        raise RuntimeError(f"Worker {worker.index} did not become ready within {timeout}s")
+
+    async def start(self) -> None:
+        self.configure_shared_state()
+        self.workers = list(await asyncio.gather(*(self._spawn(i) for i in range(self.size))))
+        self._monitor = asyncio.get_running_loop().create_task(self._watch())
+
+    async def _watch(self) -> None:
+        """
+        Replace workers that died unexpectedly and drop idle sessions.
+        """
+        while True:
+            await asyncio.sleep(1.0)
+            self._expire_idle()
+            if self._restarting:
+                continue
+            for pos, worker in enumerate(list(self.workers)):
+                if not worker.process.is_alive() and not worker.draining:
+                    await self._replace(pos, worker)
+
+    async def _replace(self, pos: int, worker: Worker) -> None:
+        """
+        Start a worker in place of the dead ``worker``; a failed start is logged and retried
+        with exponential backoff on later passes of the monitor.
+        """
+        failures, retry_at = self._respawns.get(worker.index, (0, 0.0))
+        if time.monotonic() < retry_at:
+            return
+        if not failures:
+            print(f"Worker {worker.index} exited with code {worker.process.exitcode}; restarting", file=sys.stderr)
+            self._forget(worker)
+        try:
+            self.workers[pos] = await self._spawn(worker.index)
+        except Exception as e:
+            failures += 1
+            delay = min(MAX_RESPAWN_DELAY, 2.0 ** (failures - 1))
+            self._respawns[worker.index] = (failures, time.monotonic() + delay)
+            print(f"Restarting worker {worker.index} failed ({e}); retrying in {delay:g}s", file=sys.stderr)
+            return
+        self._respawns.pop(worker.index, None)
+        await worker.client.aclose()
+
+    def _lose(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+        self._lost[session_id] = None
+        while len(self._lost) > LOST_SESSIONS:
+            self._lost.popitem(last=False)
+
+    def _forget(self, worker: Worker) -> None:
+        lost = [session_id for session_id, session in self.sessions.items() if session.worker is worker]
+        for session_id in lost:
+            self._lose(session_id)
+        if lost:
+            print(f"Worker {worker.index} exited with {len(lost)} session(s) open; clients must reconnect",
+                  file=sys.stderr)
+
+    def _expire_idle(self) -> None:
+        cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+        for session_id, session in list(self.sessions.items()):
+            if not session.open and session.last_used < cutoff:
+                self._lose(session_id)
+
+    def lost(self, session_id: Optional[str]) -> bool:
+        """
+        True if ``session_id`` was dropped (idle, or its worker is gone).
+        """
+        return session_id is not None and session_id in self._lost
+
+    def route(self, session_id: Optional[str]) -> Worker:
+        """
+        Return the worker owning ``session_id``, or the next worker in rotation for new sessions.
+        """
+        if session_id and session_id in self.sessions:
+            return self.sessions[session_id].worker
+        # Dead workers are skipped while they wait for a replacement.
+        active = [w for w in self.workers if not w.draining and w.process.is_alive()] or self.workers
+        return active[next(self._round_robin) % len(active)]
+
+    def pin(self, session_id: str, worker: Worker) -> None:
+        if session_id not in self.sessions:
+            self.sessions[session_id] = Session(worker)
+
+    def unpin(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+
+    def opened(self, session_id: Optional[str]) -> None:
+        session = self.sessions.get(session_id) if session_id else None
+        if session is not None:
+            session.open += 1
+            session.last_used = time.monotonic()
+
+    def closed(self, session_id: Optional[str]) -> None:
+        session = self.sessions.get(session_id) if session_id else None
+        if session is not None:
+            session.open -= 1
+            session.last_used = time.monotonic()
+
+    def _owns_sessions(self, worker: Worker) -> bool:
+        return any(session.worker is worker for session in self.sessions.values())
+
+    async def _retire(self, worker: Worker) -> None:
+        """
+        Stop routing new sessions to ``worker``, let its sessions end and in-flight requests
+        finish, then stop it. Sessions still open are reported lost to their clients.
+        """
+        worker.draining = True
+        deadline = time.monotonic() + self.graceful_timeout
+        while (worker.in_flight or self._owns_sessions(worker)) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if worker.process.is_alive():
+            worker.process.terminate()  # uvicorn drains in-flight requests on SIGTERM
+        await asyncio.get_running_loop().run_in_executor(None, worker.process.join, self.graceful_timeout)
+        if worker.process.is_alive():
+            worker.process.kill()
+        self._forget(worker)
+        await worker.client.aclose()
+        try:
+            os.unlink(worker.socket_path)
+        except FileNotFoundError:
+            pass
+
+    async def rolling_restart(self) -> None:
+        """
+        Replace every worker with a fresh process, one at a time.
+        """
+        if self._restarting:
+            return
+        self._restarting = True
+        try:
+            for pos, old in enumerate(list(self.workers)):
+                new = await self._spawn(old.index)
+                self.workers[pos] = new
+                await self._retire(old)
+                print(f"Worker {old.index} restarted", file=sys.stderr)
+        finally:
+            self._restarting = False
+
+    async def stop(self) -> None:
+        if self._monitor:
+            self._monitor.cancel()
+        await asyncio.gather(*(self._retire(w) for w in self.workers))
+        self.workers = []
+
+
+def create_router(pool: WorkerPool):
+    """
+    Build the ASGI app that forwards requests to the worker pool with session affinity.
+    """
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await pool.start()
+                    loop = asyncio.get_running_loop()
+                    loop.add_signal_handler(signal.SIGHUP, lambda: loop.create_task(pool.rolling_restart()))
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await pool.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"]]
+        query = scope.get("query_string", b"").decode("latin-1")
+        session_id = dict((k.lower(), v) for k, v in headers).get("mcp-session-id")
+        if session_id is None:
+            session_id = (parse_qs(query).get("session_id") or [None])[0]
+        if pool.lost(session_id):
+            await send({"type": "http.response.start", "status": 404,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": SESSION_NOT_FOUND})
+            return
+        worker = pool.route(session_id)
+
+        async def request_body():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                yield message.get("body", b"")
+                if not message.get("more_body"):
+                    return
+
+        disconnected = asyncio.Event()
+        sse_session = None
+        worker.in_flight += 1
+        # The session this request keeps open; a request that creates its session opens it once known.
+        tracked = session_id
+        pool.opened(tracked)
+        try:
+            request = worker.client.build_request(
+                scope["method"], scope["path"] + (f"?{query}" if query else ""),
+                headers=[(k, v) for k, v in headers if k.lower() not in HOP_BY_HOP_HEADERS],
+                content=request_body(),
+            )
+            response = await worker.client.send(request, stream=True)
+            try:
+                created = response.headers.get("mcp-session-id")
+                if created:
+                    pool.pin(created, worker)
+                    if tracked is None:
+                        tracked = created
+                        pool.opened(tracked)
+                if scope["method"] == "DELETE" and session_id:
+                    pool.unpin(session_id)
+                await send({
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in response.headers.multi_items()
+                                if k.lower() not in HOP_BY_HOP_HEADERS],
+                })
+
+                async def watch_disconnect():
+                    while (await receive())["type"] != "http.disconnect":
+                        pass
+                    disconnected.set()
+
+                watcher = asyncio.get_running_loop().create_task(watch_disconnect())
+                sse_pending = response.headers.get("content-type", "").startswith("text/event-stream")
+                try:
+                    async for chunk in response.aiter_raw():
+                        if sse_pending:
+                            # The SSE transport announces its session ID in the first "endpoint" event.
+                            match = SSE_SESSION_PATTERN.search(chunk)
+                            if match:
+                                sse_session = match.group(1).decode()
+                                pool.pin(sse_session, worker)
+                                if tracked is None:
+                                    tracked = sse_session
+                                    pool.opened(tracked)
+                                sse_pending = False
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                        if disconnected.is_set():
+                            break
+                finally:
+                    watcher.cancel()
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            finally:
+                await response.aclose()
+        except httpx.TransportError:
+            await send({"type": "http.response.start", "status": 502,
+                        "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Worker unavailable"})
+        finally:
+            worker.in_flight -= 1
+            pool.closed(tracked)
+            if sse_session is not None:
+                pool.unpin(sse_session)  # an SSE session ends with its event stream
+
+    return app
+
+
+def serve_workers(host: str, port: int, workers: int, transport: str = "streamable-http") -> None:
+    """
+    Run the master router on ``host:port`` in front of ``workers`` worker processes.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("Multi-worker mode requires Unix domain sockets (Linux or macOS).")
+    import uvicorn
+    from src.serving import BACKLOG, KEEP_ALIVE, event_loop_name
+
+    pool = WorkerPool(workers, transport, graceful_timeout=float(os.getenv("MCP_GRACEFUL_TIMEOUT", "30")))
+    print(f"Starting {workers} workers behind {host}:{port} (runtime dir {pool.runtime_dir})", file=sys.stderr)
+    uvicorn.run(create_router(pool), host=host, port=port, log_level="info", lifespan="on",
+                timeout_graceful_shutdown=pool.graceful_timeout, loop=event_loop_name(),
+                backlog=BACKLOG, timeout_keep_alive=KEEP_ALIVE)
+
@@ -0,0 +1,145 @@
+"""
+Shared fixtures: a RealAPIClient wired to an in-process fake of the Financial Reports API.
+"""
+
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache import ResponseCache  # noqa: E402
+from src.real_api import real_client  # noqa: E402
+from src.real_api.real_client import RealAPIClient  # noqa: E402
+
+_namespaces = itertools.count(1)
+
+
+class FakeAPI:
+    """
+    Answers API requests from ``routes`` (path -> body, or callable(params) -> (status, body)),
+    plus ``/filings/`` and ``/companies/`` lists served from ``filings`` and ``companies``
+    (filings filtered on their ``company``, ``type`` and ``source`` values and datetime windows).
+    Every request path is appended to ``calls``.
+    """
+    def __init__(self):
+        self.routes: Dict[str, Any] = {}
+        self.filings: List[Dict[str, Any]] = []
+        self.companies: List[Dict[str, Any]] = []
+        self.calls: List[str] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        params = {k: v[0] for k, v in parse_qs(request.url.query.decode()).items()}
+        self.calls.append(path)
+        route = self.routes.get(path)
+        if callable(route):
+            status, body = route(params)
+        elif route is not None:
+            status, body = 200, route
+        elif path == "/filings/":
+            status, body = 200, self._page(self._filings(params), params)
+        elif path == "/companies/":
+            status, body = 200, self._page(self.companies, params)
+        else:
+            status, body = 404, {"detail": "Not found."}
+        return httpx.Response(status, content=json.dumps(body).encode())
+
+    def _filings(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        items = self.filings
+        for field in ("company", "type", "source"):
+            if field in params:
+                items = [f for f in items if str(f.get(field)) in params[field].split(",")]
+        for field in ("release_datetime", "dissemination_datetime"):
+            if f"{field}_from" in params:
+                items = [f for f in items if f[field] is not None and f[field] >= params[f"{field}_from"]]
+            if f"{field}_to" in params:
+                items = [f for f in items if f[field] is not None and f[field] <= params[f"{field}_to"]]
+        ordering = params.get("ordering", "-release_datetime")
+        field = ordering.lstrip("-")
+        # Like PostgreSQL: nulls sort last ascending; ties come back in no particular (here: reverse ID) order.
+        items = sorted(items, key=lambda f: -f["id"])
+        items = sorted(items, key=lambda f: (f[field] is None, f[field] or ""))
+        if ordering.startswith("-"):
+            items.reverse()
+        return items
+
+    @staticmethod
+    def _page(items: List[Dict[str, Any]], params: Dict[str, str]) -> Dict[str, Any]:
+        page, size = int(params.get("page", 1)), int(params.get("page_size", 100))
+        chunk = items[(page - 1) * size:page * size]
+        return {
+            "count": len(items),
+            "next": f"?page={page + 1}" if page * size < len(items) else None,
+            "previous": None,
+            "results": chunk,
+        }
+
+
+def make_filings(count: int, distinct_datetimes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    ``count`` filings; with ``distinct_datetimes``, their release datetimes repeat (ties).
+    """
+    distinct = distinct_datetimes or count
+    return [
+        {
+            "id": i,
+            "title": f"Report {i}",
+            "release_datetime": f"2024-01-01T{(i % distinct) // 60:02d}:{(i % distinct) % 60:02d}:00Z",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+class Clock:
+    """
+    Wall clock (``time.time``) that tests move forward with ``advance``.
+    """
+    def __init__(self):
+        self.offset = 0.0
+        self._time = time.time
+
+    def __call__(self) -> float:
+        return self._time() + self.offset
+
+    def advance(self, seconds: float) -> None:
+        self.offset += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    fake = Clock()
+    monkeypatch.setattr(time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def fake_api() -> FakeAPI:
+    return FakeAPI()
+
+
+@pytest.fixture
+def cache(monkeypatch) -> ResponseCache:
+    """
+    A fresh response cache in place of the process-wide one.
+    """
+    fresh = ResponseCache(negative_ttl=60, stale_ttl=300, error_ttl=3600)
+    monkeypatch.setattr(real_client, "response_cache", fresh)
+    return fresh
+
+
+@pytest.fixture
+def client(fake_api, cache) -> RealAPIClient:
+    """
+    A RealAPIClient talking to ``fake_api``, in its own tenant namespace.
+    """
+    api = RealAPIClient("test-key", "https://api.test/", cache_namespace=f"test-{next(_namespaces)}")
+    api._http = httpx.AsyncClient(transport=httpx.MockTransport(fake_api.handle))
+    return api
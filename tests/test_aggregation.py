@@ -0,0 +1,38 @@
+import asyncio
+
+from conftest import make_filings
+from src.aggregation import aggregate_filings
+
+
+def _filings(count):
+    filings = make_filings(count)
+    for filing in filings:
+        filing["company"] = 7 if filing["id"] % 3 else 8
+        filing["type"] = "AR" if filing["id"] % 2 else "QR"
+    return filings
+
+
+def test_group_counts_are_probed_for_a_company_given_as_a_bare_id(client, fake_api):
+    fake_api.filings = _filings(250)
+    result = asyncio.run(aggregate_filings(client, {"company": 7}, ["company"], ["count"]))
+    assert "error" not in result, result
+    assert result["method"] == "probe"
+    assert result["groups"] == [{"company": "7", "count": 167}]
+    # The probe repeats the total-count query, so it is answered from the cache.
+    assert fake_api.calls == ["/filings/"]
+
+
+def test_scan_groups_filings_with_their_first_and_last(client, fake_api):
+    fake_api.filings = _filings(250)
+    result = asyncio.run(aggregate_filings(client, {}, ["company", "type"], ["count", "first", "last"]))
+    assert result["method"] == "scan" and result["scanned"] == 250 and not result["truncated"]
+    groups = {(g["company"], g["type"]): g for g in result["groups"]}
+    assert {k: g["count"] for k, g in groups.items()} == {("7", "AR"): 83, ("7", "QR"): 84, ("8", "AR"): 42, ("8", "QR"): 41}
+    assert groups[("8", "QR")]["first"]["id"] == 6 and groups[("8", "QR")]["last"]["id"] == 246
+
+
+def test_ungrouped_count_is_read_from_one_page(client, fake_api):
+    fake_api.filings = _filings(250)
+    result = asyncio.run(aggregate_filings(client, {"type": "AR"}, [], ["count"]))
+    assert result["method"] == "count" and result["count"] == 125
+    assert fake_api.calls == ["/filings/"]
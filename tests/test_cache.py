@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from src.real_api import real_client
+
+
+def test_not_found_is_cached_for_the_negative_ttl(client, fake_api, cache):
+    async def run():
+        first = await client.get_company_detail(999)
+        second = await client.get_company_detail(999)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert "error" in first and second == first
+    assert fake_api.calls == ["/companies/999/"]
+    entry = next(iter(cache._entries.values()))
+    assert entry.negative
+    assert 55 < entry.expires_at - time.time() <= 60
+
+
+def test_expired_negative_entry_is_refetched_not_served_stale(client, fake_api, cache, clock):
+    asyncio.run(client.get_company_detail(999))
+    clock.advance(cache.negative_ttl + 1)
+    fake_api.routes["/companies/999/"] = {"id": 999, "name": "Now listed"}
+
+    assert asyncio.run(client.get_company_detail(999))["name"] == "Now listed"
+    assert len(fake_api.calls) == 2
+
+
+def test_stale_entry_is_served_while_one_background_refresh_runs(client, fake_api, cache, clock):
+    fake_api.routes["/companies/1/"] = {"id": 1, "name": "Old name"}
+
+    async def run():
+        await client.get_company_detail(1)
+        clock.advance(601)
+        fake_api.routes["/companies/1/"] = {"id": 1, "name": "New name"}
+        stale = [await client.get_company_detail(1) for _ in range(3)]
+        await asyncio.gather(*real_client._background_tasks)
+        return stale, await client.get_company_detail(1)
+
+    stale, refreshed = asyncio.run(run())
+    assert [r["name"] for r in stale] == ["Old name"] * 3
+    assert refreshed["name"] == "New name"
+    assert fake_api.calls == ["/companies/1/", "/companies/1/"]
+
+
+def test_upstream_error_serves_the_stale_entry_marked_stale(client, fake_api, cache, clock):
+    fake_api.routes["/companies/1/"] = {"id": 1, "name": "Kept"}
+    asyncio.run(client.get_company_detail(1))
+    clock.advance(601 + cache.stale_ttl)
+    fake_api.routes["/companies/1/"] = lambda params: (503, {"detail": "Unavailable"})
+
+    result = asyncio.run(client.get_company_detail(1))
+    assert result["name"] == "Kept"
+    assert result["_stale"] is True
+    assert "503" in result["_stale_reason"]
+
+
+def test_upstream_error_after_the_stale_if_error_window_is_returned(client, fake_api, cache, clock):
+    fake_api.routes["/companies/1/"] = {"id": 1, "name": "Too old"}
+    asyncio.run(client.get_company_detail(1))
+    clock.advance(601 + cache.error_ttl)
+    fake_api.routes["/companies/1/"] = lambda params: (500, {"detail": "Server error"})
+
+    assert "error" in asyncio.run(client.get_company_detail(1))
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from src.company_directory import COMPLETE, FAILED, PARTIAL, CompanyDirectory
+
+
+def _companies(count, start=1):
+    return [{"id": i, "name": f"Company {i}", "country_code": "DE"} for i in range(start, start + count)]
+
+
+def _failing(fake_api, times):
+    """
+    Make /companies/ fail ``times`` times, then answer from ``fake_api.companies``.
+    """
+    failures = iter(range(times))
+
+    def route(params):
+        if next(failures, None) is not None:
+            return 503, {"detail": "Unavailable"}
+        page, size = int(params.get("page", 1)), int(params.get("page_size", 100))
+        return 200, fake_api._page(fake_api.companies, {"page": page, "page_size": size})
+
+    fake_api.routes["/companies/"] = route
+
+
+def test_backoff_grows_exponentially_with_jitter_up_to_the_refresh_interval():
+    directory = CompanyDirectory(refresh_interval=60, retry_delay=5)
+    for failures, ceiling in [(1, 5), (2, 10), (3, 20), (4, 40), (5, 60), (10, 60)]:
+        delays = [directory.backoff(failures) for _ in range(50)]
+        assert all(ceiling / 2 <= d <= ceiling for d in delays)
+    assert len({directory.backoff(3) for _ in range(10)}) > 1
+
+
+def test_failed_page_is_retried_where_the_pass_stopped(client, fake_api):
+    fake_api.companies = _companies(250)
+    directory = CompanyDirectory(pages_per_step=1)
+
+    async def run():
+        states = [await directory.refresh_step(client)]
+        _failing(fake_api, 1)
+        states.append(await directory.refresh_step(client))
+        states += [await directory.refresh_step(client), await directory.refresh_step(client)]
+        return states
+
+    assert asyncio.run(run()) == [PARTIAL, FAILED, PARTIAL, COMPLETE]
+    assert "503" in directory.last_error
+    assert len(directory) == 250 and directory.ready
+
+
+def test_sync_loop_backs_off_after_failures_and_resets_on_success(client, fake_api, monkeypatch):
+    fake_api.companies = _companies(10)
+    _failing(fake_api, 3)
+    directory = CompanyDirectory(refresh_interval=3600, retry_delay=5)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+        if len(delays) == 4:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(directory._run(client))
+    assert 2.5 <= delays[0] <= 5 and 5 <= delays[1] <= 10 and 10 <= delays[2] <= 20
+    assert delays[3] == 3600
+    assert directory.failures == 0 and len(directory) == 10
+
+
+def test_companies_missing_from_a_full_pass_are_swept(client, fake_api, clock):
+    directory = CompanyDirectory()
+    fake_api.companies = _companies(5)
+    assert asyncio.run(directory.refresh_step(client)) == COMPLETE
+    fake_api.companies = _companies(3)
+    clock.advance(directory.refresh_interval)
+    assert asyncio.run(directory.refresh_step(client)) == COMPLETE
+    assert sorted(directory.companies) == [1, 2, 3]
+    assert 5 not in [c["id"] for c in directory.search("Company 5")["results"]]
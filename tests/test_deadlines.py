@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+from src import deadlines
+from src.deadlines import deadline
+from src.rate_limit import upstream_limiter
+
+
+def test_request_under_an_expired_deadline_returns_a_timeout(client, fake_api):
+    async def run():
+        with deadline(0):
+            return await client.get_company_detail(1)
+
+    result = asyncio.run(run())
+    assert result["timeout"] is True and "before the request was sent" in result["error"]
+    assert fake_api.calls == []
+
+
+def test_deadline_used_up_while_queued_returns_a_timeout(client, fake_api, monkeypatch):
+    acquire = upstream_limiter.acquire
+
+    async def slow_acquire(bucket):
+        await acquire(bucket)
+        deadlines._deadline.set(time.monotonic() - 1)
+
+    monkeypatch.setattr(upstream_limiter, "acquire", slow_acquire)
+
+    async def run():
+        with deadline(30):
+            return await client.get_company_detail(1)
+
+    result = asyncio.run(run())
+    assert result["timeout"] is True and "before the request was sent" in result["error"]
+    assert fake_api.calls == []
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import json
+import os
+
+import pytest
+
+from conftest import make_filings
+from src.export import ExportError, export_results
+
+
+def _rows(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def _sha256(path):
+    with open(path, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def test_export_stopped_at_max_rows_resumes_without_gaps_or_repeats(client, fake_api, tmp_path):
+    fake_api.filings = make_filings(300, distinct_datetimes=40)
+    output = str(tmp_path / "filings.ndjson")
+
+    first = asyncio.run(export_results(client, "filings", output, max_rows=130))
+    assert first["rows"] == 130 and not first["complete"]
+    assert os.path.exists(f"{output}.checkpoint.json")
+
+    second = asyncio.run(export_results(client, "filings", output))
+    assert second["complete"] and second["rows"] == 300
+    ids = [row["id"] for row in _rows(output)]
+    assert sorted(ids) == list(range(1, 301))
+    keys = [(row["release_datetime"], row["id"]) for row in _rows(output)]
+    assert keys == sorted(keys)
+    assert second["sha256"] == _sha256(output)
+    assert not os.path.exists(f"{output}.checkpoint.json")
+
+
+def test_resume_drops_bytes_written_after_the_checkpoint(client, fake_api, tmp_path):
+    fake_api.companies = [{"id": i, "name": f"Company {i}"} for i in range(1, 251)]
+    output = str(tmp_path / "companies.csv")
+    asyncio.run(export_results(client, "companies", output, format="csv", max_rows=150))
+    with open(output, "a", encoding="utf-8") as fh:
+        fh.write("999,partial row from a crash")
+
+    summary = asyncio.run(export_results(client, "companies", output, format="csv"))
+    with open(output, encoding="utf-8") as fh:
+        lines = fh.read().splitlines()
+    assert lines[0] == "id,name"
+    assert [line.split(",")[0] for line in lines[1:]] == [str(i) for i in range(1, 251)]
+    assert summary["rows"] == 250 and summary["sha256"] == _sha256(output)
+
+
+def test_checkpoint_of_another_export_is_refused(client, fake_api, tmp_path):
+    fake_api.filings = make_filings(150)
+    output = str(tmp_path / "filings.ndjson")
+    asyncio.run(export_results(client, "filings", output, max_rows=100))
+    with pytest.raises(ExportError, match="different export"):
+        asyncio.run(export_results(client, "filings", output, filters={"type": "ANNREP"}))
+    assert asyncio.run(export_results(client, "filings", output, resume=False))["rows"] == 150
+
+
+def test_filings_without_a_release_datetime_are_exported_in_id_order(client, fake_api, tmp_path):
+    fake_api.filings = make_filings(250)
+    fake_api.filings[41]["release_datetime"] = None
+    output = str(tmp_path / "filings.ndjson")
+
+    first = asyncio.run(export_results(client, "filings", output, max_rows=130))
+    assert first["rows"] == 130 and not first["complete"]
+    second = asyncio.run(export_results(client, "filings", output))
+    assert second["complete"] and second["rows"] == 250
+    assert [row["id"] for row in _rows(output)] == list(range(1, 251))
@@ -0,0 +1,67 @@
+import asyncio
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.financial_tables import (  # noqa: E402
+    detect_scale, extract_financial_tables, extraction_cache, parse_numbers,
+)
+from src.processing import pipeline  # noqa: E402
+
+REPORT = """# Income statement (in EUR millions)
+
+| | 2023 | 2023 | | 2022 |
+|---|---|---|---|---|
+| Revenue | 1,200 | 1,150 | 1,100 | 1,000 |
+| Net income | 120 | 115 | 110 | 100 |
+"""
+
+
+def _parsed(cells, language=None):
+    return [None if math.isnan(v) else v for v in parse_numbers(cells, language)]
+
+
+@pytest.mark.parametrize("cells, expected", [
+    (["1,234.5", "(12)", "-3", "100"], [1234.5, -12.0, -3.0, 100.0]),
+    (["1.234,5", "12,5", "(7,25)"], [1234.5, 12.5, -7.25]),
+    (["1.234.567", "12"], [1234567.0, 12.0]),
+    (["12.5%", "€ 1,000", "—", "n/a", ""], [12.5, 1000.0, None, None, None]),
+    (["1 234,5", "1 000"], [1234.5, 1000.0]),
+    (["1,234", "12.345"], [1234.0, 12.345]),
+])
+def test_parse_numbers_conventions(cells, expected):
+    assert _parsed(cells) == expected
+
+
+def test_dot_grouped_thousands_without_decimal_comma():
+    assert _parsed(["12.345", "11.987", "(1.234)"], "de") == [12345.0, 11987.0, -1234.0]
+    assert _parsed(["12.345", "11.987"]) == [12345.0, 11987.0]
+
+
+def test_three_decimals_stay_decimals_in_comma_grouping_languages():
+    assert _parsed(["12.345", "11.987"], "en") == [12.345, 11.987]
+    assert _parsed(["12.345", "0.5"], "de") == [12.345, 0.5]
+
+
+def test_detect_scale():
+    assert detect_scale("in EUR millions") == (1e6, "EUR")
+    assert detect_scale("TEUR") == (1e3, "EUR")
+    assert detect_scale("Revenue") == (1.0, None)
+
+
+def test_blank_and_repeated_headers_keep_every_metric_value(client, fake_api, monkeypatch):
+    fake_api.routes["/processed-filings/5/"] = {"id": 5, "markdown": REPORT, "filing": {"id": 1, "language": "en"}}
+    # Run the extraction in a worker process, as for a large document.
+    monkeypatch.setattr(pipeline, "workers", 1)
+    monkeypatch.setattr(pipeline, "inline_bytes", 0)
+    monkeypatch.setattr(extraction_cache, "_entries", type(extraction_cache._entries)())
+    try:
+        result = asyncio.run(extract_financial_tables(client, 5))
+    finally:
+        pipeline.close()
+    assert result["tables"][0]["columns"] == ["2023 (column 1)", "2023 (column 2)", "column 3", "2022"]
+    assert result["metrics"]["revenue"]["values"] == {
+        "2023 (column 1)": 1.2e9, "2023 (column 2)": 1.15e9, "column 3": 1.1e9, "2022": 1e9,
+    }
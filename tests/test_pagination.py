@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from conftest import make_filings
+from src.pagination import START_CURSOR, decode_cursor, encode_cursor, fetch_filings_keyset
+
+
+def _scan(client, page_size, ordering, cursor=START_CURSOR, pages=None):
+    """
+    Follow cursors from ``cursor`` (for at most ``pages`` pages); returns the IDs and cursors seen.
+    """
+    async def run():
+        ids, cursors, current = [], [], cursor
+        while current and (pages is None or len(cursors) < pages):
+            page = await fetch_filings_keyset(client, page_size, cursor=current, ordering=ordering)
+            assert "error" not in page, page
+            ids += [f["id"] for f in page["results"]]
+            current = page["next_cursor"]
+            cursors.append(current)
+        return ids, cursors
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("ordering", ["release_datetime", "-release_datetime"])
+@pytest.mark.parametrize("page_size", [7, 100])
+def test_scan_returns_every_filing_once_in_datetime_then_id_order(client, fake_api, ordering, page_size):
+    fake_api.filings = make_filings(500, distinct_datetimes=3)
+    ids, cursors = _scan(client, page_size, ordering)
+    assert sorted(ids) == list(range(1, 501)) and len(ids) == 500
+    by_id = {f["id"]: f["release_datetime"] for f in fake_api.filings}
+    keys = [(by_id[i], i) for i in ids]
+    assert keys == sorted(keys, reverse=ordering.startswith("-"))
+    # The cursor is the last (datetime, id), whatever the number of ties.
+    assert max(len(c) for c in cursors if c) < 100
+
+
+def test_cursor_resumes_after_filings_are_published_mid_scan(client, fake_api):
+    fake_api.filings = make_filings(200, distinct_datetimes=50)
+    first, cursors = _scan(client, 30, "release_datetime", pages=2)
+    fake_api.filings.insert(0, {"id": 1000, "title": "Late", "release_datetime": "2030-01-01T00:00:00Z"})
+    fake_api.filings.append({"id": 1001, "title": "Backdated", "release_datetime": "2000-01-01T00:00:00Z"})
+
+    rest, _ = _scan(client, 30, "release_datetime", cursor=cursors[-1])
+    assert sorted(first + rest) == list(range(1, 201)) + [1000]
+    assert not set(first) & set(rest)
+
+
+def test_filing_without_the_ordering_datetime_is_an_error(client, fake_api):
+    fake_api.filings = make_filings(150)
+    fake_api.filings[10]["release_datetime"] = None
+    page = asyncio.run(fetch_filings_keyset(client, 50, cursor=START_CURSOR, ordering="release_datetime"))
+    assert "has no release_datetime" in page["error"]
+
+
+def test_cursor_from_other_filters_or_malformed_is_rejected(client, fake_api):
+    fake_api.filings = make_filings(150)
+    page = asyncio.run(fetch_filings_keyset(client, 50, cursor=START_CURSOR, ordering="release_datetime"))
+    other = asyncio.run(fetch_filings_keyset(client, 50, cursor=page["next_cursor"], ordering="-release_datetime"))
+    assert "different filters" in other["error"]
+    legacy = encode_cursor({"f": decode_cursor(page["next_cursor"])["f"], "v": "2024", "ids": [1, 2]})
+    assert asyncio.run(fetch_filings_keyset(client, 50, cursor=legacy, ordering="release_datetime"))["error"] \
+        == "Error: invalid cursor."
+
+
+def test_exclusive_window_filters_are_detected(client, fake_api):
+    fake_api.filings = make_filings(150)
+    page = asyncio.run(fetch_filings_keyset(client, 50, cursor=START_CURSOR, ordering="release_datetime"))
+    last = page["results"][-1]
+    fake_api.routes[f"/filings/{last['id']}/"] = last
+    window = fake_api._filings
+
+    def exclusive(params):
+        bound = params.get("release_datetime_from")
+        return [f for f in window(params) if bound is None or f["release_datetime"] > bound]
+
+    fake_api._filings = exclusive
+    result = asyncio.run(fetch_filings_keyset(client, 50, cursor=page["next_cursor"], ordering="release_datetime"))
+    assert "exclude their bound" in result["error"]
@@ -0,0 +1,82 @@
+import asyncio
+import types
+
+import pytest
+
+from src import rate_limit
+from src.rate_limit import RateLimiter, SharedRateLimiter
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """
+    Frozen clock for the limiter (both its monotonic and wall-clock readings); set ``now.t`` to move it.
+    """
+    clock = types.SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=lambda: clock.t, time=lambda: clock.t))
+    return clock
+
+
+def test_burst_then_wait_for_refill(now):
+    limiter = RateLimiter(rate=4, burst=2)
+    assert limiter._take("a") == 0
+    assert limiter._take("a") == 0
+    assert limiter._take("a") == 0.25
+    now.t += 0.125
+    assert limiter._take("a") == 0.125
+    now.t += 0.125
+    assert limiter._take("a") == 0
+
+
+def test_refill_is_capped_at_the_burst(now):
+    limiter = RateLimiter(rate=10, burst=2)
+    limiter._take("a")
+    now.t += 60
+    assert [limiter._take("a") for _ in range(3)] == [0, 0, pytest.approx(0.1)]
+
+
+def test_buckets_are_independent(now):
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter._take("tenant-a") == 0
+    assert limiter._take("tenant-b") == 0
+    assert limiter._take("tenant-a") > 0
+
+
+def test_try_acquire_does_not_wait(now):
+    limiter = RateLimiter(rate=1, burst=1)
+
+    async def run():
+        return [await limiter.try_acquire("a") for _ in range(2)]
+
+    assert asyncio.run(run()) == [True, False]
+    assert asyncio.run(RateLimiter(rate=0).try_acquire("a")) is True
+
+
+def test_shared_limiter_splits_one_bucket_between_processes(now, tmp_path):
+    path = str(tmp_path / "limits.db")
+    first, second = SharedRateLimiter(path, rate=4, burst=2), SharedRateLimiter(path, rate=4, burst=2)
+
+    async def take(limiter):
+        return await limiter._take_async("default")
+
+    async def run():
+        taken = [await take(first), await take(second), await take(first)]
+        now.t += 0.25
+        return taken + [await take(second)]
+
+    assert asyncio.run(run()) == [0, 0, 0.25, 0]
+
+
+def test_shared_limiter_keeps_the_lock_error_and_recovers(now, tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "limits.db")
+    limiter = SharedRateLimiter(path, rate=4, burst=2)
+    limiter._conn.execute("PRAGMA busy_timeout = 0")
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        limiter._take("default")
+    other.execute("ROLLBACK")
+    assert limiter._take("default") == 0
+    assert not limiter._conn.in_transaction
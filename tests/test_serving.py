@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from src import serving
+from src.serving import Drain, track_requests
+
+
+@pytest.fixture
+def drain(monkeypatch):
+    fresh = Drain()
+    monkeypatch.setattr(serving, "drain", fresh)
+    return fresh
+
+
+def test_wait_returns_once_the_last_request_finishes(drain):
+    async def run():
+        drain.enter()
+        drain.enter()
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, drain.exit)
+        loop.call_later(0.1, drain.exit)
+        started = time.monotonic()
+        done = await drain.wait(5)
+        return done, time.monotonic() - started
+
+    done, waited = asyncio.run(run())
+    assert done and 0.05 <= waited < 1
+    assert asyncio.run(drain.wait(0)) is True
+
+
+def test_wait_gives_up_after_the_timeout(drain):
+    drain.enter()
+    assert asyncio.run(drain.wait(0.05)) is False
+    assert drain.in_flight == 1
+
+
+def test_only_posts_count_as_in_flight(drain):
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(drain.in_flight)
+
+    tracked = track_requests(app)
+
+    async def run():
+        await tracked({"type": "http", "method": "POST"}, None, None)
+        await tracked({"type": "http", "method": "GET"}, None, None)
+
+    asyncio.run(run())
+    assert seen == [1, 0] and drain.in_flight == 0
+
+
+@pytest.mark.skipif(serving.DrainMiddleware is None, reason="fastmcp without middleware support")
+def test_new_tool_calls_are_rejected_while_draining(drain):
+    from types import SimpleNamespace
+
+    from fastmcp.exceptions import ToolError
+
+    middleware = serving.DrainMiddleware()
+    context = SimpleNamespace(message=SimpleNamespace(name="get_company_detail"))
+
+    async def call_next(ctx):
+        return drain.in_flight
+
+    assert asyncio.run(middleware.on_call_tool(context, call_next)) == 1
+    drain.begin()
+    with pytest.raises(ToolError, match="shutting down"):
+        asyncio.run(middleware.on_call_tool(context, call_next))
+
+
+def test_shutdown_gives_uvicorn_only_the_rest_of_the_budget(drain, monkeypatch):
+    uvicorn = pytest.importorskip("uvicorn")
+    granted = []
+
+    async def base_shutdown(self, sockets=None):
+        granted.append(self.config.timeout_graceful_shutdown)
+
+    async def close_upstream():
+        granted.append("closed")
+
+    monkeypatch.setattr(uvicorn.Server, "shutdown", base_shutdown)
+    monkeypatch.setattr(serving, "close_upstream", close_upstream)
+    monkeypatch.setattr(serving, "FLUSH_DELAY", 0)
+    server = serving._server_class()(uvicorn.Config(app=None, timeout_graceful_shutdown=0.3))
+    drain.enter()
+
+    started = time.monotonic()
+    asyncio.run(server.shutdown())
+    assert time.monotonic() - started < 0.6
+    assert drain.draining
+    assert 0 <= granted[0] < 0.05 and granted[1] == "closed"
+    assert server.config.timeout_graceful_shutdown == 0.3
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from src import similarity  # noqa: E402
+from src.similarity import SimilarityIndex, find_similar_filings  # noqa: E402
+
+TEXTS = {
+    1: "Annual report: revenue growth in wind turbines and offshore energy projects.",
+    2: "Quarterly report: wind turbines revenue and offshore energy orders.",
+    3: "Bank statement on deposits, lending margins and mortgage portfolios.",
+}
+
+
+def _serve(fake_api, company=7):
+    fake_api.filings = []
+    for filing_id, text in TEXTS.items():
+        filing = {"id": filing_id, "title": f"Report {filing_id}", "company": company, "processed_filing_id": 100 + filing_id,
+                  "release_datetime": f"2024-01-0{filing_id}T00:00:00Z"}
+        fake_api.filings.append(filing)
+        fake_api.routes[f"/filings/{filing_id}/"] = filing
+        fake_api.routes[f"/processed-filings/{100 + filing_id}/"] = {"id": 100 + filing_id, "markdown": text}
+
+
+def test_similar_skips_rows_and_terms_added_after_the_last_flush():
+    index = SimilarityIndex()
+    for filing_id in (1, 2):
+        index.add({"id": filing_id}, similarity.document_terms(TEXTS[filing_id]))
+    asyncio.run(index.search(1, index.select()))
+    index.add({"id": 3}, similarity.document_terms(TEXTS[3]))
+
+    results = index.similar(1, index.select())
+    assert [r["filing_id"] for r in results] == [2]
+
+
+def test_company_given_as_a_bare_id_is_matched(client, fake_api, monkeypatch):
+    monkeypatch.setattr(similarity, "_indexes", {})
+    _serve(fake_api)
+    result = asyncio.run(find_similar_filings(client, 1, company=7))
+    assert "error" not in result, result
+    assert [r["filing_id"] for r in result["results"]] == [2, 3]
+    assert result["results"][0]["shared_terms"][:2] and result["filing"]["company_id"] == 7
+
+
+def test_full_index_is_replaced_so_new_filings_can_be_compared(client, fake_api, monkeypatch):
+    full = SimilarityIndex(max_documents=2)
+    for filing_id in (41, 42):
+        full.add({"id": filing_id}, {"unrelated": 1})
+    monkeypatch.setattr(similarity, "_indexes", {client.cache_namespace: full})
+    _serve(fake_api)
+
+    result = asyncio.run(find_similar_filings(client, 1))
+    assert "error" not in result, result
+    assert result["indexed"] == 3 and 41 not in similarity.similarity_index(client.cache_namespace)
+
+
+def test_full_index_that_cannot_hold_the_seed_says_so(client, fake_api, monkeypatch):
+    monkeypatch.setattr(similarity, "_indexes", {})
+    monkeypatch.setattr(similarity, "SimilarityIndex", lambda: SimilarityIndex(max_documents=0))
+    _serve(fake_api)
+    assert "index is full" in asyncio.run(find_similar_filings(client, 1))["error"]
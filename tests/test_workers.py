@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+from src import workers
+from src.workers import WorkerPool
+
+
+class _Client:
+    async def aclose(self):
+        pass
+
+
+def _worker(index, alive):
+    return SimpleNamespace(index=index, draining=False, client=_Client(),
+                           process=SimpleNamespace(is_alive=lambda: alive, exitcode=None if alive else 1))
+
+
+def test_failed_respawn_is_logged_backed_off_and_retried(tmp_path, monkeypatch, capsys):
+    pool = WorkerPool(2, "streamable-http", runtime_dir=str(tmp_path))
+    dead, healthy = _worker(0, False), _worker(1, True)
+    pool.workers = [dead, healthy]
+    attempts = []
+    clock = SimpleNamespace(t=100.0)
+    monkeypatch.setattr(workers.time, "monotonic", lambda: clock.t)
+
+    async def spawn(index):
+        attempts.append(clock.t)
+        if len(attempts) < 3:
+            raise RuntimeError("address in use")
+        return _worker(index, True)
+
+    monkeypatch.setattr(pool, "_spawn", spawn)
+
+    async def run():
+        for _ in range(8):
+            if not pool.workers[0].process.is_alive():
+                await pool._replace(0, pool.workers[0])
+            clock.t += 0.5
+
+    assert pool.route(None) is healthy
+    asyncio.run(run())
+    assert attempts == [100.0, 101.0, 103.0]
+    assert pool.workers[0] is not dead and pool.workers[0].process.is_alive()
+    err = capsys.readouterr()
+    assert err.out == ""
+    assert err.err.count("failed (address in use)") == 2